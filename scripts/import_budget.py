@@ -0,0 +1,91 @@
+"""Measures the time taken to import the bot and its startup extensions.
+
+Runs the imports in a fresh interpreter with `python -X importtime`, and exits
+with a non-zero status if the median import time exceeds the budget.
+
+Usage: python scripts/import_budget.py [--budget MS] [--runs N] [--top N]
+The budget can also be set with the IMPORT_TIME_BUDGET_MS environment variable.
+"""
+
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / "src"
+DEFAULT_BUDGET_MS = 750.0
+
+
+def startup_modules() -> list[str]:
+	"""Returns the modules imported when the bot starts"""
+	sys.path.insert(0, str(SRC_DIR))
+	from blueonblue.bot import initial_extensions
+
+	return ["blueonblue", "blueonblue.bot"] + [f"cogs.{ext}" for ext in initial_extensions]
+
+
+def measure(modules: list[str]) -> tuple[float, dict[str, tuple[float, float]]]:
+	"""Imports the modules in a fresh interpreter.
+
+	Returns the total import time in milliseconds, and the self and cumulative time for each module."""
+	env = os.environ.copy()
+	env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+		env=env,
+		stderr=subprocess.PIPE,
+		text=True,
+		check=True,
+	)
+	total = 0.0
+	times: dict[str, tuple[float, float]] = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		selfTime, cumulative, name = line.removeprefix("import time:").split("|")
+		times[name.strip()] = (int(selfTime) / 1000, int(cumulative) / 1000)
+		# Top level imports are only indented by a single space
+		if not name.startswith("  "):
+			total += int(cumulative) / 1000
+	return total, times
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument(
+		"--budget",
+		type=float,
+		default=float(os.environ.get("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS)),
+		help="Import time budget in milliseconds",
+	)
+	parser.add_argument("--runs", type=int, default=5, help="Number of measurements to take")
+	parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+	args = parser.parse_args()
+
+	modules = startup_modules()
+	totals: list[float] = []
+	times: dict[str, tuple[float, float]] = {}
+	for _ in range(args.runs):
+		total, times = measure(modules)
+		totals.append(total)
+
+	print("Slowest modules by self time (last run):")
+	for name, (selfTime, cumulative) in sorted(times.items(), key=lambda t: t[1][0], reverse=True)[: args.top]:
+		print(f"  {selfTime:8.1f} ms self {cumulative:8.1f} ms cumulative  {name}")
+	print("Startup extension modules (cumulative):")
+	for module in modules:
+		if module in times:
+			print(f"  {times[module][1]:8.1f} ms  {module}")
+
+	median = statistics.median(totals)
+	print(f"Median import time over {args.runs} runs: {median:.1f} ms (budget {args.budget:.1f} ms)")
+	if median > args.budget:
+		print("Import time budget exceeded", file=sys.stderr)
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
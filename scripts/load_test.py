@@ -0,0 +1,71 @@
+"""Runs load test scenarios against the bot's cogs, without connecting to Discord.
+
+The bot is run against an offline stand-in for the Discord gateway and REST API (blueonblue.harness).
+Each scenario reports throughput and response latency percentiles for each stage, the REST
+requests the bot made, and the completion time of each command split into phases.
+
+Scenarios:
+  ping          /ping on a tag that every member has joined (default 1000 members)
+  autocomplete  /ping tag autocomplete over a large number of pings (default 10000 pings)
+  raffle        Members join a raffle through its button (default 500 joins in 10 seconds)
+
+Usage: python scripts/load_test.py SCENARIO [SCENARIO ...] [--members N] [--option NAME=VALUE ...] [--loop uvloop]
+Options are passed to the scenario functions, for example --option joins=1000 --option seconds=5
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import pathlib
+import sys
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from blueonblue.__main__ import EVENT_LOOPS, event_loop_factory  # noqa: E402
+from blueonblue.harness import SCENARIOS, run_scenario  # noqa: E402
+
+
+def parse_option(text: str) -> tuple[str, int | float | str]:
+	name, _, value = text.partition("=")
+	for convert in (int, float):
+		try:
+			return name, convert(value)
+		except ValueError:
+			pass
+	return name, value
+
+
+async def run(scenarios: list[str], members: int | None, options: dict) -> None:
+	for name in scenarios:
+		# Only pass the options that the scenario accepts
+		parameters = inspect.signature(SCENARIOS[name][2]).parameters
+		scenarioOptions = {k: v for k, v in options.items() if k in parameters}
+		results, report = await run_scenario(name, members=members, **scenarioOptions)
+		for result in results:
+			print(result.report())
+		print(report)
+		print()
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("scenarios", nargs="+", choices=sorted(SCENARIOS))
+	parser.add_argument("--members", type=int, default=None, help="Members in the fake guild")
+	parser.add_argument(
+		"--option", action="append", default=[], metavar="NAME=VALUE", help="Scenario option. Can be repeated."
+	)
+	parser.add_argument("--loop", choices=EVENT_LOOPS, default="asyncio", help="Event loop implementation")
+	parser.add_argument("-v", "--verbose", action="store_true", help="Show bot log messages")
+	args = parser.parse_args()
+
+	logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+	options = dict(parse_option(o) for o in args.option)
+	with asyncio.Runner(loop_factory=event_loop_factory(args.loop)) as runner:
+		runner.run(run(args.scenarios, args.members, options))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
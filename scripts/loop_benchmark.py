@@ -0,0 +1,254 @@
+"""Compares interaction round-trip latency and CPU time per event on the asyncio and uvloop event loops.
+
+A stand-in server process plays the part of Discord. It sends gateway-style INTERACTION_CREATE
+dispatches over a websocket, and records when the matching interaction callback arrives over HTTP.
+A client process for each event loop handles every dispatch the way the bot does: it decodes the
+gateway JSON, runs a query through an asqlite connection, and posts the interaction callback.
+
+The stand-in always runs on the default asyncio event loop, so only the client's event loop changes.
+Timestamps use the system-wide monotonic clock, so they can be compared between processes.
+Latency varies between runs on a busy machine, so compare the medians over several runs.
+
+Usage: python scripts/loop_benchmark.py [--events N] [--rate N] [--loops asyncio uvloop]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from blueonblue.__main__ import event_loop_factory  # noqa: E402
+from blueonblue.monitor import percentile  # noqa: E402
+
+
+def interaction_payload(sequence: int) -> dict:
+	"""Builds an INTERACTION_CREATE dispatch, similar in size and shape to a real slash command"""
+	user = {
+		"id": str(100000000000000000 + sequence % 500),
+		"username": f"user{sequence % 500}",
+		"global_name": f"User {sequence % 500}",
+		"discriminator": "0",
+		"avatar": "a" * 32,
+		"public_flags": 0,
+	}
+	return {
+		"op": 0,
+		"t": "INTERACTION_CREATE",
+		"s": sequence,
+		"d": {
+			"id": str(200000000000000000 + sequence),
+			"application_id": "300000000000000000",
+			"type": 2,
+			"token": f"token{sequence}",
+			"version": 1,
+			"guild_id": "400000000000000000",
+			"channel_id": "500000000000000000",
+			"locale": "en-US",
+			"guild_locale": "en-US",
+			"app_permissions": "2251799813685247",
+			"entitlements": [],
+			"authorizing_integration_owners": {"0": "400000000000000000"},
+			"context": 0,
+			"member": {
+				"user": user,
+				"roles": [str(600000000000000000 + r) for r in range(8)],
+				"joined_at": "2021-01-01T00:00:00.000000+00:00",
+				"nick": None,
+				"permissions": "2251799813685247",
+				"flags": 0,
+				"deaf": False,
+				"mute": False,
+				"pending": False,
+			},
+			"data": {
+				"id": "700000000000000000",
+				"name": "ping",
+				"type": 1,
+				"options": [{"name": "tag", "type": 3, "value": f"tag{sequence % 20}"}],
+			},
+			"sent": time.monotonic_ns(),
+		},
+	}
+
+
+async def serve(events: int, rate: float) -> None:
+	"""Runs the Discord stand-in. Prints its port, then the results of each client run as JSON."""
+	latencies: dict[int, float] = {}
+	done = asyncio.Event()
+
+	async def gateway(request: web.Request) -> web.WebSocketResponse:
+		ws = web.WebSocketResponse()
+		await ws.prepare(request)
+		latencies.clear()
+		done.clear()
+		interval = 1 / rate if rate > 0 else 0
+		start = time.monotonic()
+		for sequence in range(events):
+			if interval > 0:
+				# Pace the events against the start time, so that slow sends do not reduce the rate
+				delay = start + sequence * interval - time.monotonic()
+				if delay > 0:
+					await asyncio.sleep(delay)
+			await ws.send_str(json.dumps(interaction_payload(sequence)))
+		await done.wait()
+		await ws.close()
+		return ws
+
+	async def callback(request: web.Request) -> web.Response:
+		received = time.monotonic_ns()
+		body = await request.json()
+		latencies[int(request.match_info["id"])] = (received - body["sent"]) / 1e6
+		if len(latencies) == events:
+			print(json.dumps({"latencies": list(latencies.values())}), flush=True)
+			done.set()
+		return web.Response(status=204)
+
+	app = web.Application()
+	app.router.add_get("/gateway", gateway)
+	app.router.add_post("/api/v10/interactions/{id}/{token}/callback", callback)
+	runner = web.AppRunner(app, access_log=None)
+	await runner.setup()
+	site = web.TCPSite(runner, "127.0.0.1", 0)
+	await site.start()
+	print(runner.addresses[0][1], flush=True)
+	await asyncio.Event().wait()
+
+
+async def client(port: int, database: str) -> None:
+	"""Handles every dispatch from the stand-in, and prints the CPU time used as JSON"""
+	import asqlite
+
+	base = f"http://127.0.0.1:{port}"
+	tasks: set[asyncio.Task] = set()
+	async with asqlite.create_pool(database) as pool, aiohttp.ClientSession() as session:
+
+		async def handle(data: dict) -> None:
+			tag = data["data"]["options"][0]["value"]
+			async with pool.acquire() as conn:
+				rows = await conn.fetchall("SELECT user_id FROM ping_users WHERE tag = :tag", {"tag": tag})
+			payload = {
+				"type": 4,
+				"data": {"content": " ".join(f"<@{r['user_id']}>" for r in rows)},
+				"sent": data["sent"],
+			}
+			async with session.post(
+				f"{base}/api/v10/interactions/{data['id']}/{data['token']}/callback", json=payload
+			) as response:
+				response.raise_for_status()
+
+		cpuStart = time.process_time()
+		async with session.ws_connect(f"{base}/gateway", max_msg_size=0) as ws:
+			async for message in ws:
+				if message.type != aiohttp.WSMsgType.TEXT:
+					break
+				dispatch = json.loads(message.data)
+				task = asyncio.create_task(handle(dispatch["d"]))
+				tasks.add(task)
+				task.add_done_callback(tasks.discard)
+		await asyncio.gather(*tasks)
+		print(json.dumps({"cpu": time.process_time() - cpuStart}), flush=True)
+
+
+def create_database(path: str) -> None:
+	import sqlite3
+
+	connection = sqlite3.connect(path)
+	connection.execute("CREATE TABLE ping_users (tag TEXT, user_id INTEGER)")
+	connection.executemany(
+		"INSERT INTO ping_users VALUES (?, ?)", [(f"tag{i % 20}", 100000000000000000 + i) for i in range(400)]
+	)
+	connection.execute("CREATE INDEX ping_users_tag ON ping_users (tag)")
+	connection.commit()
+	connection.close()
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--events", type=int, default=2000, help="Number of interactions per run")
+	parser.add_argument("--rate", type=float, default=500, help="Interactions per second. 0 sends them all at once.")
+	parser.add_argument("--runs", type=int, default=3, help="Number of runs for each event loop")
+	parser.add_argument("--loops", nargs="+", default=["asyncio", "uvloop"], choices=["asyncio", "uvloop"])
+	parser.add_argument("--role", choices=["server", "client"], help=argparse.SUPPRESS)
+	parser.add_argument("--loop", default="asyncio", help=argparse.SUPPRESS)
+	parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+	parser.add_argument("--database", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.role == "server":
+		asyncio.run(serve(args.events, args.rate))
+		return 0
+	if args.role == "client":
+		# Select the event loop the same way the bot does
+		with asyncio.Runner(loop_factory=event_loop_factory(args.loop)) as runner:
+			runner.run(client(args.port, args.database))
+		return 0
+
+	if "uvloop" in args.loops:
+		try:
+			import uvloop  # noqa: F401
+		except ImportError:
+			print("uvloop is not installed. Benchmarking asyncio only.", file=sys.stderr)
+			args.loops = [loop for loop in args.loops if loop != "uvloop"]
+
+	env = os.environ.copy()
+	env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+	script = str(pathlib.Path(__file__).resolve())
+	with tempfile.TemporaryDirectory() as tempDir:
+		database = os.path.join(tempDir, "benchmark.sqlite3")
+		create_database(database)
+		server = subprocess.Popen(
+			[sys.executable, script, "--role", "server", "--events", str(args.events), "--rate", str(args.rate)],
+			stdout=subprocess.PIPE,
+			text=True,
+			env=env,
+		)
+		try:
+			assert server.stdout is not None
+			port = int(server.stdout.readline())
+			print(f"{'loop':8} {'run':>3} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'cpu/event':>10}")
+			summary: dict[str, list[tuple[float, float]]] = {}
+			for loopName in args.loops:
+				for run in range(1, args.runs + 1):
+					clientArgs = ["--role", "client", "--loop", loopName, "--port", str(port), "--database", database]
+					result = subprocess.run(
+						[sys.executable, script, *clientArgs],
+						stdout=subprocess.PIPE,
+						text=True,
+						env=env,
+						check=True,
+					)
+					cpu = json.loads(result.stdout.splitlines()[-1])["cpu"]
+					latencies = json.loads(server.stdout.readline())["latencies"]
+					p50, p95, p99, p100 = (percentile(latencies, p) for p in (50, 95, 99, 100))
+					cpuPerEvent = cpu / args.events * 1e6
+					summary.setdefault(loopName, []).append((p95, cpuPerEvent))
+					print(
+						f"{loopName:8} {run:>3} {p50:>6.2f}ms {p95:>6.2f}ms {p99:>6.2f}ms {p100:>6.2f}ms {cpuPerEvent:>8.0f}us"
+					)
+		finally:
+			server.terminate()
+			server.wait()
+
+	print(f"Median over {args.runs} runs of {args.events} interactions at {args.rate:g}/s:")
+	for loopName, results in summary.items():
+		print(
+			f"  {loopName:8} p95 {statistics.median(r[0] for r in results):.2f}ms, "
+			f"cpu/event {statistics.median(r[1] for r in results):.0f}us"
+		)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
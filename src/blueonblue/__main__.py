@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 import argparse
+import asyncio
 import logging
 import os
+from typing import Callable
 
 import discord
 
@@ -45,10 +47,64 @@ def migrate_db():
 	connection.close()
 
 
+# Event loop implementations that can be selected with EVENT_LOOP or --loop
+EVENT_LOOPS = ("asyncio", "uvloop")
+
+
+def event_loop_factory(engine: str) -> Callable[[], asyncio.AbstractEventLoop] | None:
+	"""Selects the event loop implementation to run the bot on
+
+	Parameters
+	----------
+	engine : str
+		Event loop implementation, either "asyncio" or "uvloop"
+
+	Returns
+	-------
+	Callable[[], asyncio.AbstractEventLoop] | None
+		Event loop factory, or None to use the default asyncio event loop.
+		Falls back to the default event loop if uvloop is not installed.
+	"""
+	if engine not in EVENT_LOOPS:
+		raise ValueError(f"Unknown event loop {engine!r}. Valid event loops: {', '.join(EVENT_LOOPS)}")
+	if engine == "uvloop":
+		try:
+			import uvloop
+		except ImportError:
+			_log.warning("uvloop is not installed. Using the default asyncio event loop.")
+			return None
+		return uvloop.new_event_loop
+	return None
+
+
+def run_bot(bot: BlueOnBlueBot, token: str, loopFactory: Callable[[], asyncio.AbstractEventLoop] | None = None):
+	"""Runs the bot until it is stopped. Equivalent to bot.run, with a selectable event loop."""
+
+	async def runner():
+		async with bot:
+			await bot.start(token, reconnect=True)
+
+	try:
+		with asyncio.Runner(loop_factory=loopFactory) as asyncRunner:
+			loop = asyncRunner.get_loop()
+			_log.info(f"Using event loop {type(loop).__module__}.{type(loop).__name__}")
+			asyncRunner.run(runner())
+	except KeyboardInterrupt:
+		# The runner closes the event loop, and the bot closes its own connections
+		pass
+
+
 def main():
 	# Argument setup
 	parser = argparse.ArgumentParser()
 	parser.add_argument("-d", "--debug", action="store_true", dest="debug", help="Enable debug logging")
+	parser.add_argument(
+		"--loop",
+		choices=EVENT_LOOPS,
+		default=None,
+		dest="loop",
+		help="Event loop implementation. Overrides the EVENT_LOOP environment variable.",
+	)
 	args = parser.parse_args()
 
 	# Start the bot
@@ -62,7 +118,7 @@ def main():
 
 	# Set up logging
 	logLevel = logging.DEBUG if (args.debug or get_config_value("DEBUG_LOGGING") is not None) else logging.INFO
-	setup_logging(level=logLevel)
+	setup_logging(level=logLevel, jsonFormat=get_config_value("LOG_FORMAT", "text").strip().lower() == "json")
 	_log.info("Initializing Blue on Blue")
 
 	# Apply database migrations if necessary
@@ -76,9 +132,12 @@ def main():
 		_log.error("Unable to locate a Discord API token. Exiting.")
 		exit()
 
+	# Select the event loop. uvloop is used if requested and installed.
+	loopFactory = event_loop_factory(args.loop or get_config_value("EVENT_LOOP", "asyncio").strip().lower())
+
 	# Start the bot
 	_log.info("Starting Blue on Blue")
-	bot.run(botToken, reconnect=True, log_handler=None)
+	run_bot(bot, botToken, loopFactory)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,15 @@
 import asyncio
+import graphlib
+import hashlib
+import json
 import logging
+import math
 import sys
 import traceback
 from datetime import datetime
 from signal import SIGTERM
+from time import perf_counter
+from typing import Iterable
 
 import aiohttp
 import asqlite
@@ -11,25 +17,41 @@ import discord
 from discord.ext import commands
 
 from . import checks, config, db
+from .lib.steam import BreakerState, SteamClient
+from .instrumentation import CommandInstrumentation, CommandTiming
+from .metrics import (
+	BotMetrics,
+	CallbackMetric,
+	MetricsServer,
+	discord_trace_config,
+	http_trace_config,
+	instrument_pool,
+)
+from .monitor import LoopMonitor, resident_memory
 
 _log = logging.getLogger(__name__)
 
+# Seconds to wait for the gateway to send the member list of a guild
+MEMBER_CHUNK_TIMEOUT = 60.0
+
 __all__ = ["BlueOnBlueBot", "BlueOnBlueTree"]
 
-initial_extensions = [
-	"botcontrol",
-	"arma_stats",
-	"config",
-	"gold",
-	"info",
-	"jail",
-	"missions",
-	"pings",
-	"raffle",
-	"users",
-	"utils",
-	"verify",
-]
+# Extensions to load on startup, mapped to the extensions that must be loaded before them.
+# Extensions without dependencies between them are loaded concurrently.
+initial_extensions: dict[str, tuple[str, ...]] = {
+	"botcontrol": (),
+	"arma_stats": (),
+	"config": (),
+	"gold": (),
+	"info": (),
+	"jail": (),
+	"missions": (),
+	"pings": (),
+	"raffle": (),
+	"users": (),
+	"utils": (),
+	"verify": (),
+}
 
 
 class KeyboardInterruptHandler:
@@ -52,13 +74,28 @@ class BlueOnBlueBot(commands.Bot):
 	startTime: datetime
 	firstStart: bool
 	pool: asqlite.Pool
+	steam: SteamClient
 
 	def __init__(self):
+		# Time spent loading each extension, and time spent in cog_load for each extension's cogs
+		self.extensionLoadTimes: dict[str, float] = {}
+		self.cogLoadTimes: dict[str, float] = {}
+
+		# Set up metrics collection. Metrics are only served if a metrics port is configured.
+		self.metrics = BotMetrics()
+		self.metricsServer: MetricsServer | None = None
+
+		# Per-command latency, split into DB, HTTP, and Discord API phases
+		self.instrumentation = CommandInstrumentation(onFinish=self._command_finished)
+
 		# Set up our core config
 		self.config = config.BotConfig()
 
+		# Monitor event loop lag
+		self.loopMonitor = LoopMonitor(self.config.loop_lag_threshold, onSample=self.metrics.loopLag.observe)
+
 		# Set up our DB
-		self.db = db.DB("data/blueonblue.sqlite3")
+		self.db = db.DB("data/blueonblue.sqlite3", metrics=self.metrics)
 
 		# Initialize the server config
 		self.serverConfig = config.ServerConfig(self)
@@ -76,6 +113,9 @@ class BlueOnBlueBot(commands.Bot):
 		else:
 			prefix = commands.when_mentioned
 
+		# Member and message caches
+		memoryProfile = self.config.memory_profile
+
 		# Call the commands.Bot init
 		super().__init__(
 			command_prefix=prefix,
@@ -83,24 +123,183 @@ class BlueOnBlueBot(commands.Bot):
 			case_insensitive=True,
 			intents=intents,
 			tree_cls=BlueOnBlueTree,
+			http_trace=discord_trace_config(self.metrics),
+			max_messages=memoryProfile.maxMessages,
+			member_cache_flags=memoryProfile.member_cache_flags(),
+			chunk_guilds_at_startup=memoryProfile.chunkAtStartup,
 		)
 
-	async def syncAppCommands(self):
+	def command_tree_hash(self, guild: discord.abc.Snowflake | None = None) -> str:
+		"""Calculates a hash of the app commands that would be synchronized to discord.
+
+		Parameters
+		----------
+		guild : discord.abc.Snowflake | None, optional
+			Guild to calculate the hash for, by default None for global commands
+
+		Returns
+		-------
+		str
+			SHA-256 hash of the serialized command tree, as a hex string
+		"""
+		payload = [command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)]
+		payload.sort(key=lambda c: (c["type"], c["name"]))
+		serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+		return hashlib.sha256(serialized.encode()).hexdigest()
+
+	async def syncAppCommands(self, *, force: bool = False) -> bool:
 		"""|coro|
 
 		Synchronizes app commands to discord.
-		If a debug server is specified in config, commands will be synchronized to the specified guild instead of globally."""
-		# Synchronize our app command tree
+		If a debug server is specified in config, commands will be synchronized to the specified guild instead of globally.
+		Synchronization is skipped if the command tree has not changed since it was last synchronized.
+
+		Parameters
+		----------
+		force : bool, optional
+			Synchronize even if the command tree has not changed, by default False
+
+		Returns
+		-------
+		bool
+			If the commands were synchronized
+		"""
+		guild = None
 		if self.config.debug_server is not None:
 			# Debug ID present, synchronize commands to guild
 			guild = discord.Object(self.config.debug_server)
 			# Remove existing commands from the guild list
 			self.tree.clear_commands(guild=guild)
 			self.tree.copy_global_to(guild=guild)
-			await self.tree.sync(guild=guild)
+		# Global commands are stored with a scope of zero
+		scope = guild.id if guild is not None else 0
+
+		treeHash = self.command_tree_hash(guild)
+		async with self.pool.acquire() as conn:
+			row = await conn.fetchone("SELECT tree_hash FROM app_command_sync WHERE scope = :scope", {"scope": scope})
+		if not force and row is not None and row["tree_hash"] == treeHash:
+			_log.info("App commands unchanged since last sync. Skipping synchronization.")
+			return False
+
+		# Synchronize our app command tree
+		await self.tree.sync(guild=guild)
+		async with self.pool.acquire() as conn:
+			await conn.execute(
+				"INSERT OR REPLACE INTO app_command_sync (scope, tree_hash, sync_time) VALUES (:scope, :tree_hash, :now)",
+				{"scope": scope, "tree_hash": treeHash, "now": round(discord.utils.utcnow().timestamp())},
+			)
+			await conn.commit()
+		_log.info("App commands synchronized")
+		return True
+
+	async def notify_owner(self, message: str) -> None:
+		"""|coro|
+
+		Sends a direct message to the owner of the bot application.
+		Errors sending the message are logged and otherwise ignored.
+
+		Parameters
+		----------
+		message : str
+			Message to send
+		"""
+		try:
+			appInfo = await self.application_info()
+			await appInfo.owner.send(message)
+		except discord.HTTPException:
+			_log.warning(f"Unable to notify bot owner: {message}")
+
+	async def ensure_chunked(self, guild: discord.Guild) -> None:
+		"""|coro|
+
+		Requests all members of a guild if they have not been cached yet.
+		Guilds are only chunked at startup with the "full" memory profile.
+		Concurrent requests for the same guild share a single gateway request.
+		Once a guild has been chunked, its members are kept up to date by gateway events.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Guild to request members for
+
+		Raises
+		------
+		asyncio.TimeoutError
+			The gateway did not send the full member list in time
+		"""
+		if guild.chunked:
+			return
+		start = perf_counter()
+		try:
+			await asyncio.wait_for(guild.chunk(), timeout=MEMBER_CHUNK_TIMEOUT)
+		except asyncio.TimeoutError:
+			_log.warning(f"Timed out requesting members for guild [{guild.name}|{guild.id}]")
+			raise
+		_log.debug(f"Chunked guild [{guild.name}|{guild.id}] in {perf_counter() - start:.2f} seconds")
+
+	async def get_or_fetch_member(self, guild: discord.Guild, userID: int) -> discord.Member | None:
+		"""|coro|
+
+		Retrieves a member from the cache, or from the API if the guild has not been chunked.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Guild to retrieve the member from
+		userID : int
+			Discord user ID
+
+		Returns
+		-------
+		discord.Member | None
+			Member, or None if the user is not a member of the guild
+		"""
+		member = guild.get_member(userID)
+		if member is not None or guild.chunked:
+			return member
+		try:
+			return await guild.fetch_member(userID)
+		except discord.NotFound:
+			return None
+
+	async def get_members(self, guild: discord.Guild, userIDs: Iterable[int]) -> list[discord.Member]:
+		"""|coro|
+
+		Retrieves the members of a guild with the given user IDs, skipping users that are not in the guild.
+		Chunks the guild first if it has not been chunked, so that users who are not in the cache
+		can be told apart from users who have left the guild.
+		Interactions should be deferred before calling this for a guild that has not been chunked.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Guild to retrieve the members from
+		userIDs : Iterable[int]
+			Discord user IDs
+
+		Returns
+		-------
+		list[discord.Member]
+			Members, in the same order as the user IDs
+
+		Raises
+		------
+		asyncio.TimeoutError
+			The guild's members could not be loaded. No partial result is returned.
+		"""
+		await self.ensure_chunked(guild)
+		return [m for m in (guild.get_member(u) for u in userIDs) if m is not None]
+
+	def _steam_breaker_changed(self, state: BreakerState) -> None:
+		"""Notifies the bot owner when the Steam API circuit breaker changes state"""
+		if state == BreakerState.OPEN:
+			message = "Steam API appears to be degraded. Steam requests are paused."
+		elif state == BreakerState.CLOSED:
+			message = "Steam API has recovered. Steam requests have resumed."
 		else:
-			# Debug ID not present. Synchronize commands globally.
-			await self.tree.sync()
+			return
+		if self.is_ready():
+			self.loop.create_task(self.notify_owner(message), name="Notify Owner")
 
 	# Override the start function to set up our HTTP connection and SQLite DB
 	async def start(self, *args, **kwargs):
@@ -108,16 +307,43 @@ class BlueOnBlueBot(commands.Bot):
 
 		Overwritten start function to run the bot.
 		Sets up the HTTP client, then starts the bot."""
-		self.pool = await asqlite.create_pool("data/blueonblue.sqlite3")
-		self.httpSession = aiohttp.ClientSession(raise_for_status=True)
-		self.startTime = discord.utils.utcnow()
+		await self._open_resources()
 		await super().start(*args, **kwargs)
 
+	async def _open_resources(self) -> None:
+		"""|coro|
+
+		Sets up the database pool, HTTP session, and monitoring used by the bot.
+		Called by start before connecting to discord."""
+		if self.config.asyncio_debug:
+			# Log any callback that blocks the event loop for longer than the lag threshold
+			loop = asyncio.get_running_loop()
+			loop.set_debug(True)
+			loop.slow_callback_duration = self.config.loop_lag_threshold
+		self.loopMonitor.start()
+		self.pool = instrument_pool(await asqlite.create_pool("data/blueonblue.sqlite3"), self.metrics)
+		await self.serverConfig.load()
+		self.httpSession = aiohttp.ClientSession(raise_for_status=True, trace_configs=[http_trace_config(self.metrics)])
+		self.steam = SteamClient(
+			self.httpSession,
+			self.config.steam_api_token,
+			rateLimit=self.config.steam_rate_limit,
+			onBreakerStateChange=self._steam_breaker_changed,
+		)
+		self._register_metrics()
+		if self.config.metrics_port is not None:
+			self.metricsServer = MetricsServer(self.metrics, self.config.metrics_host, self.config.metrics_port)
+			await self.metricsServer.start()
+		self.startTime = discord.utils.utcnow()
+
 	async def close(self):
 		"""|coro|
 
 		Overwritten close function to stop the bot.
 		Closes down the asqlite pool and HTTP session when the bot is stopped."""
+		self.loopMonitor.stop()
+		if self.metricsServer is not None:
+			await self.metricsServer.stop()
 		await self.pool.close()
 		await self.httpSession.close()
 		# Clean up the SQLite Write-Ahead Log before closing the bot
@@ -128,6 +354,79 @@ class BlueOnBlueBot(commands.Bot):
 		await super().close()
 		_log.info("Bot stopped gracefully")
 
+	def _command_finished(self, timing: CommandTiming, status: str) -> None:
+		"""Records metrics for a finished command"""
+		self.metrics.commands.inc(timing.command, timing.kind, status)
+		if timing.total is not None:
+			self.metrics.commandLatency.observe(timing.total, timing.command, timing.kind)
+		if timing.firstResponse is not None:
+			self.metrics.commandResponse.observe(timing.firstResponse, timing.command, timing.kind)
+
+	def memory_report(self) -> str:
+		"""Describes the resident memory of the bot, and the size of its member and message caches"""
+		rss = resident_memory()
+		rssText = f"{rss / 2**20:.0f} MiB" if rss is not None else "unknown"
+		chunked = sum(1 for guild in self.guilds if guild.chunked)
+		return (
+			f"Resident memory {rssText} with the {self.config.memory_profile.name} memory profile. "
+			f"Cached users={len(self.users)} messages={len(self.cached_messages)} "
+			f"chunked servers={chunked}/{len(self.guilds)}"
+		)
+
+	def _register_metrics(self) -> None:
+		"""Registers metrics that are read from the bot's state when the metrics are rendered"""
+
+		def gatewayLatency():
+			# Latency is infinite or NaN until the first heartbeat
+			return [((), self.latency)] if math.isfinite(self.latency) else []
+
+		def cacheStat(stat: str):
+			return lambda: [((name,), getattr(cache.stats, stat)) for name, cache in self.steam.caches.items()]
+
+		def residentMemory():
+			rss = resident_memory()
+			return [((self.config.memory_profile.name,), rss)] if rss is not None else []
+
+		self.metrics.register(
+			CallbackMetric("blueonblue_gateway_latency_seconds", "Discord gateway heartbeat latency", gatewayLatency)
+		)
+		self.metrics.register(
+			CallbackMetric(
+				"blueonblue_resident_memory_bytes", "Resident memory of the bot process", residentMemory, ("profile",)
+			)
+		)
+		self.metrics.register(
+			CallbackMetric("blueonblue_cached_users", "Users in the member cache", lambda: [((), len(self.users))])
+		)
+		for stat in ("hits", "misses", "coalesced"):
+			self.metrics.register(
+				CallbackMetric(f"blueonblue_cache_{stat}_total", f"Cache {stat}", cacheStat(stat), ("cache",), type="counter")
+			)
+		self.metrics.register(
+			CallbackMetric(
+				"blueonblue_cache_hit_ratio",
+				"Fraction of cache lookups served from the cache",
+				cacheStat("hitRate"),
+				("cache",),
+			)
+		)
+		self.metrics.register(
+			CallbackMetric(
+				"blueonblue_server_config_db_reads_total",
+				"Server config reads that went to the database",
+				lambda: [((), self.serverConfig.dbReads)],
+				type="counter",
+			)
+		)
+		self.metrics.register(
+			CallbackMetric(
+				"blueonblue_server_config_db_reads_avoided_total",
+				"Server config reads for unset options answered from the snapshot",
+				lambda: [((), self.serverConfig.dbReadsAvoided)],
+				type="counter",
+			)
+		)
+
 	# Setup hook function to load extensions
 	async def setup_hook(self):
 		# Add a SIGTERM handler to stop the bot
@@ -138,14 +437,7 @@ class BlueOnBlueBot(commands.Bot):
 			pass
 
 		# Load our extensions
-		for ext in initial_extensions:
-			try:
-				await self.load_extension("cogs." + ext)
-			except Exception:
-				_log.exception(f"Failed to load extension: {ext}")
-			else:
-				_log.info(f"Loaded extension: {ext}")
-		_log.info("Extensions loaded")
+		await self._load_extensions()
 
 		# If we have a debug ID set, copy global commands to a guild
 		if self.config.debug_server is not None:
@@ -153,6 +445,68 @@ class BlueOnBlueBot(commands.Bot):
 			guild = discord.Object(self.config.debug_server)
 			self.tree.copy_global_to(guild=guild)
 
+		if self.config.sync_commands_on_start:
+			try:
+				await self.syncAppCommands()
+			except discord.HTTPException:
+				_log.exception("Failed to synchronize app commands on startup")
+
+	async def _load_extensions(self) -> None:
+		"""|coro|
+
+		Loads the initial extensions. Each extension is loaded once its dependencies have loaded,
+		and extensions without dependencies between them are loaded concurrently.
+		Logs a report of the time spent loading each extension.
+		Times are wall-clock, and include time spent waiting on other extensions that are loading concurrently."""
+		# Raises a CycleError if the dependencies can never be satisfied
+		graphlib.TopologicalSorter(initial_extensions).prepare()
+
+		loop = asyncio.get_running_loop()
+		results: dict[str, asyncio.Future[bool]] = {ext: loop.create_future() for ext in initial_extensions}
+
+		async def load(ext: str):
+			success = False
+			try:
+				missing = [dep for dep in initial_extensions[ext] if dep not in results]
+				if len(missing) > 0:
+					_log.error(f"Unable to load extension {ext}. Unknown dependencies: {', '.join(missing)}")
+					return
+				failed = [dep for dep in initial_extensions[ext] if not await results[dep]]
+				if len(failed) > 0:
+					_log.error(f"Unable to load extension {ext}. Failed dependencies: {', '.join(failed)}")
+					return
+				start = perf_counter()
+				try:
+					await self.load_extension("cogs." + ext)
+				except Exception:
+					_log.exception(f"Failed to load extension: {ext}")
+				else:
+					self.extensionLoadTimes[ext] = perf_counter() - start
+					_log.info(f"Loaded extension: {ext}")
+					success = True
+			finally:
+				results[ext].set_result(success)
+
+		start = perf_counter()
+		await asyncio.gather(*(load(ext) for ext in initial_extensions))
+		_log.info(f"Extensions loaded in {(perf_counter() - start) * 1000:.0f} ms")
+
+		# Report the slowest extensions first
+		for ext, loadTime in sorted(self.extensionLoadTimes.items(), key=lambda e: e[1], reverse=True):
+			cogLoadTime = self.cogLoadTimes.get("cogs." + ext, 0.0)
+			_log.info(
+				f"Extension {ext:12} total={loadTime * 1000:7.1f} ms "
+				f"import/setup={(loadTime - cogLoadTime) * 1000:7.1f} ms cog_load={cogLoadTime * 1000:7.1f} ms"
+			)
+
+	async def add_cog(self, cog: commands.Cog, /, **kwargs) -> None:
+		"""|coro|
+
+		Overwritten add_cog function to record the time spent in the cog's cog_load function."""
+		start = perf_counter()
+		await super().add_cog(cog, **kwargs)
+		self.cogLoadTimes[cog.__module__] = self.cogLoadTimes.get(cog.__module__, 0.0) + perf_counter() - start
+
 	# On connect. Runs immediately upon connecting to Discord
 	async def on_connect(self):
 		# Make sure we're on our first connection
@@ -164,11 +518,26 @@ class BlueOnBlueBot(commands.Bot):
 	async def on_ready(self):
 		# Make some log messages
 		_log.info(f"Connected to {len(self.guilds)} servers")
-		_log.info("Blue on Blue ready.")
+		if self.firstStart:
+			_log.info(f"Blue on Blue ready. Startup took {(discord.utils.utcnow() - self.startTime).total_seconds():.1f} seconds.")
+		else:
+			_log.info("Blue on Blue ready.")
+		_log.info(self.memory_report())
 
 		# Set our "first start" variable to False
 		self.firstStart = False
 
+	# On guild join. Runs when the bot joins a new guild
+	async def on_guild_join(self, guild: discord.Guild):
+		await self.serverConfig.load_guild(guild.id)
+
+	# Roles and channels referenced by the server config may have been removed
+	async def on_guild_role_delete(self, role: discord.Role):
+		self.serverConfig.invalidate_readiness(role.guild.id)
+
+	async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+		self.serverConfig.invalidate_readiness(channel.guild.id)
+
 	# On message. Runs every time the bot receives a new message
 	async def on_message(self, message: discord.Message):
 		# Do not execute commands sent by bots
@@ -177,6 +546,34 @@ class BlueOnBlueBot(commands.Bot):
 		# Process commands in the message
 		await self.process_commands(message)
 
+	# On app command completion. Runs every time an app command completes successfully
+	async def on_app_command_completion(
+		self, interaction: discord.Interaction, command: discord.app_commands.Command | discord.app_commands.ContextMenu
+	):
+		timing = self.instrumentation.current()
+		if timing is not None:
+			self.instrumentation.finish(timing, "ok")
+
+	# Override the invoke function to time prefix commands
+	async def invoke(self, ctx: commands.Context, /) -> None:
+		"""|coro|
+
+		Overwritten invoke function to time prefix commands from receipt to completion."""
+		if ctx.command is None:
+			await super().invoke(ctx)
+			return
+		timing = self.instrumentation.begin(ctx.command.qualified_name, "prefix")
+		status = "ok"
+		try:
+			await super().invoke(ctx)
+		except Exception:
+			status = "error"
+			raise
+		finally:
+			if ctx.command_failed and status == "ok":
+				status = "error"
+			self.instrumentation.finish(timing, status)
+
 	# On command completion. Runs every time a command is completed
 	async def on_command_completion(self, ctx: commands.Context):
 		_log.debug(f"Command {ctx.command} invoked by {ctx.author.name}")
@@ -202,7 +599,19 @@ class BlueOnBlueBot(commands.Bot):
 
 class BlueOnBlueTree(discord.app_commands.CommandTree):
 	"""BlueOnBlue app commands tree
-	Subclass of discord.app_commands.CommandTree used to override error handling"""
+	Subclass of discord.app_commands.CommandTree used to override error handling and time app commands"""
+
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		"""|coro|
+
+		Starts timing app commands when they are received. Runs before any other check."""
+		if (
+			interaction.type == discord.InteractionType.application_command
+			and interaction.command is not None
+			and isinstance(self.client, BlueOnBlueBot)
+		):
+			self.client.instrumentation.begin(interaction.command.qualified_name, "app")
+		return True
 
 	async def on_error(
 		self,
@@ -271,4 +680,11 @@ class BlueOnBlueTree(discord.app_commands.CommandTree):
 				_log.exception("Ignoring exception in command tree:")
 			traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
 
+		# Finish timing after the error response has been sent
+		if isinstance(self.client, BlueOnBlueBot):
+			timing = self.client.instrumentation.current()
+			if timing is not None:
+				status = "check_failed" if isinstance(error, discord.app_commands.CheckFailure) else "error"
+				self.client.instrumentation.finish(timing, status)
+
 		# await super().on_error(interaction, command, error)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+__all__ = ["CacheStats", "TTLCache"]
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats:
+	"""Hit, miss, and latency counters for a cache"""
+
+	__slots__ = ("hits", "misses", "coalesced", "loadTime")
+
+	def __init__(self):
+		self.hits = 0
+		self.misses = 0
+		self.coalesced = 0
+		self.loadTime = 0.0
+
+	@property
+	def hitRate(self) -> float:
+		"""Fraction of lookups that were served without calling the loader"""
+		total = self.hits + self.misses + self.coalesced
+		return (self.hits + self.coalesced) / total if total > 0 else 0.0
+
+	@property
+	def averageLoadTime(self) -> float:
+		"""Average time in seconds spent in the loader per miss"""
+		return self.loadTime / self.misses if self.misses > 0 else 0.0
+
+
+class TTLCache(Generic[K, V]):
+	"""Bounded least-recently-used cache with a per-entry time to live.
+
+	Concurrent lookups for the same missing key share a single call to the loader.
+	"""
+
+	def __init__(self, maxSize: int, ttl: float):
+		self.maxSize = maxSize
+		self.ttl = ttl
+		self.stats = CacheStats()
+		self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+		self._inflight: dict[K, asyncio.Future[V]] = {}
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: K) -> V | None:
+		"""Retrieves a value from the cache if present and not expired
+
+		Parameters
+		----------
+		key : K
+			Cache key
+
+		Returns
+		-------
+		V | None
+			Cached value if found
+		"""
+		entry = self._data.get(key)
+		if entry is None:
+			return None
+		if entry[0] < time.monotonic():
+			# Entry has expired
+			del self._data[key]
+			return None
+		self._data.move_to_end(key)
+		return entry[1]
+
+	def set(self, key: K, value: V) -> None:
+		"""Stores a value in the cache, evicting the least recently used entry if full
+
+		Parameters
+		----------
+		key : K
+			Cache key
+		value : V
+			Value to store
+		"""
+		self._data[key] = (time.monotonic() + self.ttl, value)
+		self._data.move_to_end(key)
+		while len(self._data) > self.maxSize:
+			self._data.popitem(last=False)
+
+	def invalidate(self, key: K) -> None:
+		"""Removes a value from the cache if present"""
+		self._data.pop(key, None)
+
+	def clear(self) -> None:
+		"""Removes all values from the cache"""
+		self._data.clear()
+
+	async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]], *, fresh: bool = False) -> V:
+		"""|coro|
+
+		Retrieves a value from the cache, calling the loader on a miss.
+		If a load for the same key is already in progress, waits for that load instead of starting another.
+
+		Parameters
+		----------
+		key : K
+			Cache key
+		loader : Callable[[], Awaitable[V]]
+			Coroutine function used to load the value on a cache miss
+		fresh : bool, optional
+			Ignore any cached value and always load, by default False
+
+		Returns
+		-------
+		V
+			Cached or loaded value
+		"""
+		if not fresh:
+			value = self.get(key)
+			if value is not None:
+				self.stats.hits += 1
+				return value
+
+		if key in self._inflight:
+			self.stats.coalesced += 1
+			return await asyncio.shield(self._inflight[key])
+
+		self.stats.misses += 1
+		# The load runs in its own task, so that cancelling the caller that started it
+		# does not cancel the load for the other callers waiting on it
+		task = asyncio.ensure_future(self._load(key, loader))
+		self._inflight[key] = task
+		return await asyncio.shield(task)
+
+	async def _load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+		"""Calls the loader and stores the value in the cache"""
+		start = time.perf_counter()
+		try:
+			value = await loader()
+			self.set(key, value)
+			return value
+		finally:
+			self.stats.loadTime += time.perf_counter() - start
+			del self._inflight[key]
@@ -8,6 +8,7 @@ from typing import (
 )
 
 from blueonblue import bot as blueonbluebot
+from blueonblue.config import config_mask
 
 import logging
 _log = logging.getLogger(__name__)
@@ -41,16 +42,23 @@ class MissingServerConfigs(app_commands.AppCommandError):
 def has_configs(*configs: str) -> Callable[[T], T]:
 	"""Checks if a serverconfig exists for the given config value
 
-	Also implicitly checks if the command was used in a guild or not."""
+	Also implicitly checks if the command was used in a guild or not.
+	The required configs are compiled once into a bitmask, which is tested against the guild's readiness bitmap."""
+	mask = config_mask(*configs)
+
 	async def predicate(interaction: discord.Interaction):
 		assert isinstance(interaction.client, blueonbluebot.BlueOnBlueBot)
 		bot = interaction.client
 		if interaction.guild is None:
 			raise app_commands.errors.NoPrivateMessage
 		# Guild exists
+		if (await bot.serverConfig.readiness(interaction.guild)) & mask == mask:
+			return True
+
+		# Only determine which configs are missing when the check fails
 		missing: list[str] = []
 		for c in configs:
-			if await bot.serverConfig.options[c].get(interaction.guild) is None:
+			if await bot.serverConfig.settings[c].get(interaction.guild) is None:
 				missing.append(c)
 
 		if len(missing) > 0:
@@ -59,3 +67,15 @@ def has_configs(*configs: str) -> Callable[[T], T]:
 		return True
 
 	return app_commands.check(predicate)
+
+
+def is_owner() -> Callable[[T], T]:
+	"""Checks if the user is the owner of the bot"""
+
+	async def predicate(interaction: discord.Interaction):
+		assert isinstance(interaction.client, blueonbluebot.BlueOnBlueBot)
+		if await interaction.client.is_owner(interaction.user):
+			return True
+		raise UserUnauthorized
+
+	return app_commands.check(predicate)
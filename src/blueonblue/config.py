@@ -2,7 +2,7 @@ import inspect
 import logging
 import os
 import pathlib
-from typing import TYPE_CHECKING, overload
+from typing import TYPE_CHECKING, NamedTuple, overload
 from abc import abstractmethod, ABCMeta
 
 import discord
@@ -38,7 +38,33 @@ from blueonblue.defines import (
 _log = logging.getLogger(__name__)
 
 
-__all__ = ["BotConfig", "ServerConfig"]
+__all__ = ["BotConfig", "MemoryProfile", "ServerConfig", "ServerConfigChange"]
+
+
+class MemoryProfile(NamedTuple):
+	"""Member and message cache settings for the discord client"""
+
+	name: str
+	# Number of messages to keep in the message cache, or None to disable it
+	maxMessages: int | None
+	# Cache members that are connected to voice channels
+	cacheVoiceMembers: bool
+	# Request all members of every guild at startup. Otherwise guilds are chunked when their members are first needed.
+	chunkAtStartup: bool
+
+	def member_cache_flags(self) -> discord.MemberCacheFlags:
+		"""Member cache flags for the profile"""
+		return discord.MemberCacheFlags(voice=self.cacheVoiceMembers, joined=True)
+
+
+MEMORY_PROFILES = {
+	# discord.py defaults
+	"full": MemoryProfile("full", 1000, True, True),
+	# Members are only requested for guilds that need them
+	"lazy": MemoryProfile("lazy", 100, True, False),
+	# No message cache, and no startup chunking. The bot does not use cached messages.
+	"minimal": MemoryProfile("minimal", None, False, False),
+}
 
 
 @overload
@@ -87,6 +113,128 @@ class BotConfig:
 		self.debug_server = int(debugServerValue) if debugServerValue is not None else None
 		self.prefix = get_config_value("COMMAND_PREFIX", "$$")
 		self.steam_api_token: str = get_config_value("STEAM_TOKEN", "")
+		# Steam API requests per second. The default keeps us under the standard quota of 100,000 requests per day.
+		self.steam_rate_limit = float(get_config_value("STEAM_RATE_LIMIT", "1.0"))
+		# Number of worker processes used to validate uploaded mission files
+		self.mission_validation_workers = int(get_config_value("MISSION_VALIDATION_WORKERS", "2"))
+		# Synchronize app commands on startup if the command tree has changed since the last sync
+		self.sync_commands_on_start = get_config_value("SYNC_COMMANDS_ON_START") is not None
+		# Serve metrics over HTTP if a port is provided
+		metricsPortValue = get_config_value("METRICS_PORT")
+		self.metrics_port = int(metricsPortValue) if metricsPortValue is not None else None
+		self.metrics_host = get_config_value("METRICS_HOST", "0.0.0.0")
+		# Event loop lag in seconds before the blocking code is logged
+		self.loop_lag_threshold = float(get_config_value("LOOP_LAG_THRESHOLD", "0.5"))
+		# Enables asyncio debug mode, which logs every callback that runs longer than the lag threshold
+		self.asyncio_debug = get_config_value("ASYNCIO_DEBUG") is not None
+		# Member and message cache settings
+		memoryProfileValue = get_config_value("MEMORY_PROFILE", "full").strip().lower()
+		if memoryProfileValue not in MEMORY_PROFILES:
+			raise ValueError(
+				f"Unknown memory profile {memoryProfileValue!r}. Valid profiles: {', '.join(MEMORY_PROFILES)}"
+			)
+		self.memory_profile = MEMORY_PROFILES[memoryProfileValue]
+
+
+class ServerConfigChange(NamedTuple):
+	"""Event published through the bot's event dispatcher as "config_change" when a server config value changes
+
+	Listeners receive it through an on_config_change listener.
+	"""
+
+	guildID: int
+	setting: str
+	value: str | int | float | None
+	version: int
+
+
+class ServerConfigSnapshot:
+	"""Snapshot of all server config values for a single guild
+
+	Values are stored in their cached form (role and channel IDs rather than discord objects).
+	Unset values are stored as None, which is an explicit "known absent" entry: since every write
+	goes through the snapshot, a None field never needs to be checked against the database.
+	Field names match the setting names in the serverconfig table.
+
+	The version is incremented on every change, so derived caches can be keyed by it.
+	"""
+
+	FIELDS = (
+		SCONF_CHANNEL_BOT,
+		SCONF_CHANNEL_CHECK_IN,
+		SCONF_CHANNEL_MOD_ACTIVITY,
+		SCONF_ROLE_GOLD,
+		SCONF_ROLE_TIMEOUT,
+		SCONF_ROLE_VERIFY,
+		SCONF_STEAM_GROUP_ID,
+		SCONF_GROUP_APPLY_URL,
+		SCONF_MISSION_DURATION,
+		SCONF_MISSION_TIME,
+		SCONF_MISSION_UPLOAD_URL,
+		SCONF_MISSION_UPLOAD_USERNAME,
+		SCONF_MISSION_UPLOAD_PASSWORD,
+		SCONF_RAFFLEWEIGHT_MAX,
+		SCONF_RAFFLEWEIGHT_INCREASE,
+		SCONF_ARMA_STATS_KEY,
+		SCONF_ARMA_STATS_URL,
+		SCONF_ARMA_STATS_MIN_DURATION,
+		SCONF_ARMA_STATS_MIN_PLAYERS,
+		SCONF_ARMA_STATS_PARTICIPATION_THRESHOLD,
+		SCONF_ARMA_STATS_LEADERBOARD_DAYS,
+		SCONF_GOLD_MONTH_COST,
+	)
+	__slots__ = FIELDS + ("version", "readiness")
+
+	version: int
+	readiness: int | None
+	channel_bot: int | None
+	channel_check_in: int | None
+	channel_mod_activity: int | None
+	role_gold: int | None
+	role_timeout: int | None
+	role_verify: int | None
+	steam_group_id: int | None
+	group_apply_url: str | None
+	mission_duration: int | None
+	mission_time: str | None
+	mission_upload_url: str | None
+	mission_upload_username: str | None
+	mission_upload_password: str | None
+	raffle_weight_max: float | None
+	raffle_weight_increase: float | None
+	arma_stats_key: str | None
+	arma_stats_url: str | None
+	arma_stats_min_duration: int | None
+	arma_stats_min_players: int | None
+	arma_stats_participation_threshold: float | None
+	arma_stats_leaderboard_days: int | None
+	gold_month_cost: float | None
+
+	def __init__(self):
+		self.version = 0
+		# Bitmap of options that are set, computed on first use
+		self.readiness = None
+		for field in self.FIELDS:
+			setattr(self, field, None)
+
+
+def config_mask(*settings: str) -> int:
+	"""Compiles a set of server config setting names into a readiness bitmask
+
+	Parameters
+	----------
+	*settings : str
+		Setting names, as used in the serverconfig table
+
+	Returns
+	-------
+	int
+		Bitmask with one bit set per setting
+	"""
+	mask = 0
+	for setting in settings:
+		mask |= 1 << ServerConfigSnapshot.FIELDS.index(setting)
+	return mask
 
 
 class ServerConfigOption(metaclass=ABCMeta):
@@ -102,33 +250,7 @@ class ServerConfigOption(metaclass=ABCMeta):
 		self.name = name
 		self.default = default
 		self.protected = protected
-		self._cache = {}
-
-	async def _getValue(self, serverID: int) -> str | None:
-		"""Retrieves a raw value from the serverconfig table
-
-		Parameters
-		----------
-		serverID : int
-			Discord server ID to use
-		setting : str
-			Setting to retrieve
-
-		Returns
-		-------
-		str | None
-			Setting value if found
-		"""
-		async with self.bot.pool.acquire() as conn:
-			row = await conn.fetchone(
-				"SELECT value FROM serverconfig WHERE server_id = :server_id AND setting = :setting AND value IS NOT NULL",
-				{"server_id": serverID, "setting": self.name},
-			)
-			if row is not None:
-				return row["value"]
-			else:
-				# If we could not find a value in the database, return the default
-				return self.default
+		self.bit = config_mask(name)
 
 	async def _setValue(self, serverID: int, value: str) -> None:
 		"""Sets a raw value on the serverconfig table
@@ -139,8 +261,6 @@ class ServerConfigOption(metaclass=ABCMeta):
 		----------
 		serverID : int
 			Discord server ID to use
-		setting : str
-			Setting to set
 		value : str
 			Value to set
 		"""
@@ -153,34 +273,23 @@ class ServerConfigOption(metaclass=ABCMeta):
 			await conn.commit()
 
 	async def _clearValue(self, serverID: int) -> None:
-		"""Clears a valie from the serverconfig table
+		"""Clears a value from the serverconfig table
 
 		Parameters
 		----------
 		serverID : int
 			Discord server ID to use
-		setting : str
-			Setting to clear
 		"""
 		async with self.bot.pool.acquire() as conn:
 			await conn.execute(
-				"DELETE FROM pings WHERE (server_id = :server_id AND setting = :setting)",
+				"DELETE FROM serverconfig WHERE (server_id = :server_id AND setting = :setting)",
 				{"server_id": serverID, "setting": self.name},
 			)
 			await conn.commit()
 
-	def _clearCache(self) -> None:
-		"""Clears the cache for the config object
-
-		Returns
-		-------
-		None
-		"""
-		self._cache = {}
-
 	@abstractmethod
 	def _getTransform(self, value: str) -> str | int | float:
-		"""Applies a transformation on retrieved values for the setting to store them in the cache
+		"""Applies a transformation on retrieved values for the setting to store them in the snapshot
 
 		Does nothing by default (input is string, output is string)
 
@@ -231,27 +340,117 @@ class ServerConfigOption(metaclass=ABCMeta):
 			guild = self.bot.get_guild(server)
 			return guild.id if guild is not None else None
 
-	async def delete(self, server: int | discord.Guild) -> None:
+	def _getGuild(self, server: discord.Guild | int) -> discord.Guild | None:
+		"""Returns the guild object only if the provided server exists
+
+		Parameters
+		----------
+		server : discord.Guild | int
+			Guild to retrieve
+
+		Returns
+		-------
+		discord.Guild | None
+			Guild if present
+		"""
 		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
+			return server
 		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-			if guild is None:
-				return
+			return self.bot.get_guild(server)
+
+	def _transformRaw(self, value: str) -> str | int | float | None:
+		"""Transforms a raw database value into its snapshot form
+
+		Parameters
+		----------
+		value : str
+			Raw value from the serverconfig table
+
+		Returns
+		-------
+		str | int | float | None
+			Transformed value, or None if the value could not be converted
+		"""
+		try:
+			return self._getTransform(value)
+		except ValueError:
+			_log.warning(f"Invalid value [{value}] stored for server config option [{self.name}]")
+			return None
+
+	async def _getCached(self, serverID: int) -> str | int | float | None:
+		"""Retrieves the cached value for this option from the guild's snapshot
+
+		Falls back to the option's default if no value is set.
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+
+		Returns
+		-------
+		str | int | float | None
+			Cached value if set
+		"""
+		snapshot = await self.bot.serverConfig.snapshot(serverID)
+		value = getattr(snapshot, self.name)
+		if value is None:
+			# Known absent value. Previously this would have been a database read on every call.
+			self.bot.serverConfig.dbReadsAvoided += 1
+			if self.default is not None:
+				value = self._transformRaw(self.default)
+		return value
+
+	async def _setCached(self, serverID: int, value: str | int | float) -> None:
+		"""Writes a value to the database and the guild's snapshot
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+		value : str | int | float
+			Value to store, in its cached form
+		"""
+		await self._setValue(serverID, str(value))
+		snapshot = await self.bot.serverConfig.snapshot(serverID)
+		setattr(snapshot, self.name, value)
+		self._publish(serverID, snapshot, value)
+
+	def _publish(self, serverID: int, snapshot: ServerConfigSnapshot, value: str | int | float | None) -> None:
+		"""Increments the guild's config version, and publishes a config change event
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+		snapshot : ServerConfigSnapshot
+			Snapshot for the guild
+		value : str | int | float | None
+			New value in its cached form, or None if the value was cleared
+		"""
+		snapshot.version += 1
+		if snapshot.readiness is not None:
+			if value is None and self.default is None:
+				snapshot.readiness &= ~self.bit
+			else:
+				snapshot.readiness |= self.bit
+		self.bot.dispatch("config_change", ServerConfigChange(serverID, self.name, value, snapshot.version))
+
+	async def delete(self, server: int | discord.Guild) -> None:
+		serverID = self._getServerID(server)
+		if serverID is None:
+			return
 
 		# Clear the value from the DB
 		await self._clearValue(serverID)
-		# Clear the value from the cache if it exists
-		if serverID in self._cache.keys():
-			del self._cache[serverID]
+		# Clear the value from the snapshot
+		snapshot = await self.bot.serverConfig.snapshot(serverID)
+		setattr(snapshot, self.name, None)
+		self._publish(serverID, snapshot, None)
 
 	async def exists(self, serverID: int) -> bool:
 		"""Checks if a value exists in the serverconfig
 
-		Stores the value in the cache if it is not already cached.
-
 		Parameters
 		----------
 		serverID : int
@@ -262,18 +461,7 @@ class ServerConfigOption(metaclass=ABCMeta):
 		bool
 			Value exists
 		"""
-		# If the value is in the cache, return
-		if serverID in self._cache.keys():
-			return True
-		# If it isn't, try to get it from the database
-		dbValue = await self._getValue(serverID)
-		if dbValue is None:
-			# No value in DB
-			return False
-		# Value exists, store it in the cache and return true
-		value = self._getTransform(dbValue)
-		self._cache[serverID] = value
-		return True
+		return (await self._getCached(serverID)) is not None
 
 	@abstractmethod
 	async def get(self, server: int | discord.Guild) -> object: ...
@@ -321,23 +509,11 @@ class ServerConfigString(ServerConfigOption):
 		String | None
 			String for the provided server, if found
 		"""
-		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
-		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-			if guild is None:
-				return None
-
-		# Retrieve the config value
-		if serverID in self._cache.keys():
-			value = self._cache[serverID]
-		else:
-			value = await self._getValue(serverID)
-			if value is not None:
-				self._cache[serverID] = self._getTransform(value)
-		return value
+		guild = self._getGuild(server)
+		if guild is None:
+			return None
+		value = await self._getCached(guild.id)
+		return value if isinstance(value, str) else None
 
 	async def set(self, server: discord.Guild, value: str) -> None:
 		"""Sets the provided string in the server config for this guild
@@ -346,11 +522,10 @@ class ServerConfigString(ServerConfigOption):
 		----------
 		server : discord.Guild
 			Discord guild
-		role : discord.Role
-			Role to set in serverconfig
+		value : str
+			String to set in serverconfig
 		"""
-		self._cache[server.id] = value
-		await self._setValue(server.id, value)
+		await self._setCached(server.id, value)
 
 
 class ServerConfigStringDefault(ServerConfigString):
@@ -361,9 +536,6 @@ class ServerConfigStringDefault(ServerConfigString):
 
 
 class ServerConfigInteger(ServerConfigOption):
-	# Store values as integers in the cache
-	_cache: dict[int, int]
-
 	def _displayTransform(self, value: int) -> str:
 		return str(value)
 
@@ -380,26 +552,11 @@ class ServerConfigInteger(ServerConfigOption):
 		int | None
 			Integer for the provided server, if found
 		"""
-		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
-		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-
-			if guild is None:
-				return None
-
-		# Retrieve the config value
-		if serverID in self._cache.keys():
-			valueInt = self._cache[serverID]
-		else:
-			valueStr = await self._getValue(serverID)
-			if valueStr is None or not valueStr.isnumeric():
-				return None
-			valueInt = self._getTransform(valueStr)
-			self._cache[serverID] = valueInt
-		return valueInt
+		guild = self._getGuild(server)
+		if guild is None:
+			return None
+		value = await self._getCached(guild.id)
+		return value if isinstance(value, int) else None
 
 	async def set(self, server: discord.Guild, value: int) -> None:
 		"""Sets the provided integer in the server config for this guild
@@ -408,11 +565,10 @@ class ServerConfigInteger(ServerConfigOption):
 		----------
 		server : discord.Guild
 			Discord guild
-		role : discord.Role
-			Role to set in serverconfig
+		value : int
+			Integer to set in serverconfig
 		"""
-		self._cache[server.id] = value
-		await self._setValue(server.id, str(value))
+		await self._setCached(server.id, value)
 
 	def _getTransform(self, value: str) -> int:
 		return int(value)
@@ -426,9 +582,6 @@ class ServerConfigIntegerDefault(ServerConfigInteger):
 
 
 class ServerConfigFloat(ServerConfigOption):
-	# Store values as integers in the cache
-	_cache: dict[int, float]
-
 	def _displayTransform(self, value: float) -> str:
 		return str(value)
 
@@ -445,46 +598,23 @@ class ServerConfigFloat(ServerConfigOption):
 		Float | None
 			Float for the provided server, if found
 		"""
-		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
-		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-
-			if guild is None:
-				return None
-
-		# Retrieve the config value
-		if serverID in self._cache.keys():
-			valueFloat = self._cache[serverID]
-		else:
-			valueStr = await self._getValue(serverID)
-			if valueStr is None:
-				return None
-			else:
-				# Retrieved value is not none, try to convert it to float
-				try:
-					valueFloat = self._getTransform(valueStr)
-					self._cache[serverID] = valueFloat
-				except ValueError:
-					# If this fails, return none
-					valueFloat = None
-
-		return valueFloat
+		guild = self._getGuild(server)
+		if guild is None:
+			return None
+		value = await self._getCached(guild.id)
+		return float(value) if isinstance(value, (int, float)) else None
 
 	async def set(self, server: discord.Guild, value: float) -> None:
-		"""Sets the provided integer in the server config for this guild
+		"""Sets the provided float in the server config for this guild
 
 		Parameters
 		----------
 		server : discord.Guild
 			Discord guild
-		role : discord.Role
-			Role to set in serverconfig
+		value : float
+			Float to set in serverconfig
 		"""
-		self._cache[server.id] = value
-		await self._setValue(server.id, str(value))
+		await self._setCached(server.id, value)
 
 	def _getTransform(self, value: str) -> float:
 		return float(value)
@@ -498,9 +628,6 @@ class ServerConfigFloatDefault(ServerConfigFloat):
 
 
 class ServerConfigRole(ServerConfigOption):
-	# Store role IDs as integers in the cache
-	_cache: dict[int, int]
-
 	def _displayTransform(self, value: discord.Role) -> str:
 		return value.mention
 
@@ -517,26 +644,12 @@ class ServerConfigRole(ServerConfigOption):
 		discord.Role | None
 			Discord role for the provided server, if found
 		"""
-		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
-		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-
-			if guild is None:
-				return None
-
+		guild = self._getGuild(server)
+		if guild is None:
+			return None
 		# Retrieve the role ID
-		if serverID in self._cache.keys():
-			roleID = self._cache[serverID]
-		else:
-			roleStr = await self._getValue(serverID)
-			if roleStr is None or not roleStr.isnumeric():
-				return None
-			roleID = self._getTransform(roleStr)
-			self._cache[serverID] = roleID
-		return guild.get_role(roleID)
+		roleID = await self._getCached(guild.id)
+		return guild.get_role(roleID) if isinstance(roleID, int) else None
 
 	async def set(self, server: discord.Guild, value: discord.Role) -> None:
 		"""Sets the provided role in the server config for this guild
@@ -548,17 +661,13 @@ class ServerConfigRole(ServerConfigOption):
 		value : discord.Role
 			Role to set in serverconfig
 		"""
-		self._cache[server.id] = value.id
-		await self._setValue(server.id, str(value.id))
+		await self._setCached(server.id, value.id)
 
 	def _getTransform(self, value: str) -> int:
 		return int(value)
 
 
 class ServerConfigChannel(ServerConfigOption):
-	# Store channel IDs as integers in the cache
-	_cache: dict[int, int]
-
 	def _displayTransform(self, value: discord.abc.GuildChannel) -> str:
 		return value.mention
 
@@ -575,39 +684,24 @@ class ServerConfigChannel(ServerConfigOption):
 		discord.abc.GuildChannel | None
 			Channel in the provided server, if found
 		"""
-		if isinstance(server, discord.Guild):
-			serverID = server.id
-			guild = server
-		else:
-			serverID = server
-			guild = self.bot.get_guild(serverID)
-
-			if guild is None:
-				return None
-
+		guild = self._getGuild(server)
+		if guild is None:
+			return None
 		# Retrieve the channel ID
-		if serverID in self._cache.keys():
-			channelID = self._cache[serverID]
-		else:
-			channelStr = await self._getValue(serverID)
-			if channelStr is None or not channelStr.isnumeric():
-				return None
-			channelID = self._getTransform(channelStr)
-			self._cache[serverID] = channelID
-		return guild.get_channel(channelID)
+		channelID = await self._getCached(guild.id)
+		return guild.get_channel(channelID) if isinstance(channelID, int) else None
 
 	async def set(self, server: discord.Guild, value: discord.abc.GuildChannel) -> None:
-		"""Sets the provided role in the server config for this guild
+		"""Sets the provided channel in the server config for this guild
 
 		Parameters
 		----------
 		server : discord.Guild
 			Discord guild
-		role : discord.Role
-			Role to set in serverconfig
+		value : discord.abc.GuildChannel
+			Channel to set in serverconfig
 		"""
-		self._cache[server.id] = value.id
-		await self._setValue(server.id, str(value.id))
+		await self._setCached(server.id, value.id)
 
 	def _getTransform(self, value: str) -> int:
 		return int(value)
@@ -632,6 +726,12 @@ class ServerConfig:
 
 	def __init__(self, bot: "BlueOnBlueBot"):
 		self.bot = bot
+		self.snapshots: dict[int, ServerConfigSnapshot] = {}
+		# Set once the entire table has been loaded. Guilds without a snapshot are then known to have no config.
+		self._tableLoaded = False
+		# Counters for database reads made and avoided by the snapshot cache
+		self.dbReads = 0
+		self.dbReadsAvoided = 0
 
 		# Initialize the config options
 		# Server channels
@@ -679,3 +779,149 @@ class ServerConfig:
 		for m in inspect.getmembers(self):
 			if isinstance(m[1], ServerConfigOption):
 				self.options[m[0]] = m[1]
+		# Options by their setting name in the serverconfig table
+		self.settings: dict[str, ServerConfigOption] = {o.name: o for o in self.options.values()}
+
+	def _loadRows(self, rows) -> dict[int, ServerConfigSnapshot]:
+		"""Builds guild snapshots from rows of the serverconfig table
+
+		Parameters
+		----------
+		rows
+			Rows containing server_id, setting, and value columns
+
+		Returns
+		-------
+		dict[int, ServerConfigSnapshot]
+			Snapshots by guild ID
+		"""
+		snapshots: dict[int, ServerConfigSnapshot] = {}
+		for row in rows:
+			snapshot = snapshots.setdefault(row["server_id"], ServerConfigSnapshot())
+			option = self.settings.get(row["setting"])
+			if option is None:
+				# Unknown setting, ignore it
+				continue
+			setattr(snapshot, option.name, option._transformRaw(row["value"]))
+		return snapshots
+
+	async def load(self) -> None:
+		"""|coro|
+
+		Loads the entire serverconfig table into guild snapshots using a single query.
+		"""
+		async with self.bot.pool.acquire() as conn:
+			rows = await conn.fetchall("SELECT server_id, setting, value FROM serverconfig WHERE value IS NOT NULL")
+		self.snapshots = self._loadRows(rows)
+		self._tableLoaded = True
+		self.dbReads += 1
+		_log.info(f"Loaded server config for {len(self.snapshots)} servers")
+
+	async def load_guild(self, serverID: int) -> ServerConfigSnapshot:
+		"""|coro|
+
+		Loads all server config values for a single guild into its snapshot.
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+
+		Returns
+		-------
+		ServerConfigSnapshot
+			Snapshot for the guild
+		"""
+		async with self.bot.pool.acquire() as conn:
+			rows = await conn.fetchall(
+				"SELECT server_id, setting, value FROM serverconfig WHERE server_id = :server_id AND value IS NOT NULL",
+				{"server_id": serverID},
+			)
+		snapshot = self._loadRows(rows).get(serverID, ServerConfigSnapshot())
+		if serverID in self.snapshots:
+			# Keep versions increasing across reloads so that version-keyed caches are invalidated
+			snapshot.version = self.snapshots[serverID].version + 1
+		self.snapshots[serverID] = snapshot
+		self.dbReads += 1
+		return snapshot
+
+	async def readiness(self, guild: discord.Guild) -> int:
+		"""|coro|
+
+		Returns the readiness bitmap for a guild, with one bit set for each option that has a value.
+
+		The bitmap is computed on first use, and kept up to date by config changes.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+
+		Returns
+		-------
+		int
+			Readiness bitmap
+		"""
+		snapshot = await self.snapshot(guild.id)
+		if snapshot.readiness is None:
+			readiness = 0
+			for option in self.options.values():
+				if (await option.get(guild)) is not None:
+					readiness |= option.bit
+			snapshot.readiness = readiness
+		return snapshot.readiness
+
+	def invalidate_readiness(self, serverID: int) -> None:
+		"""Clears the readiness bitmap for a guild so that it is recomputed on next use
+
+		Used when roles or channels referenced by the config may have been deleted.
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+		"""
+		snapshot = self.snapshots.get(serverID)
+		if snapshot is not None:
+			snapshot.readiness = None
+
+	def version(self, serverID: int) -> int:
+		"""Returns the current config version for a guild
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+
+		Returns
+		-------
+		int
+			Config version, incremented on every config change for the guild
+		"""
+		snapshot = self.snapshots.get(serverID)
+		return snapshot.version if snapshot is not None else 0
+
+	async def snapshot(self, serverID: int) -> ServerConfigSnapshot:
+		"""|coro|
+
+		Retrieves the config snapshot for a guild, loading it from the database if necessary.
+
+		Parameters
+		----------
+		serverID : int
+			Discord server ID
+
+		Returns
+		-------
+		ServerConfigSnapshot
+			Snapshot for the guild
+		"""
+		snapshot = self.snapshots.get(serverID)
+		if snapshot is None:
+			if self._tableLoaded:
+				# The guild had no rows when the table was loaded, so every value is known to be absent
+				snapshot = ServerConfigSnapshot()
+				self.snapshots[serverID] = snapshot
+			else:
+				snapshot = await self.load_guild(serverID)
+		return snapshot
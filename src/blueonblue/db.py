@@ -1,6 +1,8 @@
 import logging
+from time import perf_counter
 from types import TracebackType
 from typing import (
+	TYPE_CHECKING,
 	Optional,
 	Type,
 )
@@ -8,6 +10,11 @@ from typing import (
 import asqlite
 
 from . import dbtables
+from .instrumentation import record_phase
+from .metrics import instrument_connection
+
+if TYPE_CHECKING:
+	from .metrics import BotMetrics
 
 _log = logging.getLogger(__name__)
 
@@ -21,8 +28,9 @@ class DBConnection:
 
 	connection: asqlite.Connection
 
-	def __init__(self, dbFile: str):
+	def __init__(self, dbFile: str, metrics: "BotMetrics | None" = None):
 		self._dbFile = dbFile
+		self._metrics = metrics
 
 		# Initialize tables
 		self.raffleWeight = dbtables.RaffleWeights(self)
@@ -33,7 +41,14 @@ class DBConnection:
 		await self.connection.commit()
 
 	async def __aenter__(self) -> "DBConnection":
-		self.connection = await asqlite.connect(self._dbFile)
+		start = perf_counter()
+		connection = await asqlite.connect(self._dbFile)
+		if self._metrics is not None:
+			duration = perf_counter() - start
+			self._metrics.dbQueryLatency.observe(duration, "connect")
+			record_phase("db", duration)
+			connection = instrument_connection(connection, self._metrics)
+		self.connection = connection
 		return self
 
 	async def __aexit__(
@@ -48,12 +63,14 @@ class DBConnection:
 class DB:
 	"""Database class to initialize a connection to the bot's database
 
-	Only to be used in an async context manager"""
+	Only to be used in an async context manager.
+	Queries are recorded to the bot's metrics if provided."""
 
 	connection: asqlite.Connection
 
-	def __init__(self, dbFile: str):
+	def __init__(self, dbFile: str, *, metrics: "BotMetrics | None" = None):
 		self._dbFile = dbFile
+		self._metrics = metrics
 
 	def connect(self) -> DBConnection:
-		return DBConnection(self._dbFile)
+		return DBConnection(self._dbFile, self._metrics)
@@ -0,0 +1,618 @@
+"""Offline stand-in for the Discord gateway and REST API
+
+Runs the bot and its cogs against a fake guild, without connecting to Discord.
+Interactions are built as gateway INTERACTION_CREATE payloads and dispatched through discord.py's
+connection state, so they follow the same path as real interactions. Every REST request made by the
+bot, including interaction responses, is recorded and answered with a synthetic response.
+
+The harness changes the working directory to a temporary directory while it is open,
+since the bot stores its database relative to the working directory.
+"""
+
+import asyncio
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import discord
+import discord.http
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+from .bot import BlueOnBlueBot
+from .instrumentation import mark_response
+from .metrics import _is_response
+from .monitor import percentile
+
+if TYPE_CHECKING:
+	# discord.types needs typing_extensions at runtime, which is not a dependency of discord.py
+	from discord.types.user import User as UserPayload
+
+_log = logging.getLogger(__name__)
+
+__all__ = ["SCENARIOS", "Harness", "RecordedRequest", "RestRecorder", "ScenarioResult", "run_scenario"]
+
+APPLICATION_ID = 100000000000000001
+BOT_USER_ID = 100000000000000002
+GUILD_ID = 100000000000000003
+CHANNEL_ID = 100000000000000004
+BOT_USER: "UserPayload" = {
+	"id": str(BOT_USER_ID),
+	"username": "Blue on Blue",
+	"global_name": None,
+	"discriminator": "0",
+	"avatar": None,
+	"bot": True,
+}
+# Members of the fake guild are given sequential IDs from this base
+MEMBER_ID_BASE = 200000000000000000
+# All permissions. Owners and administrators pass every permission check.
+ALL_PERMISSIONS = str(discord.Permissions.all().value)
+
+# Interaction response types that create a message
+MESSAGE_RESPONSE_TYPES = (4, 5, 6, 7)
+# Option types for values passed to interactions
+OPTION_TYPES = {str: 3, int: 4, bool: 5, float: 10}
+
+
+@dataclasses.dataclass(slots=True)
+class RecordedRequest:
+	"""REST request made by the bot"""
+
+	method: str
+	path: str
+	payload: Any
+	time: float
+
+	@property
+	def route(self) -> str:
+		"""Path with IDs and tokens replaced, for grouping requests"""
+		parts = []
+		for part in self.path.split("?")[0].split("/"):
+			if part.isdigit():
+				part = "{id}"
+			elif part.startswith("token"):
+				part = "{token}"
+			parts.append(part)
+		return f"{self.method} {'/'.join(parts)}"
+
+
+class RestRecorder:
+	"""Records REST requests, and builds the responses that Discord would send"""
+
+	def __init__(self):
+		self.requests: list[RecordedRequest] = []
+		self._snowflakes = itertools.count(discord.utils.time_snowflake(discord.utils.utcnow()))
+		# Messages created by the bot, by message ID
+		self.messages: dict[int, dict] = {}
+		# Original response message for each interaction token
+		self._originals: dict[str, int] = {}
+		# Time of the first response to each interaction, by interaction ID
+		self.responseTimes: dict[int, float] = {}
+		self._waiters: dict[int, asyncio.Future[dict]] = {}
+
+	def snowflake(self) -> int:
+		"""Generates a new unique ID"""
+		return next(self._snowflakes)
+
+	def wait_for_response(self, interactionID: int) -> asyncio.Future[dict]:
+		"""Future that resolves with the response payload when the interaction is first responded to"""
+		future = self._waiters.get(interactionID)
+		if future is None:
+			future = asyncio.get_running_loop().create_future()
+			self._waiters[interactionID] = future
+		return future
+
+	def message_payload(self, data: dict | None, *, messageID: int | None = None, channelID: int = CHANNEL_ID) -> dict:
+		"""Builds a message sent by the bot"""
+		data = data or {}
+		return {
+			"id": str(messageID or self.snowflake()),
+			"channel_id": str(channelID),
+			"guild_id": str(GUILD_ID),
+			"author": dict(BOT_USER),
+			"content": data.get("content") or "",
+			"embeds": data.get("embeds") or [],
+			"components": data.get("components") or [],
+			"attachments": [],
+			"mentions": [],
+			"mention_roles": [],
+			"mention_everyone": False,
+			"pinned": False,
+			"tts": False,
+			"type": 0,
+			"flags": data.get("flags") or 0,
+			"timestamp": discord.utils.utcnow().isoformat(),
+			"edited_timestamp": None,
+		}
+
+	def _store(self, message: dict, token: str | None = None) -> dict:
+		self.messages[int(message["id"])] = message
+		if token is not None:
+			self._originals.setdefault(token, int(message["id"]))
+		return message
+
+	def respond(self, method: str, path: str, payload: Any) -> Any:
+		"""Records a request, and returns the response payload"""
+		now = perf_counter()
+		self.requests.append(RecordedRequest(method, path, payload, now))
+		if _is_response(method, path):
+			# Runs in the context of the command that made the request
+			mark_response()
+		parts = path.strip("/").split("/")
+
+		# Interaction responses
+		if parts[0] == "interactions" and parts[-1] == "callback":
+			interactionID, token = int(parts[1]), parts[2]
+			responseType = (payload or {}).get("type")
+			response: dict = {"interaction": {"id": str(interactionID), "type": 2}}
+			if responseType in MESSAGE_RESPONSE_TYPES:
+				message = self._store(self.message_payload((payload or {}).get("data")), token)
+				response["interaction"]["response_message_id"] = message["id"]
+				response["interaction"]["response_message_loading"] = responseType == 5
+				response["resource"] = {"type": responseType, "message": message}
+			self.responseTimes.setdefault(interactionID, now)
+			future = self._waiters.get(interactionID)
+			if future is None:
+				future = asyncio.get_running_loop().create_future()
+				self._waiters[interactionID] = future
+			if not future.done():
+				future.set_result(payload)
+			return response
+
+		# Followup messages, and the original interaction response
+		if parts[0] == "webhooks":
+			token = parts[2]
+			if len(parts) == 3:
+				return self._store(self.message_payload(payload))
+			messageID = self._originals.get(token) if parts[4] == "@original" else int(parts[4])
+			if method == "DELETE":
+				self.messages.pop(messageID or 0, None)
+				return None
+			message = self.messages.get(messageID or 0)
+			if message is None:
+				message = self._store(self.message_payload(None, messageID=messageID), token)
+			if method == "PATCH":
+				message.update({k: v for k, v in (payload or {}).items() if k in ("content", "embeds", "components")})
+				message["edited_timestamp"] = discord.utils.utcnow().isoformat()
+			return message
+
+		# Channel messages
+		if parts[0] == "channels" and parts[-1] == "messages" and method == "POST":
+			return self._store(self.message_payload(payload, channelID=int(parts[1])))
+
+		if method == "DELETE":
+			return None
+		return {}
+
+
+class _RecordingWebhookAdapter(AsyncWebhookAdapter):
+	"""Webhook adapter that sends interaction responses and followups to the recorder"""
+
+	def __init__(self, recorder: RestRecorder):
+		super().__init__()
+		self.recorder = recorder
+
+	async def request(self, route, session, *, payload=None, multipart=None, files=None, **kwargs) -> Any:
+		if multipart is not None and payload is None:
+			payloadJSON = next((part.get("value") for part in multipart if part.get("name") == "payload_json"), None)
+			payload = json.loads(payloadJSON) if payloadJSON is not None else None
+		await asyncio.sleep(0)
+		return self.recorder.respond(route.method, route.url.removeprefix(route.BASE), payload)
+
+
+class _RecordingHTTPClient(discord.http.HTTPClient):
+	"""Discord REST client that sends requests to the recorder"""
+
+	def __init__(self, loop: asyncio.AbstractEventLoop, recorder: RestRecorder):
+		super().__init__(loop)
+		self.recorder = recorder
+
+	async def request(self, route, *, files=None, form=None, **kwargs) -> Any:
+		await asyncio.sleep(0)
+		return self.recorder.respond(route.method, route.url.removeprefix(route.BASE), kwargs.get("json"))
+
+
+@dataclasses.dataclass(slots=True)
+class ScenarioResult:
+	"""Latency and throughput of a scenario"""
+
+	name: str
+	interactions: int
+	duration: float
+	# Seconds from dispatch to the first response, for each interaction that was responded to
+	latencies: list[float]
+	timeouts: int
+	routes: dict[str, int]
+
+	@property
+	def throughput(self) -> float:
+		"""Interactions responded to per second"""
+		return len(self.latencies) / self.duration if self.duration > 0 else 0.0
+
+	def report(self) -> str:
+		"""Describes the result"""
+		p50, p95, p99, p100 = (percentile(self.latencies, p) * 1000 for p in (50, 95, 99, 100))
+		lines = [
+			f"{self.name}: {len(self.latencies)}/{self.interactions} interactions responded in {self.duration:.2f}s "
+			f"({self.throughput:.0f}/s), {self.timeouts} timed out",
+			f"  response latency p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms max={p100:.1f}ms",
+			"  REST requests:",
+		]
+		for route, count in sorted(self.routes.items(), key=lambda r: r[1], reverse=True):
+			lines.append(f"    {count:>6}  {route}")
+		return "\n".join(lines)
+
+
+class Harness:
+	"""Runs the bot against a fake guild, without connecting to Discord
+
+	Use as an async context manager. Extensions are loaded when the harness is opened."""
+
+	def __init__(self, *, extensions: tuple[str, ...] = (), members: int = 100):
+		self.extensions = extensions
+		self.memberCount = members
+		self.recorder = RestRecorder()
+		self.bot: BlueOnBlueBot
+		self.guild: discord.Guild
+		self._tempDir: tempfile.TemporaryDirectory | None = None
+		self._previousDir: str | None = None
+
+	async def __aenter__(self) -> "Harness":
+		from .__main__ import migrate_db
+
+		self._tempDir = tempfile.TemporaryDirectory(prefix="blueonblue-harness-")
+		self._previousDir = os.getcwd()
+		os.chdir(self._tempDir.name)
+		os.makedirs("data/logs")
+		migrate_db()
+
+		self.bot = BlueOnBlueBot()
+		await self.bot._async_setup_hook()
+		state = self.bot._connection
+		self.bot.http = state.http = _RecordingHTTPClient(self.bot.loop, self.recorder)
+		# Interaction responses use the webhook adapter in the current context, which tasks inherit
+		async_context.set(_RecordingWebhookAdapter(self.recorder))
+		state.application_id = APPLICATION_ID
+		state.user = discord.ClientUser(
+			state=state,
+			data=BOT_USER,
+		)
+		await self.bot._open_resources()
+
+		self.guild = state._add_guild_from_data(self.guild_payload(self.memberCount))  # type: ignore
+		for extension in self.extensions:
+			await self.bot.load_extension(f"cogs.{extension}")
+		return self
+
+	async def __aexit__(self, *exc) -> None:
+		await self.bot.close()
+		# Cancel tasks left behind by the bot, such as delayed message deletion
+		tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+		if self._previousDir is not None:
+			os.chdir(self._previousDir)
+		if self._tempDir is not None:
+			self._tempDir.cleanup()
+
+	def user_payload(self, index: int) -> dict:
+		"""Builds the user for a member of the fake guild"""
+		return {
+			"id": str(MEMBER_ID_BASE + index),
+			"username": f"member{index}",
+			"global_name": f"Member {index}",
+			"discriminator": "0",
+			"avatar": None,
+		}
+
+	def member_payload(self, index: int) -> dict:
+		"""Builds a member of the fake guild"""
+		return {
+			"user": self.user_payload(index),
+			"roles": [],
+			"nick": None,
+			"joined_at": "2020-01-01T00:00:00+00:00",
+			"deaf": False,
+			"mute": False,
+			"flags": 0,
+			"pending": False,
+		}
+
+	def bot_member_payload(self) -> dict:
+		"""Builds the bot's own member of the fake guild"""
+		return {
+			"user": dict(BOT_USER),
+			"roles": [],
+			"nick": None,
+			"joined_at": "2020-01-01T00:00:00+00:00",
+			"deaf": False,
+			"mute": False,
+			"flags": 0,
+			"pending": False,
+		}
+
+	def guild_payload(self, members: int) -> dict:
+		"""Builds a GUILD_CREATE payload for the fake guild, with every member cached"""
+		return {
+			"id": str(GUILD_ID),
+			"name": "Harness",
+			"owner_id": str(MEMBER_ID_BASE),
+			"icon": None,
+			"features": [],
+			"emojis": [],
+			"stickers": [],
+			"roles": [
+				{
+					"id": str(GUILD_ID),
+					"name": "@everyone",
+					"permissions": ALL_PERMISSIONS,
+					"position": 0,
+					"color": 0,
+					"hoist": False,
+					"managed": False,
+					"mentionable": False,
+					"flags": 0,
+				}
+			],
+			"channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+			# The bot is a member of the guild too, so that the guild counts as chunked
+			"members": [self.bot_member_payload()] + [self.member_payload(i) for i in range(members)],
+			"member_count": members + 1,
+			"large": members > 250,
+			"premium_tier": 0,
+			"verification_level": 0,
+			"explicit_content_filter": 0,
+			"default_message_notifications": 0,
+			"mfa_level": 0,
+			"nsfw_level": 0,
+			"preferred_locale": "en-US",
+			"system_channel_flags": 0,
+		}
+
+	def interaction_payload(
+		self,
+		interactionType: int,
+		data: dict,
+		*,
+		member: int = 0,
+		message: dict | None = None,
+	) -> dict:
+		"""Builds an INTERACTION_CREATE payload from a member of the fake guild"""
+		interactionID = self.recorder.snowflake()
+		payload = {
+			"id": str(interactionID),
+			"application_id": str(APPLICATION_ID),
+			"type": interactionType,
+			"data": data,
+			"guild_id": str(GUILD_ID),
+			"channel_id": str(CHANNEL_ID),
+			"channel": {"id": str(CHANNEL_ID), "type": 0, "guild_id": str(GUILD_ID), "name": "general"},
+			"member": {**self.member_payload(member), "permissions": ALL_PERMISSIONS},
+			"token": f"token{interactionID}",
+			"version": 1,
+			"app_permissions": ALL_PERMISSIONS,
+			"locale": "en-US",
+			"guild_locale": "en-US",
+			"entitlements": [],
+			"authorizing_integration_owners": {"0": str(GUILD_ID)},
+			"context": 0,
+			"attachment_size_limit": 26214400,
+		}
+		if message is not None:
+			payload["message"] = message
+		return payload
+
+	def command_payload(self, command: str, options: dict[str, Any] | None = None, *, focused: str | None = None, member: int = 0) -> dict:
+		"""Builds an app command or autocomplete interaction
+
+		Parameters
+		----------
+		command : str
+			Qualified command name, such as "raffle single"
+		options : dict[str, Any] | None, optional
+			Command options, by default None
+		focused : str | None, optional
+			Option being autocompleted. Builds an autocomplete interaction if set.
+		member : int, optional
+			Index of the member using the command, by default 0
+		"""
+		optionList = [
+			{"name": name, "type": OPTION_TYPES[type(value)], "value": value, **({"focused": True} if name == focused else {})}
+			for name, value in (options or {}).items()
+		]
+		names = command.split()
+		# Subcommands are nested options
+		for name in reversed(names[1:]):
+			optionList = [{"name": name, "type": 1, "options": optionList}]
+		data = {"id": str(self.recorder.snowflake()), "name": names[0], "type": 1, "options": optionList}
+		return self.interaction_payload(4 if focused is not None else 2, data, member=member)
+
+	def button_payload(self, message: dict, customID: str, *, member: int = 0) -> dict:
+		"""Builds a button press interaction on a message sent by the bot"""
+		return self.interaction_payload(3, {"custom_id": customID, "component_type": 2}, member=member, message=message)
+
+	def original_message(self, payload: dict) -> dict:
+		"""Message sent by the bot as the original response to an interaction"""
+		return self.recorder.messages[self.recorder._originals[payload["token"]]]
+
+	async def wait_for_command(self, command: str, count: int = 1, timeout: float = 60.0) -> None:
+		"""|coro|
+
+		Waits until an app command has finished a number of times"""
+		async with asyncio.timeout(timeout):
+			while (stats := self.bot.instrumentation.commands.get(command)) is None or stats.count < count:
+				await asyncio.sleep(0.1)
+
+	def command_report(self) -> str:
+		"""Describes the completion time of each command run by the bot, and where the time was spent"""
+		slowest = self.bot.instrumentation.slowest(25)
+		lines = ["Command completion:"] if len(slowest) > 0 else []
+		for name, stats in slowest:
+			phases = " ".join(
+				f"{phase}={stats.phase_average(phase) * 1000:.1f}ms" for phase in ("db", "http", "discord", "other")
+			)
+			lines.append(
+				f"  /{name}: runs={stats.count} failures={stats.failures} p50={stats.total_percentile(50) * 1000:.1f}ms "
+				f"p95={stats.total_percentile(95) * 1000:.1f}ms first response p95={stats.response_percentile(95) * 1000:.1f}ms "
+				f"avg {phases}"
+			)
+		p50, p99, p100 = self.bot.loopMonitor.percentiles(50, 99, 100)
+		lines.append(f"Event loop lag p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms max={p100 * 1000:.1f}ms")
+		return "\n".join(lines)
+
+	def dispatch(self, payload: dict) -> asyncio.Future[dict]:
+		"""Dispatches an interaction as if it was received from the gateway
+
+		Returns
+		-------
+		asyncio.Future[dict]
+			Future that resolves with the response payload when the bot first responds to the interaction
+		"""
+		future = self.recorder.wait_for_response(int(payload["id"]))
+		self.bot._connection.parse_interaction_create(payload)  # type: ignore
+		return future
+
+	async def run(
+		self,
+		name: str,
+		payloads: list[dict],
+		*,
+		rate: float = 0,
+		timeout: float = 30.0,
+	) -> ScenarioResult:
+		"""|coro|
+
+		Dispatches interactions at a fixed rate, and waits for the bot to respond to each of them.
+
+		Parameters
+		----------
+		name : str
+			Scenario name
+		payloads : list[dict]
+			Interactions to dispatch
+		rate : float, optional
+			Interactions per second, by default 0 to dispatch them all at once
+		timeout : float, optional
+			Seconds to wait for each response, by default 30.0
+
+		Returns
+		-------
+		ScenarioResult
+			Latency and throughput of the scenario
+		"""
+		requestsBefore = len(self.recorder.requests)
+		dispatchTimes: dict[int, float] = {}
+		futures: list[Awaitable] = []
+		start = perf_counter()
+		for i, payload in enumerate(payloads):
+			if rate > 0:
+				delay = start + i / rate - perf_counter()
+				if delay > 0:
+					await asyncio.sleep(delay)
+			interactionID = int(payload["id"])
+			dispatchTimes[interactionID] = perf_counter()
+			futures.append(asyncio.wait_for(self.dispatch(payload), timeout))
+		results = await asyncio.gather(*futures, return_exceptions=True)
+		duration = perf_counter() - start
+		latencies = [
+			self.recorder.responseTimes[interactionID] - dispatched
+			for interactionID, dispatched in dispatchTimes.items()
+			if interactionID in self.recorder.responseTimes
+		]
+		routes: dict[str, int] = {}
+		for request in self.recorder.requests[requestsBefore:]:
+			routes[request.route] = routes.get(request.route, 0) + 1
+		return ScenarioResult(
+			name=name,
+			interactions=len(payloads),
+			duration=duration,
+			latencies=latencies,
+			timeouts=sum(1 for r in results if isinstance(r, BaseException)),
+			routes=routes,
+		)
+
+
+async def ping_scenario(harness: Harness, *, pings: int = 100, rate: float = 50) -> list[ScenarioResult]:
+	"""Pings a tag that every member of the guild has joined"""
+	async with harness.bot.db.connect() as db:
+		await db.pings.create("everyone", GUILD_ID)
+		for i in range(harness.memberCount):
+			await db.pings.add_user("everyone", GUILD_ID, MEMBER_ID_BASE + i)
+		await db.commit()
+	payloads = [harness.command_payload("ping", {"tag": "everyone"}, member=i % harness.memberCount) for i in range(pings)]
+	results = [await harness.run(f"/ping with {harness.memberCount} members", payloads, rate=rate)]
+	# Commands finish after their response has been sent
+	await harness.wait_for_command("ping", pings)
+	return results
+
+
+async def autocomplete_scenario(
+	harness: Harness, *, tags: int = 10000, requests: int = 1000, rate: float = 100
+) -> list[ScenarioResult]:
+	"""Autocompletes ping tags in a guild with a large number of pings"""
+	cog: Any = harness.bot.get_cog("ping")
+	async with harness.bot.db.connect() as db:
+		for i in range(tags):
+			await db.pings.create(f"ping{i}", GUILD_ID)
+		await db.commit()
+		await cog._update_ping_cache(db, GUILD_ID)
+	# Mix short queries that match many tags with longer queries that match few
+	rng = random.Random(0)
+	queries = [str(rng.randrange(10 ** rng.randint(1, 4))) for _ in range(requests)]
+	payloads = [harness.command_payload("ping", {"tag": q}, focused="tag", member=i) for i, q in enumerate(queries)]
+	return [await harness.run(f"/ping autocomplete over {tags} pings", payloads, rate=rate)]
+
+
+async def raffle_scenario(
+	harness: Harness, *, joins: int = 500, seconds: float = 10.0, duration: int = 15
+) -> list[ScenarioResult]:
+	"""Starts a raffle, and has members join it through the raffle button"""
+	command = harness.command_payload("raffle single", {"raffle_name": "Harness", "duration": duration})
+	results = [await harness.run("/raffle single", [command])]
+	message = harness.original_message(command)
+	customID = message["components"][0]["components"][0]["custom_id"]
+	payloads = [harness.button_payload(message, customID, member=i % harness.memberCount) for i in range(joins)]
+	results.append(await harness.run(f"{joins} raffle joins", payloads, rate=joins / seconds))
+	# Wait for the raffle to end and announce the winners
+	await harness.wait_for_command("raffle single", timeout=duration + 30)
+	return results
+
+
+# Scenarios by name: extensions to load, members in the fake guild, and the scenario function
+SCENARIOS: dict[str, tuple[tuple[str, ...], int, Callable[..., Awaitable[list[ScenarioResult]]]]] = {
+	"ping": (("pings",), 1000, ping_scenario),
+	"autocomplete": (("pings",), 100, autocomplete_scenario),
+	"raffle": (("raffle",), 500, raffle_scenario),
+}
+
+
+async def run_scenario(name: str, *, members: int | None = None, **options) -> tuple[list[ScenarioResult], str]:
+	"""|coro|
+
+	Runs a scenario in a new harness
+
+	Parameters
+	----------
+	name : str
+		Scenario name
+	members : int | None, optional
+		Members in the fake guild, by default the scenario's default
+	**options
+		Options for the scenario function
+
+	Returns
+	-------
+	tuple[list[ScenarioResult], str]
+		Results of each stage of the scenario, and the command completion report
+	"""
+	extensions, defaultMembers, scenario = SCENARIOS[name]
+	async with Harness(extensions=extensions, members=members or defaultMembers) as harness:
+		results = await scenario(harness, **options)
+		return results, harness.command_report()
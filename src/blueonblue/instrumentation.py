@@ -0,0 +1,142 @@
+import collections
+import contextvars
+import logging
+from time import perf_counter
+from typing import Callable
+
+from .monitor import percentile
+
+_log = logging.getLogger(__name__)
+
+__all__ = ["CommandInstrumentation", "CommandStats", "CommandTiming", "mark_response", "record_phase"]
+
+# Phases that command time is split into
+PHASES = ("db", "http", "discord")
+# Number of recent invocations kept per command
+COMMAND_HISTORY = 200
+
+_currentTiming: contextvars.ContextVar["CommandTiming | None"] = contextvars.ContextVar("currentTiming", default=None)
+
+
+class CommandTiming:
+	"""Timing for a single command invocation.
+	Phase times are accumulated by the code running in the command's context."""
+
+	__slots__ = ("command", "kind", "start", "firstResponse", "total", "phases")
+
+	def __init__(self, command: str, kind: str):
+		self.command = command
+		self.kind = kind
+		self.start = perf_counter()
+		# Seconds from receipt to the first response, and to completion
+		self.firstResponse: float | None = None
+		self.total: float | None = None
+		self.phases: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+	@property
+	def other(self) -> float:
+		"""Time not accounted for by any phase"""
+		return max(0.0, (self.total or 0.0) - sum(self.phases.values()))
+
+
+def record_phase(phase: str, duration: float) -> None:
+	"""Adds time to a phase of the command running in the current context, if any"""
+	timing = _currentTiming.get()
+	if timing is not None and timing.total is None:
+		timing.phases[phase] += duration
+
+
+def mark_response() -> None:
+	"""Records the first response of the command running in the current context, if any"""
+	timing = _currentTiming.get()
+	if timing is not None and timing.firstResponse is None:
+		timing.firstResponse = perf_counter() - timing.start
+
+
+class CommandStats:
+	"""Rolling timings for a single command"""
+
+	__slots__ = ("count", "failures", "recent")
+
+	def __init__(self, history: int = COMMAND_HISTORY):
+		self.count = 0
+		self.failures = 0
+		self.recent: collections.deque[CommandTiming] = collections.deque(maxlen=history)
+
+	def total_percentile(self, percent: float) -> float:
+		"""Percentile of the total command time over the recent invocations"""
+		return percentile([t.total or 0.0 for t in self.recent], percent)
+
+	def response_percentile(self, percent: float) -> float:
+		"""Percentile of the time to first response over the recent invocations that responded"""
+		return percentile([t.firstResponse for t in self.recent if t.firstResponse is not None], percent)
+
+	def phase_average(self, phase: str) -> float:
+		"""Average time spent in a phase over the recent invocations"""
+		if len(self.recent) == 0:
+			return 0.0
+		if phase == "other":
+			return sum(t.other for t in self.recent) / len(self.recent)
+		return sum(t.phases[phase] for t in self.recent) / len(self.recent)
+
+
+class CommandInstrumentation:
+	"""Times app commands and prefix commands, and keeps rolling statistics per command"""
+
+	def __init__(self, onFinish: Callable[[CommandTiming, str], None] | None = None, history: int = COMMAND_HISTORY):
+		self.commands: dict[str, CommandStats] = {}
+		self.onFinish = onFinish
+		self.history = history
+
+	def begin(self, command: str, kind: str) -> CommandTiming:
+		"""Starts timing a command in the current context
+
+		Parameters
+		----------
+		command : str
+			Qualified name of the command
+		kind : str
+			Type of command, "app" or "prefix"
+
+		Returns
+		-------
+		CommandTiming
+			Timing for the command
+		"""
+		timing = CommandTiming(command, kind)
+		_currentTiming.set(timing)
+		return timing
+
+	def current(self) -> CommandTiming | None:
+		"""Timing for the command running in the current context, if any"""
+		return _currentTiming.get()
+
+	def finish(self, timing: CommandTiming, status: str = "ok") -> None:
+		"""Finishes timing a command, and records it in the command's statistics.
+		Finishing a command more than once has no effect.
+
+		Parameters
+		----------
+		timing : CommandTiming
+			Timing for the command
+		status : str, optional
+			Outcome of the command, by default "ok"
+		"""
+		if timing.total is not None:
+			return
+		timing.total = perf_counter() - timing.start
+		stats = self.commands.get(timing.command)
+		if stats is None:
+			stats = CommandStats(self.history)
+			self.commands[timing.command] = stats
+		stats.count += 1
+		if status != "ok":
+			stats.failures += 1
+		stats.recent.append(timing)
+		if self.onFinish is not None:
+			self.onFinish(timing, status)
+
+	def slowest(self, limit: int = 10, percent: float = 95) -> list[tuple[str, CommandStats]]:
+		"""Commands with the highest total time percentile, slowest first"""
+		ranked = sorted(self.commands.items(), key=lambda c: c[1].total_percentile(percent), reverse=True)
+		return ranked[:limit]
@@ -1,9 +1,55 @@
+import asyncio
 import logging
+import random
+import time
+import xml.etree.ElementTree as ElementTree
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, NamedTuple, TypeVar
 
-import blueonblue
+import aiohttp
+
+from blueonblue.cache import TTLCache
+
+if TYPE_CHECKING:
+	from blueonblue.bot import BlueOnBlueBot
 
 _log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+STEAM_API_URL = "https://api.steampowered.com"
+STEAM_COMMUNITY_URL = "https://steamcommunity.com"
+
+# Offset between a short Steam group ID and its 64-bit ID
+STEAM_GROUP_ID64_BASE = 103582791429521408
+
+# Cache sizes and lifetimes (in seconds) for each Steam API endpoint
+PLAYER_SUMMARY_CACHE_SIZE = 1024
+PLAYER_SUMMARY_CACHE_TTL = 60.0
+USER_GROUP_CACHE_SIZE = 1024
+USER_GROUP_CACHE_TTL = 300.0
+VANITY_URL_CACHE_SIZE = 1024
+VANITY_URL_CACHE_TTL = 86400.0
+
+# Maximum number of steamids accepted by a single GetPlayerSummaries request
+PLAYER_SUMMARY_BATCH_SIZE = 100
+# Time in seconds to wait for additional lookups before sending a batch
+PLAYER_SUMMARY_BATCH_WINDOW = 0.005
+
+# Number of requests that can be made in a burst before the rate limit applies
+RATE_LIMIT_BURST = 10
+# Number of times to retry a request after a rate limit, server error, or connection error
+RETRY_ATTEMPTS = 3
+# Base and maximum delay in seconds for exponential backoff between retries
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Consecutive failures before the circuit breaker opens
+BREAKER_FAILURE_THRESHOLD = 5
+# Time in seconds that the circuit breaker stays open before allowing a trial request
+BREAKER_RESET_TIMEOUT = 60.0
+# Time in seconds to wait for the trial request to complete before opening the breaker again
+BREAKER_TRIAL_TIMEOUT = 30.0
+
 
 # Exceptions
 class MissingSteamID(Exception):
@@ -25,8 +71,585 @@ class NoSteamUserFound(Exception):
 	pass
 
 
+class GroupMembersPage(NamedTuple):
+	"""Single page of a Steam group's member list"""
+
+	members: tuple[int, ...]
+	memberCount: int
+	totalPages: int
+
+
+class SteamUnavailable(Exception):
+	"""Exception raised when requests are not being sent to Steam because the API appears to be degraded"""
+
+	pass
+
+
+class TokenBucket:
+	"""Token bucket rate limiter
+
+	Tokens are refilled continuously at the given rate, up to the capacity of the bucket.
+	"""
+
+	def __init__(self, rate: float, capacity: int):
+		self.rate = rate
+		self.capacity = capacity
+		self._tokens = float(capacity)
+		self._updated = time.monotonic()
+		self._lock = asyncio.Lock()
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+		self._updated = now
+
+	async def acquire(self) -> None:
+		"""|coro|
+
+		Waits until a token is available, then consumes it.
+		"""
+		async with self._lock:
+			self._refill()
+			if self._tokens < 1:
+				await asyncio.sleep((1 - self._tokens) / self.rate)
+				self._refill()
+			self._tokens -= 1
+
+
+class BreakerState(Enum):
+	CLOSED = "closed"
+	OPEN = "open"
+	HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+	"""Circuit breaker used to fail fast while an upstream service is degraded
+
+	Opens after a number of consecutive failures. Once the reset timeout has passed,
+	a single trial request is allowed through, which closes the breaker on success.
+	If the trial request does not complete within the trial timeout, the breaker opens again.
+	A trial request that is cancelled can be released, which allows another trial request through.
+	"""
+
+	def __init__(
+		self,
+		*,
+		threshold: int = BREAKER_FAILURE_THRESHOLD,
+		resetTimeout: float = BREAKER_RESET_TIMEOUT,
+		trialTimeout: float = BREAKER_TRIAL_TIMEOUT,
+		onStateChange: Callable[[BreakerState], None] | None = None,
+	):
+		self.threshold = threshold
+		self.resetTimeout = resetTimeout
+		self.trialTimeout = trialTimeout
+		self.onStateChange = onStateChange
+		self.state = BreakerState.CLOSED
+		self.failures = 0
+		self._openedAt = 0.0
+		self._trialStartedAt = 0.0
+		self._trialActive = False
+
+	def _setState(self, state: BreakerState) -> None:
+		if state != self.state:
+			self.state = state
+			_log.warning(f"Steam API circuit breaker is now {state.value}")
+			if self.onStateChange is not None:
+				self.onStateChange(state)
+
+	def check(self) -> None:
+		"""Checks if a request is allowed through the breaker
+
+		Raises
+		------
+		SteamUnavailable
+			Raised if the breaker is open, or a trial request is already in progress
+		"""
+		if self.state == BreakerState.OPEN:
+			if time.monotonic() - self._openedAt >= self.resetTimeout:
+				self._startTrial()
+				self._setState(BreakerState.HALF_OPEN)
+				return
+			raise SteamUnavailable()
+		elif self.state == BreakerState.HALF_OPEN:
+			if not self._trialActive:
+				# The previous trial request was released without a result
+				self._startTrial()
+				return
+			if time.monotonic() - self._trialStartedAt >= self.trialTimeout:
+				# The trial request never completed, treat it as a failure
+				self._openedAt = time.monotonic()
+				self._setState(BreakerState.OPEN)
+			# Only the trial request is allowed through
+			raise SteamUnavailable()
+
+	def _startTrial(self) -> None:
+		self._trialActive = True
+		self._trialStartedAt = time.monotonic()
+
+	def record_success(self) -> None:
+		self._trialActive = False
+		self.failures = 0
+		self._setState(BreakerState.CLOSED)
+
+	def record_failure(self) -> None:
+		self._trialActive = False
+		self.failures += 1
+		if self.state == BreakerState.HALF_OPEN or self.failures >= self.threshold:
+			self._openedAt = time.monotonic()
+			self._setState(BreakerState.OPEN)
+
+	def release_trial(self) -> None:
+		"""Releases the trial request without recording a result, allowing another trial request through"""
+		self._trialActive = False
+
+
+def _parse_group_page(text: str, groupID: int) -> GroupMembersPage:
+	"""Parses a page of a Steam group's member list
+
+	Error pages and private groups do not have a member list. These are rejected instead of
+	being read as a group without members.
+
+	Parameters
+	----------
+	text : str
+		Member list XML
+	groupID : int
+		Short Steam group ID that was requested
+
+	Returns
+	-------
+	GroupMembersPage
+		Members on the page, the total number of members, and the total number of pages
+
+	Raises
+	------
+	xml.etree.ElementTree.ParseError
+		Raised if the response is not the member list of the group
+	"""
+	root = ElementTree.fromstring(text)
+	groupID64 = root.findtext("groupID64")
+	memberCount = root.findtext("memberCount")
+	totalPages = root.findtext("totalPages")
+	if root.tag != "memberList" or groupID64 is None or memberCount is None or totalPages is None:
+		raise ElementTree.ParseError(f"Steam did not return a member list for group {groupID}")
+	try:
+		if int(groupID64) != STEAM_GROUP_ID64_BASE + groupID:
+			raise ElementTree.ParseError(f"Steam returned the member list for group {groupID64}, not group {groupID}")
+		members = tuple(int(m.text) for m in root.iterfind("members/steamID64") if m.text is not None)
+		return GroupMembersPage(members, int(memberCount), int(totalPages))
+	except ValueError as e:
+		raise ElementTree.ParseError(f"Invalid member list for group {groupID}: {e}") from e
+
+
+def _retry_delay(attempt: int, retryAfter: str | None = None) -> float:
+	"""Calculates the delay before retrying a request, using exponential backoff with full jitter
+
+	Parameters
+	----------
+	attempt : int
+		Number of the attempt that failed, starting at zero
+	retryAfter : str | None, optional
+		Value of the Retry-After header, if provided
+
+	Returns
+	-------
+	float
+		Delay in seconds
+	"""
+	if retryAfter is not None and retryAfter.isnumeric():
+		return min(float(retryAfter), RETRY_MAX_DELAY)
+	return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+class _PlayerSummaryBatcher:
+	"""Collects concurrent player summary lookups into batched GetPlayerSummaries requests"""
+
+	def __init__(self, client: "SteamClient"):
+		self.client = client
+		self.requests = 0
+		self._pending: dict[str, asyncio.Future[dict[str, Any]]] = {}
+		self._flushTask: asyncio.Task | None = None
+		self._requestTasks: set[asyncio.Task] = set()
+
+	async def load(self, steamID: str) -> dict[str, Any]:
+		"""|coro|
+
+		Queues a lookup for a single player summary, and waits for the batch containing it
+
+		Parameters
+		----------
+		steamID : str
+			Steam64ID of the user
+
+		Returns
+		-------
+		dict[str, Any]
+			Player summary
+
+		Raises
+		------
+		NoSteamUserFound
+			Could not locate the user by SteamID
+		"""
+		future = self._pending.get(steamID)
+		if future is None:
+			future = asyncio.get_running_loop().create_future()
+			self._pending[steamID] = future
+			if len(self._pending) >= PLAYER_SUMMARY_BATCH_SIZE:
+				# Batch is full, send it right away
+				self._flush()
+			elif self._flushTask is None:
+				self._flushTask = asyncio.create_task(self._flush_later(), name="Steam Player Summary Batch")
+		return await asyncio.shield(future)
+
+	async def _flush_later(self) -> None:
+		await asyncio.sleep(PLAYER_SUMMARY_BATCH_WINDOW)
+		self._flushTask = None
+		self._flush()
+
+	def _flush(self) -> None:
+		"""Sends all pending lookups in batches of up to the maximum batch size"""
+		if self._flushTask is not None:
+			self._flushTask.cancel()
+			self._flushTask = None
+		pending = self._pending
+		self._pending = {}
+		steamIDs = list(pending.keys())
+		for i in range(0, len(steamIDs), PLAYER_SUMMARY_BATCH_SIZE):
+			batch = {s: pending[s] for s in steamIDs[i : i + PLAYER_SUMMARY_BATCH_SIZE]}
+			task = asyncio.create_task(self._send(batch), name="Steam Player Summary Request")
+			# Hold a reference to the task until it completes
+			self._requestTasks.add(task)
+			task.add_done_callback(self._requestTasks.discard)
+
+	async def _send(self, batch: dict[str, asyncio.Future[dict[str, Any]]]) -> None:
+		self.requests += 1
+		try:
+			players = (
+				await self.client._get("ISteamUser/GetPlayerSummaries/v2/", {"steamids": ",".join(batch.keys())})
+			)["players"]
+		except Exception as e:
+			for future in batch.values():
+				if not future.done():
+					future.set_exception(e)
+					# Mark the exception as retrieved in case the waiter was cancelled
+					future.exception()
+			return
+
+		found = {p["steamid"]: p for p in players}
+		for steamID, future in batch.items():
+			if future.done():
+				continue
+			if steamID in found:
+				future.set_result(found[steamID])
+			else:
+				_log.debug(f"Could not find Steam user: {steamID}")
+				future.set_exception(NoSteamUserFound())
+				future.exception()
+
+
+class SteamClient:
+	"""Steam Web API client
+
+	Caches responses for each endpoint, and shares a single in-flight request
+	between concurrent callers asking for the same data.
+	"""
+
+	def __init__(
+		self,
+		session: aiohttp.ClientSession,
+		token: str,
+		*,
+		rateLimit: float = 1.0,
+		onBreakerStateChange: Callable[[BreakerState], None] | None = None,
+	):
+		self.session = session
+		self.token = token
+		self.limiter = TokenBucket(rateLimit, RATE_LIMIT_BURST)
+		self.breaker = CircuitBreaker(onStateChange=onBreakerStateChange)
+		self.playerSummaries: TTLCache[str, dict[str, Any]] = TTLCache(
+			PLAYER_SUMMARY_CACHE_SIZE, PLAYER_SUMMARY_CACHE_TTL
+		)
+		self.userGroups: TTLCache[str, tuple[int, ...]] = TTLCache(USER_GROUP_CACHE_SIZE, USER_GROUP_CACHE_TTL)
+		self.vanityURLs: TTLCache[str, str] = TTLCache(VANITY_URL_CACHE_SIZE, VANITY_URL_CACHE_TTL)
+		self._summaryBatcher = _PlayerSummaryBatcher(self)
+
+	@property
+	def caches(self) -> dict[str, TTLCache]:
+		"""Endpoint caches by endpoint name"""
+		return {
+			"GetPlayerSummaries": self.playerSummaries,
+			"GetUserGroupList": self.userGroups,
+			"ResolveVanityURL": self.vanityURLs,
+		}
+
+	async def _request(self, endpoint: str, params: dict[str, str]) -> dict[str, Any]:
+		"""|coro|
+
+		Makes a single GET request to the Steam Web API
+
+		Parameters
+		----------
+		endpoint : str
+			API endpoint, relative to the Steam API URL
+		params : dict[str, str]
+			Query parameters, not including the API key
+
+		Returns
+		-------
+		dict[str, Any]
+			The "response" object returned by the API
+		"""
+		start = time.perf_counter()
+		async with self.session.get(f"{STEAM_API_URL}/{endpoint}", params={"key": self.token, **params}) as response:
+			data = (await response.json())["response"]
+		_log.debug(f"Steam API request to {endpoint} completed in {(time.perf_counter() - start) * 1000:.0f}ms")
+		return data
+
+	async def _get(self, endpoint: str, params: dict[str, str]) -> dict[str, Any]:
+		"""|coro|
+
+		Makes a GET request to the Steam Web API, subject to the rate limit and circuit breaker.
+
+		Parameters
+		----------
+		endpoint : str
+			API endpoint, relative to the Steam API URL
+		params : dict[str, str]
+			Query parameters, not including the API key
+
+		Returns
+		-------
+		dict[str, Any]
+			The "response" object returned by the API
+		"""
+		return await self._with_retries(lambda: self._request(endpoint, params))
+
+	async def _with_retries(self, request: Callable[[], Awaitable[T]]) -> T:
+		"""|coro|
+
+		Runs an idempotent Steam request, subject to the rate limit and circuit breaker.
+		Rate limits, server errors, and connection errors are retried with jittered exponential backoff.
+
+		Parameters
+		----------
+		request : Callable[[], Awaitable[T]]
+			Coroutine function that makes the request
+
+		Returns
+		-------
+		T
+			Result of the request
+
+		Raises
+		------
+		SteamUnavailable
+			Raised if the circuit breaker is open
+		"""
+		for attempt in range(RETRY_ATTEMPTS + 1):
+			self.breaker.check()
+			recorded = False
+			try:
+				await self.limiter.acquire()
+				data = await request()
+			except aiohttp.ClientResponseError as error:
+				recorded = True
+				if error.status != 429 and error.status < 500:
+					# Steam answered the request, so the API is working.
+					# Client errors will not succeed on a retry.
+					self.breaker.record_success()
+					raise
+				self.breaker.record_failure()
+				if attempt >= RETRY_ATTEMPTS:
+					raise
+				retryAfter = error.headers.get("Retry-After") if error.headers is not None else None
+				delay = _retry_delay(attempt, retryAfter)
+				_log.info(f"Received code {error.status} from Steam. Retrying in {delay:.1f} seconds")
+			except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+				recorded = True
+				self.breaker.record_failure()
+				if attempt >= RETRY_ATTEMPTS:
+					raise
+				delay = _retry_delay(attempt)
+				_log.info(f"Error connecting to Steam [{error}]. Retrying in {delay:.1f} seconds")
+			except asyncio.CancelledError:
+				# The caller was cancelled, which says nothing about Steam's health
+				recorded = True
+				self.breaker.release_trial()
+				raise
+			else:
+				recorded = True
+				self.breaker.record_success()
+				return data
+			finally:
+				if not recorded:
+					# Failed with an unexpected error.
+					# This also releases the trial request if the breaker is half-open.
+					self.breaker.record_failure()
+			await asyncio.sleep(delay)
+		# Unreachable, the final attempt always returns or raises
+		raise SteamUnavailable()
+
+	async def _request_group_page(self, groupID: int, page: int) -> str:
+		"""|coro|
+
+		Makes a single request for a page of a Steam group's public member list
+
+		Parameters
+		----------
+		groupID : int
+			Short Steam group ID
+		page : int
+			Page number, starting at 1
+
+		Returns
+		-------
+		str
+			Member list XML
+		"""
+		async with self.session.get(
+			f"{STEAM_COMMUNITY_URL}/gid/{STEAM_GROUP_ID64_BASE + groupID}/memberslistxml/",
+			params={"xml": "1", "p": str(page)},
+		) as response:
+			response.raise_for_status()
+			return await response.text()
+
+	async def get_group_members_page(self, groupID: int, page: int) -> GroupMembersPage:
+		"""|coro|
+
+		Retrieves a page of a Steam group's public member list
+
+		Parameters
+		----------
+		groupID : int
+			Short Steam group ID
+		page : int
+			Page number, starting at 1
+
+		Returns
+		-------
+		GroupMembersPage
+			Members on the page, the total number of members, and the total number of pages
+
+		Raises
+		------
+		xml.etree.ElementTree.ParseError
+			Raised if Steam did not return the member list of the group
+		"""
+		text = await self._with_retries(lambda: self._request_group_page(groupID, page))
+		return _parse_group_page(text, groupID)
+
+	async def get_player_summary(self, steamID: str, *, fresh: bool = False) -> dict[str, Any]:
+		"""|coro|
+
+		Retrieves the player summary for a Steam user
+
+		Lookups made at the same time are combined into a single batched request.
+
+		Parameters
+		----------
+		steamID : str
+			Steam64ID of the user
+		fresh : bool, optional
+			Bypass the cache, by default False
+
+		Returns
+		-------
+		dict[str, Any]
+			Player summary
+
+		Raises
+		------
+		NoSteamUserFound
+			Could not locate the user by SteamID
+		"""
+		return await self.playerSummaries.get_or_load(steamID, lambda: self._summaryBatcher.load(steamID), fresh=fresh)
+
+	async def get_player_summaries(self, steamIDs: list[str]) -> dict[str, dict[str, Any]]:
+		"""|coro|
+
+		Retrieves player summaries for multiple Steam users
+
+		Users that could not be found are omitted from the result.
+
+		Parameters
+		----------
+		steamIDs : list[str]
+			Steam64IDs of the users
+
+		Returns
+		-------
+		dict[str, dict[str, Any]]
+			Player summaries by Steam64ID
+		"""
+		results = await asyncio.gather(*(self.get_player_summary(s) for s in steamIDs), return_exceptions=True)
+		summaries: dict[str, dict[str, Any]] = {}
+		for steamID, result in zip(steamIDs, results):
+			if isinstance(result, NoSteamUserFound):
+				continue
+			elif isinstance(result, BaseException):
+				raise result
+			summaries[steamID] = result
+		return summaries
+
+	async def get_user_groups(self, steamID: str, *, fresh: bool = False) -> tuple[int, ...]:
+		"""|coro|
+
+		Retrieves the IDs of all Steam groups that a user is a member of
+
+		Parameters
+		----------
+		steamID : str
+			Steam64ID of the user
+		fresh : bool, optional
+			Bypass the cache, by default False
+
+		Returns
+		-------
+		tuple[int, ...]
+			Group IDs
+		"""
+
+		async def load() -> tuple[int, ...]:
+			responseData = await self._get("ISteamUser/GetUserGroupList/v1/", {"steamid": steamID})
+			return tuple(int(g["gid"]) for g in responseData.get("groups", []))
+
+		return await self.userGroups.get_or_load(steamID, load, fresh=fresh)
+
+	async def resolve_vanity_url(self, vanity: str) -> str:
+		"""|coro|
+
+		Resolves a Steam vanity URL to a Steam64ID
+
+		Parameters
+		----------
+		vanity : str
+			Vanity part of the profile URL
+
+		Returns
+		-------
+		str
+			The Steam64ID
+
+		Raises
+		------
+		MissingSteamID
+			Raised if the vanity URL could not be resolved
+		"""
+
+		async def load() -> str:
+			responseData = await self._get("ISteamUser/ResolveVanityURL/v1/", {"vanityurl": vanity})
+			if ("steamid" in responseData) and (responseData["steamid"].isnumeric()):
+				return responseData["steamid"]
+			else:
+				_log.debug(f"Error retrieving steamID from vanity url: {vanity}")
+				raise MissingSteamID()
+
+		return await self.vanityURLs.get_or_load(vanity.casefold(), load)
+
+
 # Functions
-async def getID64(bot: blueonblue.BlueOnBlueBot, url: str) -> str:
+async def getID64(bot: "BlueOnBlueBot", url: str) -> str:
 	"""|coro|
 
 	Converts a Steam profile URL to a Steam64ID
@@ -69,25 +692,14 @@ async def getID64(bot: blueonblue.BlueOnBlueBot, url: str) -> str:
 			vanity = vanity[:-1]
 
 		# Make our request to the steam API
-		async with bot.httpSession.get(
-			"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/",
-			params={"key": bot.config.steam_api_token, "vanityurl": vanity},
-		) as response:
-			responseData = (await response.json())["response"]
-			if ("steamid" in responseData) and (responseData["steamid"].isnumeric()):
-				return responseData["steamid"]
-			else:
-				_log.debug(
-					f"Error {response.status} retrieving steamID from vanity url: {vanity}"
-				)
-				raise MissingSteamID(response.status)
+		return await bot.steam.resolve_vanity_url(vanity)
 	else:
 		_log.debug(f"Could not retrieve Steam ID from invalid profile URL: {url}")
 		raise InvalidSteamURL()
 
 
 async def in_guild_group(
-	bot: blueonblue.BlueOnBlueBot, guildID: int, steamID: str
+	bot: "BlueOnBlueBot", guildID: int, steamID: str
 ) -> bool:
 	"""|coro|
 
@@ -109,27 +721,20 @@ async def in_guild_group(
 	bool
 		If the steam account was part of the steam group
 	"""
-	async with bot.httpSession.get(
-		"https://api.steampowered.com/ISteamUser/GetUserGroupList/v1/",
-		params={"key": bot.config.steam_api_token, "steamid": steamID},
-	) as response:
-		# Get our response data
-		responseData = (await response.json())["response"]
-		# Get our group list in dict form
-		groupList = []
-		if "groups" in responseData:
-			for g in responseData["groups"]:
-				groupList.append(int(g["gid"]))  # Append the group ID to the group list
-		# Get the steam group from the config
-		steamGroupID = await bot.serverConfig.steam_group_id.get(guildID)
-		if steamGroupID in groupList:
-			return True
-		else:
-			return False
+	# Get the steam group from the config
+	steamGroupID = await bot.serverConfig.steam_group_id.get(guildID)
+	if steamGroupID is None:
+		return False
+	groupList = await bot.steam.get_user_groups(steamID)
+	if steamGroupID in groupList:
+		return True
+	# The user may have only just joined the group, so make a fresh request.
+	groupList = await bot.steam.get_user_groups(steamID, fresh=True)
+	return steamGroupID in groupList
 
 
 async def check_guild_token(
-	bot: blueonblue.BlueOnBlueBot, steamID: str, token: str
+	bot: "BlueOnBlueBot", steamID: str, token: str
 ) -> bool:
 	"""|coro|
 
@@ -149,32 +754,18 @@ async def check_guild_token(
 	bool
 		If the token is in the Steam Profile real name field
 	"""
-	# Make our web request
-	async with bot.httpSession.get(
-		"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-		params={"key": bot.config.steam_api_token, "steamids": steamID},
-	) as response:
-		# Get our response data
-		playerData = (await response.json())["response"]["players"]
-		# If we have no entries, return None
-		if len(playerData) == 0:
-			_log.debug(f"Could not find Steam user: {id}")
-			raise NoSteamUserFound()
-		# Check if we have a "realname" value in the playerdata
-		if "realname" in playerData[0]:
-			# Real name is in playerdata
-			if token in playerData[0]["realname"]:
-				# Stored token in real name
-				return True
-			else:
-				# Stored token not in real name
-				return False
-		else:
-			# With no realname, we have no match
-			return False
-
-
-async def get_display_name(bot: blueonblue.BlueOnBlueBot, steamID: str) -> str:
+	# Use a cached profile if it already has the token. Otherwise, the user may have
+	# only just added it, so make a fresh request.
+	playerData = bot.steam.playerSummaries.get(steamID)
+	if playerData is not None and token in playerData.get("realname", ""):
+		bot.steam.playerSummaries.stats.hits += 1
+		return True
+	playerData = await bot.steam.get_player_summary(steamID, fresh=True)
+	# With no realname, we have no match
+	return token in playerData.get("realname", "")
+
+
+async def get_display_name(bot: "BlueOnBlueBot", steamID: str) -> str:
 	"""|coro|
 
 	Retrieves the display name of a Steam profile using their SteamID64
@@ -196,16 +787,5 @@ async def get_display_name(bot: blueonblue.BlueOnBlueBot, steamID: str) -> str:
 	NoSteamUserFound
 		Could not locate the user by SteamID
 	"""
-	# Make our web request
-	async with bot.httpSession.get(
-		"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-		params={"key": bot.config.steam_api_token, "steamids": steamID},
-	) as response:
-		# Get our response data
-		playerData = (await response.json())["response"]["players"]
-		# If we have no entries, raise an error
-		if len(playerData) == 0:
-			_log.debug(f"Could not find Steam user: {steamID}")
-			raise NoSteamUserFound()
-		# We have a user, return their real name
-		return playerData[0]["personaname"]
+	playerData = await bot.steam.get_player_summary(steamID)
+	return playerData["personaname"]
@@ -1,5 +1,20 @@
+import atexit
+import datetime
+import gzip
+import json
 import logging
 import logging.handlers
+import os
+import queue
+import shutil
+import threading
+
+__all__ = ["setup_logging"]
+
+# Attributes present on every log record. Any other attributes were passed with "extra".
+_RECORD_ATTRIBUTES = frozenset(
+	vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None)).keys() | {"message", "asctime"}
+)
 
 
 class _ColourFormatter(logging.Formatter):
@@ -41,6 +56,73 @@ class _ColourFormatter(logging.Formatter):
 		return output
 
 
+class _JSONFormatter(logging.Formatter):
+	"""Logging formatter that outputs each record as a single line of JSON"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		entry = {
+			"time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+			"level": record.levelname,
+			"logger": record.name,
+			"message": record.getMessage(),
+			"module": record.module,
+			"line": record.lineno,
+			"thread": record.threadName,
+		}
+		taskName = getattr(record, "taskName", None)
+		if taskName is not None:
+			entry["task"] = taskName
+		if record.exc_info:
+			entry["exception"] = self.formatException(record.exc_info)
+		elif record.exc_text:
+			entry["exception"] = record.exc_text
+		if record.stack_info:
+			entry["stack"] = self.formatStack(record.stack_info)
+		# Include any values passed with "extra"
+		for key, value in vars(record).items():
+			if key not in _RECORD_ATTRIBUTES and key not in entry:
+				entry[key] = value
+		return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+	"""Queue handler that leaves formatting to the handlers on the listener thread.
+
+	The default QueueHandler formats the record before queueing it, which would do the formatting work
+	on the logging thread and discard the exception info that the colour and JSON formatters use."""
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		# Merge the arguments into the message now, since they may be modified before the record is handled
+		record.msg = record.getMessage()
+		record.args = None
+		return record
+
+
+def _compress_log(source: str, dest: str) -> None:
+	"""Compresses a rotated log file. Runs in a background thread."""
+	try:
+		with open(source, "rb") as src, gzip.open(dest + ".tmp", "wb") as dst:
+			shutil.copyfileobj(src, dst)
+		os.replace(dest + ".tmp", dest)
+		os.remove(source)
+	except OSError:
+		logging.getLogger(__name__).exception(f"Unable to compress log file {source}")
+
+
+def _log_namer(name: str) -> str:
+	"""Names rotated log files with the compressed file extension"""
+	return name + ".gz"
+
+
+def _log_rotator(source: str, dest: str) -> None:
+	"""Moves the current log file aside, and compresses it in the background"""
+	dirName, baseName = os.path.split(dest)
+	# Use a hidden name so that the file is not counted as a backup while it is compressed
+	pending = os.path.join(dirName, f".{baseName}.pending")
+	os.rename(source, pending)
+	threading.Thread(target=_compress_log, args=(pending, dest), name="Log Compression").start()
+
+
 class _stdoutFilter(logging.Filter):
 	def filter(self, record: logging.LogRecord):
 		"""Only allow log messages with log level below error."""
@@ -50,23 +132,40 @@ class _stdoutFilter(logging.Filter):
 def setup_logging(
 	*,
 	level: int = logging.INFO,
-) -> None:
+	jsonFormat: bool = False,
+) -> logging.handlers.QueueListener:
 	"""Handles setting up logging for BlueonBlue
 
 	Inspired heavily by the built-in logging capabilities for discord.py
 
+	Log records are put on a queue, and formatted and written by a listener thread,
+	so that logging does not block the event loop. Rotated log files are compressed in the background.
+
 	Parameters
 	----------
 	level : int, optional
 		Logging level to use, by default logging.INFO
+	jsonFormat : bool, optional
+		Output log records as JSON lines instead of text, by default False
+
+	Returns
+	-------
+	logging.handlers.QueueListener
+		Listener writing the log records. Stopped automatically when the interpreter exits.
 	"""
 
 	logHandler = logging.handlers.TimedRotatingFileHandler("data/logs/blueonblue.log", when="midnight", backupCount=30)
+	logHandler.namer = _log_namer
+	logHandler.rotator = _log_rotator
 	consoleStdout = logging.StreamHandler()
 	consoleStderr = logging.StreamHandler()
 
-	logFormatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
-	consoleFormatter = _ColourFormatter()
+	if jsonFormat:
+		logFormatter = _JSONFormatter()
+		consoleFormatter = logFormatter
+	else:
+		logFormatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
+		consoleFormatter = _ColourFormatter()
 
 	logHandler.setFormatter(logFormatter)
 	consoleStdout.setFormatter(consoleFormatter)
@@ -76,13 +175,21 @@ def setup_logging(
 	consoleStdout.addFilter(stdoutFilter)
 	consoleStderr.setLevel(logging.ERROR)
 
+	logQueue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+	listener = logging.handlers.QueueListener(
+		logQueue, logHandler, consoleStdout, consoleStderr, respect_handler_level=True
+	)
+	listener.start()
+	# Flush any queued records on exit
+	atexit.register(listener.stop)
+
 	log = logging.getLogger()
 
-	log.addHandler(logHandler)
-	log.addHandler(consoleStdout)
-	log.addHandler(consoleStderr)
+	log.addHandler(_QueueHandler(logQueue))
 
 	log.setLevel(level)
 
 	# Always leave discord.py on INFO logging
 	logging.getLogger("discord").setLevel(logging.INFO)
+
+	return listener
@@ -0,0 +1,523 @@
+import contextlib
+import logging
+import math
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Iterator, cast
+
+import aiohttp
+import asqlite
+
+from .instrumentation import mark_response, record_phase
+
+if TYPE_CHECKING:
+	# The aiohttp server is only imported when metrics are served
+	from aiohttp import web
+
+_log = logging.getLogger(__name__)
+
+__all__ = [
+	"BotMetrics",
+	"CallbackMetric",
+	"Counter",
+	"Histogram",
+	"InstrumentedPool",
+	"MetricsRegistry",
+	"MetricsServer",
+	"discord_trace_config",
+	"http_trace_config",
+	"instrument_connection",
+	"instrument_pool",
+]
+
+# Histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Known upstream hosts for HTTP client metrics. Other hosts are labelled by host name.
+UPSTREAM_HOSTS = {
+	"api.steampowered.com": "steam",
+	"steamcommunity.com": "steam",
+	"cdn.discordapp.com": "discord_cdn",
+	"media.discordapp.net": "discord_cdn",
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+	"""Formats a sample value for the text exposition format"""
+	if math.isinf(value):
+		return "+Inf" if value > 0 else "-Inf"
+	if math.isnan(value):
+		return "NaN"
+	return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+	"""Escapes a label value for the text exposition format"""
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+	"""Formats a set of labels for the text exposition format"""
+	if len(labels) == 0:
+		return ""
+	return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+	"""Base class for metrics"""
+
+	type = "untyped"
+
+	def __init__(self, name: str, documentation: str, labelNames: tuple[str, ...] = ()):
+		self.name = name
+		self.documentation = documentation
+		self.labelNames = labelNames
+
+	def _labels(self, labels: tuple[str, ...]) -> dict[str, str]:
+		if len(labels) != len(self.labelNames):
+			raise ValueError(f"Metric {self.name} expects labels {self.labelNames}, got {labels}")
+		return dict(zip(self.labelNames, (str(label) for label in labels)))
+
+	def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+		"""Yields the name, labels, and value of each sample"""
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	"""Monotonically increasing value"""
+
+	type = "counter"
+
+	def __init__(self, name: str, documentation: str, labelNames: tuple[str, ...] = ()):
+		super().__init__(name, documentation, labelNames)
+		self._values: dict[tuple[str, ...], float] = {}
+
+	def inc(self, *labels: str, amount: float = 1.0) -> None:
+		"""Increments the counter for a set of label values"""
+		self._values[labels] = self._values.get(labels, 0.0) + amount
+
+	def get(self, *labels: str) -> float:
+		"""Retrieves the counter value for a set of label values"""
+		return self._values.get(labels, 0.0)
+
+	def samples(self):
+		for labels, value in self._values.items():
+			yield self.name, self._labels(labels), value
+
+
+class Histogram(_Metric):
+	"""Distribution of observed values, counted in cumulative buckets"""
+
+	type = "histogram"
+
+	def __init__(
+		self, name: str, documentation: str, labelNames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+	):
+		super().__init__(name, documentation, labelNames)
+		self.buckets = tuple(sorted(buckets))
+		# Per label set: bucket counts (non-cumulative, with a final +Inf bucket), sum, and count
+		self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+	def observe(self, value: float, *labels: str) -> None:
+		"""Records an observation for a set of label values"""
+		entry = self._values.get(labels)
+		if entry is None:
+			entry = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+			self._values[labels] = entry
+		counts, totals = entry
+		for i, bound in enumerate(self.buckets):
+			if value <= bound:
+				counts[i] += 1
+				break
+		else:
+			counts[-1] += 1
+		totals[0] += value
+		totals[1] += 1
+
+	@contextlib.contextmanager
+	def time(self, *labels: str) -> Iterator[None]:
+		"""Context manager that observes the time spent inside it"""
+		start = perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(perf_counter() - start, *labels)
+
+	def count(self, *labels: str) -> int:
+		"""Number of observations for a set of label values"""
+		entry = self._values.get(labels)
+		return int(entry[1][1]) if entry is not None else 0
+
+	def samples(self):
+		for labels, (counts, totals) in self._values.items():
+			labelDict = self._labels(labels)
+			cumulative = 0
+			for bound, count in zip(self.buckets + (math.inf,), counts):
+				cumulative += count
+				yield f"{self.name}_bucket", {**labelDict, "le": _format_value(bound)}, cumulative
+			yield f"{self.name}_sum", labelDict, totals[0]
+			yield f"{self.name}_count", labelDict, totals[1]
+
+
+class CallbackMetric(_Metric):
+	"""Metric whose values are read from a callback when the metrics are rendered.
+	The callback returns pairs of label values and sample values."""
+
+	def __init__(
+		self,
+		name: str,
+		documentation: str,
+		callback: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+		labelNames: tuple[str, ...] = (),
+		type: str = "gauge",
+	):
+		super().__init__(name, documentation, labelNames)
+		self.callback = callback
+		self.type = type
+
+	def samples(self):
+		for labels, value in self.callback():
+			yield self.name, self._labels(labels), value
+
+
+class MetricsRegistry:
+	"""Collection of metrics that can be rendered in the Prometheus text exposition format"""
+
+	def __init__(self):
+		self.metrics: dict[str, _Metric] = {}
+
+	def register(self, metric: _Metric) -> Any:
+		"""Registers a metric, and returns it"""
+		if metric.name in self.metrics:
+			raise ValueError(f"Metric {metric.name} is already registered")
+		self.metrics[metric.name] = metric
+		return metric
+
+	def render(self) -> str:
+		"""Renders all metrics in the Prometheus text exposition format"""
+		lines: list[str] = []
+		for metric in self.metrics.values():
+			try:
+				samples = list(metric.samples())
+			except Exception:
+				_log.exception(f"Unable to collect metric {metric.name}")
+				continue
+			lines.append(f"# HELP {metric.name} {metric.documentation}")
+			lines.append(f"# TYPE {metric.name} {metric.type}")
+			for name, labels, value in samples:
+				lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+		return "\n".join(lines) + "\n"
+
+
+class BotMetrics(MetricsRegistry):
+	"""Metrics collected by the bot"""
+
+	def __init__(self):
+		super().__init__()
+		self.commands: Counter = self.register(
+			Counter("blueonblue_commands_total", "App and prefix command invocations", ("command", "kind", "status"))
+		)
+		self.commandLatency: Histogram = self.register(
+			Histogram(
+				"blueonblue_command_duration_seconds",
+				"Time from command receipt to completion",
+				("command", "kind"),
+			)
+		)
+		self.commandResponse: Histogram = self.register(
+			Histogram(
+				"blueonblue_command_first_response_seconds",
+				"Time from command receipt to the first response sent to Discord",
+				("command", "kind"),
+			)
+		)
+		self.dbQueryLatency: Histogram = self.register(
+			Histogram("blueonblue_db_query_duration_seconds", "Database query latency", ("operation",))
+		)
+		self.dbPoolWait: Histogram = self.register(
+			Histogram("blueonblue_db_pool_wait_seconds", "Time spent waiting for a database connection")
+		)
+		self.httpLatency: Histogram = self.register(
+			Histogram("blueonblue_http_client_duration_seconds", "HTTP client request latency", ("upstream",))
+		)
+		self.httpErrors: Counter = self.register(
+			Counter("blueonblue_http_client_errors_total", "HTTP client requests that failed", ("upstream",))
+		)
+		self.loopLag: Histogram = self.register(
+			Histogram(
+				"blueonblue_event_loop_lag_seconds",
+				"Delay between when a sleeping task should wake and when it runs",
+				buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+			)
+		)
+
+
+def _timed(metrics: BotMetrics, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+	"""Wraps an asqlite query method to record its latency"""
+
+	async def timed(*args, **kwargs):
+		start = perf_counter()
+		try:
+			return await method(*args, **kwargs)
+		finally:
+			duration = perf_counter() - start
+			metrics.dbQueryLatency.observe(duration, name)
+			record_phase("db", duration)
+
+	return timed
+
+
+class _InstrumentedCursor:
+	"""Proxy for an asqlite cursor that records query latency"""
+
+	TIMED_METHODS = frozenset(("execute", "executemany", "executescript", "fetchone", "fetchmany", "fetchall"))
+
+	def __init__(self, cursor: asqlite.Cursor, metrics: BotMetrics):
+		self._cursor = cursor
+		self._metrics = metrics
+
+	def __getattr__(self, name: str) -> Any:
+		attr = getattr(self._cursor, name)
+		if name not in self.TIMED_METHODS:
+			return attr
+		timed = _timed(self._metrics, name, attr)
+
+		async def proxied(*args, **kwargs):
+			result = await timed(*args, **kwargs)
+			# Execute methods return the cursor itself, keep returning the proxy
+			return self if result is self._cursor else result
+
+		return proxied
+
+	async def __aenter__(self) -> "_InstrumentedCursor":
+		await self._cursor.__aenter__()
+		return self
+
+	async def __aexit__(self, *args) -> None:
+		await self._cursor.__aexit__(*args)
+
+
+class _InstrumentedCursorContext:
+	"""Proxy for the result of Connection.cursor, which can be awaited or used as an async context manager"""
+
+	def __init__(self, context: Any, metrics: BotMetrics):
+		self._context = context
+		self._metrics = metrics
+
+	async def _cursor(self) -> _InstrumentedCursor:
+		return _InstrumentedCursor(await self._context, self._metrics)
+
+	def __await__(self):
+		return self._cursor().__await__()
+
+	async def __aenter__(self) -> _InstrumentedCursor:
+		return _InstrumentedCursor(await self._context.__aenter__(), self._metrics)
+
+	async def __aexit__(self, *args) -> None:
+		await self._context.__aexit__(*args)
+
+
+class _InstrumentedConnection:
+	"""Proxy for an asqlite connection that records query latency"""
+
+	TIMED_METHODS = frozenset(("execute", "executemany", "executescript", "fetchone", "fetchmany", "fetchall", "commit"))
+
+	def __init__(self, connection: asqlite.Connection, metrics: BotMetrics):
+		self._connection = connection
+		self._metrics = metrics
+
+	def __getattr__(self, name: str) -> Any:
+		attr = getattr(self._connection, name)
+		if name not in self.TIMED_METHODS:
+			return attr
+		return _timed(self._metrics, name, attr)
+
+	def cursor(self, **kwargs) -> _InstrumentedCursorContext:
+		return _InstrumentedCursorContext(self._connection.cursor(**kwargs), self._metrics)
+
+
+def instrument_connection(connection: asqlite.Connection, metrics: BotMetrics) -> asqlite.Connection:
+	"""Wraps an asqlite connection to record query latency, including queries made through cursors.
+	The wrapper has the same interface as the connection.
+
+	Parameters
+	----------
+	connection : asqlite.Connection
+		Connection to wrap
+	metrics : BotMetrics
+		Metrics to record to
+
+	Returns
+	-------
+	asqlite.Connection
+		Instrumented connection
+	"""
+	return cast(asqlite.Connection, _InstrumentedConnection(connection, metrics))
+
+
+class InstrumentedPool:
+	"""Wraps an asqlite pool to record connection wait times and query latency"""
+
+	def __init__(self, pool: asqlite.Pool, metrics: BotMetrics):
+		self._pool = pool
+		self._metrics = metrics
+
+	@contextlib.asynccontextmanager
+	async def acquire(self) -> AsyncIterator[asqlite.Connection]:
+		"""Acquires a connection from the pool"""
+		start = perf_counter()
+		async with self._pool.acquire() as connection:
+			wait = perf_counter() - start
+			self._metrics.dbPoolWait.observe(wait)
+			record_phase("db", wait)
+			yield instrument_connection(connection, self._metrics)
+
+	def __getattr__(self, name: str) -> Any:
+		return getattr(self._pool, name)
+
+
+def instrument_pool(pool: asqlite.Pool, metrics: BotMetrics) -> asqlite.Pool:
+	"""Wraps an asqlite pool to record connection wait times and query latency.
+	The wrapper has the same interface as the pool.
+
+	Parameters
+	----------
+	pool : asqlite.Pool
+		Pool to wrap
+	metrics : BotMetrics
+		Metrics to record to
+
+	Returns
+	-------
+	asqlite.Pool
+		Instrumented pool
+	"""
+	return cast(asqlite.Pool, InstrumentedPool(pool, metrics))
+
+
+def http_trace_config(metrics: BotMetrics) -> aiohttp.TraceConfig:
+	"""Creates an aiohttp trace config that records request latency per upstream
+
+	Parameters
+	----------
+	metrics : BotMetrics
+		Metrics to record to
+
+	Returns
+	-------
+	aiohttp.TraceConfig
+		Trace config for an aiohttp.ClientSession
+	"""
+
+	def upstream(url) -> str:
+		host = url.host or "unknown"
+		return UPSTREAM_HOSTS.get(host, host)
+
+	async def on_request_start(session, context, params: aiohttp.TraceRequestStartParams):
+		context.start = perf_counter()
+
+	async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+		duration = perf_counter() - context.start
+		metrics.httpLatency.observe(duration, upstream(params.url))
+		record_phase("http", duration)
+
+	async def on_request_exception(session, context, params: aiohttp.TraceRequestExceptionParams):
+		duration = perf_counter() - context.start
+		metrics.httpLatency.observe(duration, upstream(params.url))
+		metrics.httpErrors.inc(upstream(params.url))
+		record_phase("http", duration)
+
+	traceConfig = aiohttp.TraceConfig()
+	traceConfig.on_request_start.append(on_request_start)
+	traceConfig.on_request_end.append(on_request_end)
+	traceConfig.on_request_exception.append(on_request_exception)
+	return traceConfig
+
+
+def _is_response(method: str, path: str) -> bool:
+	"""Checks if a Discord API request responds to a command"""
+	if method != "POST":
+		return False
+	parts = path.strip("/").split("/")
+	# /api/v10/interactions/{id}/{token}/callback
+	if "interactions" in parts and parts[-1] == "callback":
+		return True
+	# /api/v10/channels/{id}/messages
+	return len(parts) >= 2 and parts[-1] == "messages" and parts[-3:-2] == ["channels"]
+
+
+def discord_trace_config(metrics: BotMetrics) -> aiohttp.TraceConfig:
+	"""Creates an aiohttp trace config for the Discord API session used by discord.py.
+	Records request latency, and the Discord API phase and first response of the running command.
+
+	Parameters
+	----------
+	metrics : BotMetrics
+		Metrics to record to
+
+	Returns
+	-------
+	aiohttp.TraceConfig
+		Trace config for the `http_trace` option of discord.Client
+	"""
+
+	async def on_request_start(session, context, params: aiohttp.TraceRequestStartParams):
+		context.start = perf_counter()
+
+	async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+		duration = perf_counter() - context.start
+		metrics.httpLatency.observe(duration, "discord")
+		record_phase("discord", duration)
+		if params.response.status < 400 and _is_response(params.method, params.url.path):
+			mark_response()
+
+	async def on_request_exception(session, context, params: aiohttp.TraceRequestExceptionParams):
+		duration = perf_counter() - context.start
+		metrics.httpLatency.observe(duration, "discord")
+		metrics.httpErrors.inc("discord")
+		record_phase("discord", duration)
+
+	traceConfig = aiohttp.TraceConfig()
+	traceConfig.on_request_start.append(on_request_start)
+	traceConfig.on_request_end.append(on_request_end)
+	traceConfig.on_request_exception.append(on_request_exception)
+	return traceConfig
+
+
+class MetricsServer:
+	"""HTTP server exposing metrics at /metrics"""
+
+	def __init__(self, metrics: BotMetrics, host: str, port: int):
+		self.metrics = metrics
+		self.host = host
+		self.port = port
+		self._runner: "web.AppRunner | None" = None
+
+	async def start(self) -> None:
+		"""|coro|
+
+		Starts the HTTP server"""
+		from aiohttp import web
+
+		app = web.Application()
+		app.router.add_get("/metrics", self._handle_metrics)
+		self._runner = web.AppRunner(app, access_log=None)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, self.host, self.port)
+		await site.start()
+		# Use the bound port, in case the server was started on port zero
+		self.port = self._runner.addresses[0][1]
+		_log.info(f"Serving metrics on {self.host}:{self.port}")
+
+	async def stop(self) -> None:
+		"""|coro|
+
+		Stops the HTTP server"""
+		if self._runner is not None:
+			await self._runner.cleanup()
+
+	async def _handle_metrics(self, request: "web.Request") -> "web.Response":
+		from aiohttp import web
+
+		return web.Response(body=self.metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,172 @@
+import asyncio
+import collections
+import logging
+import math
+import os
+import sys
+import threading
+import traceback
+from time import perf_counter
+from typing import Callable
+
+_log = logging.getLogger(__name__)
+
+__all__ = ["LoopMonitor", "percentile", "resident_memory"]
+
+# Interval in seconds between event loop lag samples
+LOOP_MONITOR_INTERVAL = 0.25
+# Number of lag samples kept for percentiles. Ten minutes at the default interval.
+LOOP_MONITOR_WINDOW = 2400
+# Number of stack frames to include when logging a blocked event loop
+BLOCKED_STACK_LIMIT = 30
+
+
+def percentile(values: list[float], percent: float) -> float:
+	"""Calculates a percentile of a list of values using the nearest-rank method
+
+	Parameters
+	----------
+	values : list[float]
+		Values to calculate the percentile of. Does not need to be sorted.
+	percent : float
+		Percentile to calculate, between 0 and 100
+
+	Returns
+	-------
+	float
+		Percentile value, or 0.0 if there are no values
+	"""
+	if len(values) == 0:
+		return 0.0
+	ordered = sorted(values)
+	rank = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+	return ordered[rank]
+
+
+def resident_memory() -> int | None:
+	"""Reads the resident memory of the current process
+
+	Returns
+	-------
+	int | None
+		Resident memory in bytes, or None if it cannot be read on this platform
+	"""
+	try:
+		with open("/proc/self/statm") as file:
+			return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError):
+		pass
+	try:
+		import resource
+	except ImportError:
+		return None
+	# Peak rather than current memory. Reported in kilobytes on Linux, and bytes on macOS.
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoopMonitor:
+	"""Measures event loop scheduling lag, and captures the stack of code that blocks the event loop.
+
+	A task on the event loop sleeps for a fixed interval and records how late it wakes up.
+	A watchdog thread checks that the task is still waking up, and if the loop has been blocked
+	for longer than the threshold, logs the stack of the event loop thread while it is still blocked."""
+
+	def __init__(
+		self,
+		threshold: float,
+		*,
+		interval: float = LOOP_MONITOR_INTERVAL,
+		window: int = LOOP_MONITOR_WINDOW,
+		onSample: Callable[[float], None] | None = None,
+	):
+		self.threshold = threshold
+		self.interval = interval
+		self.samples: collections.deque[float] = collections.deque(maxlen=window)
+		self.slowEvents = 0
+		self.lastBlocked: str | None = None
+		self.onSample = onSample
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self._loopThreadID: int | None = None
+		self._heartbeat = perf_counter()
+		self._captured = False
+		self._task: asyncio.Task | None = None
+		self._thread: threading.Thread | None = None
+		self._stopped = threading.Event()
+
+	def start(self) -> None:
+		"""Starts monitoring the running event loop"""
+		self._loop = asyncio.get_running_loop()
+		self._loopThreadID = threading.get_ident()
+		self._heartbeat = perf_counter()
+		self._stopped.clear()
+		self._task = self._loop.create_task(self._sample(), name="Event Loop Monitor")
+		self._thread = threading.Thread(target=self._watch, name="Event Loop Watchdog", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		"""Stops monitoring the event loop"""
+		self._stopped.set()
+		if self._task is not None:
+			self._task.cancel()
+
+	def percentiles(self, *percents: float) -> list[float]:
+		"""Calculates lag percentiles in seconds over the sample window"""
+		values = list(self.samples)
+		return [percentile(values, p) for p in percents]
+
+	async def _sample(self) -> None:
+		while True:
+			start = perf_counter()
+			await asyncio.sleep(self.interval)
+			now = perf_counter()
+			lag = max(0.0, now - start - self.interval)
+			self._heartbeat = now
+			self._captured = False
+			self.samples.append(lag)
+			if self.onSample is not None:
+				self.onSample(lag)
+			if lag > self.threshold:
+				self.slowEvents += 1
+				_log.warning(f"Event loop lag of {lag * 1000:.0f} ms")
+
+	def _watch(self) -> None:
+		while not self._stopped.wait(self.interval):
+			blocked = perf_counter() - self._heartbeat - self.interval
+			if blocked > self.threshold and not self._captured:
+				# Only capture once per blocking event
+				self._captured = True
+				self._capture(blocked)
+
+	def _capture(self, blocked: float) -> None:
+		"""Logs the stack of the event loop thread. Runs in the watchdog thread."""
+		assert self._loop is not None and self._loopThreadID is not None
+		frame = sys._current_frames().get(self._loopThreadID)
+		if frame is None:
+			return
+		stack = "".join(traceback.format_stack(frame, limit=BLOCKED_STACK_LIMIT))
+		context = _describe_task(asyncio.current_task(self._loop))
+		self.lastBlocked = f"Blocked for at least {blocked * 1000:.0f} ms in {context}\n{stack}"
+		_log.warning(f"Event loop blocked for at least {blocked * 1000:.0f} ms in {context}:\n{stack}")
+
+
+def _describe_task(task: asyncio.Task | None) -> str:
+	"""Describes the task running on the event loop, including the app command if it is running one"""
+	if task is None:
+		return "a callback outside of any task"
+	description = f"task {task.get_name()!r}"
+	coro = task.get_coro()
+	qualname = getattr(coro, "__qualname__", None)
+	if qualname is not None:
+		description += f" ({qualname})"
+	# Walk the awaited coroutines looking for an interaction being handled
+	while coro is not None:
+		frame = getattr(coro, "cr_frame", None)
+		if frame is not None:
+			interaction = frame.f_locals.get("interaction")
+			command = getattr(interaction, "command", None)
+			if command is not None:
+				description += f" running app command /{command.qualified_name}"
+				break
+		coro = getattr(coro, "cr_await", None)
+	return description
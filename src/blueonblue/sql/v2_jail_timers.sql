@@ -0,0 +1,14 @@
+-- Revises: v1_initial.sql
+-- Creation Data: 2026-10-19
+-- Reason: Persistent jail release timers
+
+CREATE TABLE jail_timers (
+	server_id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	release_time INTEGER NOT NULL,
+	UNIQUE(server_id,user_id)
+);
+
+CREATE INDEX jail_timers_release_time ON jail_timers (release_time);
+
+PRAGMA user_version = 2;
@@ -0,0 +1,19 @@
+-- Revises: v2_jail_timers.sql
+-- Creation Data: 2026-10-19
+-- Reason: Checkpoints for Steam group membership sweeps
+
+CREATE TABLE verify_sweeps (
+	server_id INTEGER PRIMARY KEY,
+	group_id INTEGER NOT NULL,
+	next_page INTEGER NOT NULL,
+	total_pages INTEGER
+);
+
+CREATE TABLE verify_sweep_members (
+	server_id INTEGER NOT NULL,
+	steam64_id INTEGER NOT NULL,
+	UNIQUE(server_id,steam64_id),
+	FOREIGN KEY (server_id) REFERENCES verify_sweeps (server_id) ON DELETE CASCADE
+);
+
+PRAGMA user_version = 3;
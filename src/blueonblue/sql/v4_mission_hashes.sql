@@ -0,0 +1,27 @@
+-- Revises: v3_verify_sweeps.sql
+-- Creation Data: 2026-10-19
+-- Reason: Cache mission validation results and track uploaded mission content by hash
+
+CREATE TABLE mission_validation_cache (
+	sha256 TEXT PRIMARY KEY,
+	briefing_name TEXT,
+	game_type TEXT,
+	player_count INTEGER,
+	name TEXT,
+	version TEXT,
+	error TEXT,
+	ephemeral INTEGER NOT NULL DEFAULT 0,
+	last_used INTEGER NOT NULL
+);
+
+CREATE INDEX mission_validation_cache_last_used ON mission_validation_cache (last_used);
+
+CREATE TABLE mission_uploads (
+	server_id INTEGER NOT NULL,
+	sha256 TEXT NOT NULL,
+	file_name TEXT NOT NULL,
+	upload_time INTEGER NOT NULL,
+	UNIQUE(server_id,sha256)
+);
+
+PRAGMA user_version = 4;
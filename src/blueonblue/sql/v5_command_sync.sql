@@ -0,0 +1,11 @@
+-- Revises: v4_mission_hashes.sql
+-- Creation Data: 2026-10-19
+-- Reason: Track the last synchronized app command tree to skip unnecessary syncs
+
+CREATE TABLE app_command_sync (
+	scope INTEGER PRIMARY KEY,
+	tree_hash TEXT NOT NULL,
+	sync_time INTEGER NOT NULL
+);
+
+PRAGMA user_version = 5;
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import logging
 from zoneinfo import ZoneInfo
@@ -6,6 +7,7 @@ import aiohttp
 import blueonblue
 import discord
 from blueonblue.defines import ARMASTATS_EMBED_COLOUR, TIMEZONE
+from blueonblue.lib import steam
 from discord import app_commands
 from discord.ext import commands, tasks
 
@@ -226,14 +228,32 @@ class ArmaStats(commands.GroupCog, group_name="armastats"):
 		# We no longer need the database connection, so we can close the context manager
 		embed = discord.Embed(title=f"Mission Leaderboard - {embedType}", color=ARMASTATS_EMBED_COLOUR)
 
+		users: dict[int, discord.User | None] = {}
+		for row in data:
+			try:
+				users[row["discord_id"]] = interaction.client.get_user(row["discord_id"]) or (
+					await interaction.client.fetch_user(row["discord_id"])
+				)
+			except discord.NotFound:
+				users[row["discord_id"]] = None
+
+		# Users that no longer exist on Discord are shown by their Steam name, looked up in a single batched request
+		steamNames: dict[str, str] = {}
+		missing = [str(row["steam64_id"]) for row in data if users[row["discord_id"]] is None]
+		if len(missing) > 0:
+			try:
+				summaries = await self.bot.steam.get_player_summaries(missing)
+				steamNames = {steamID: summary["personaname"] for steamID, summary in summaries.items()}
+			except (steam.SteamUnavailable, aiohttp.ClientError, asyncio.TimeoutError):
+				_log.warning("Unable to retrieve Steam names for leaderboard", exc_info=True)
+
 		# Create our message text
 		for count, row in enumerate(data):
-			# If the user is not in the guild, return their stored display name instead of using a mention
-			user = interaction.client.get_user(row["discord_id"]) or (await interaction.client.fetch_user(row["discord_id"]))
+			user = users[row["discord_id"]]
 			if user is not None:
 				userText: str = user.mention
 			else:
-				userText: str = "Unknown"
+				userText: str = discord.utils.escape_markdown(steamNames.get(str(row["steam64_id"]), "Unknown"))
 			embed.add_field(
 				name=f"Rank {count + 1}",
 				value=f"{userText} - {row['mission_count']} missions",
@@ -1,4 +1,5 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 import subprocess
@@ -27,10 +28,15 @@ class BotControl(commands.Cog, name="Bot Control"):
 
 	@commands.command(brief="Synchronizes app commands")
 	@commands.is_owner()
-	async def sync(self, ctx: commands.Context):
+	async def sync(self, ctx: commands.Context, force: bool = False):
+		"""Synchronizes app commands if they have changed since the last sync.
+
+		Use "sync true" to synchronize even if nothing has changed."""
 		await ctx.send("Synchronizing app commands")
-		await self.bot.syncAppCommands()
-		await ctx.send("App commands synchronized")
+		if await self.bot.syncAppCommands(force=force):
+			await ctx.send("App commands synchronized")
+		else:
+			await ctx.send("App commands have not changed since the last sync. Use `sync true` to synchronize anyway.")
 
 	@commands.command()
 	@commands.is_owner()
@@ -100,6 +106,107 @@ class BotControl(commands.Cog, name="Bot Control"):
 			await ctx.send("**`SUCCESS`**")
 			_log.info(f"Reloaded extension: {cog}")
 
+	@commands.command()
+	@commands.is_owner()
+	async def steamstats(self, ctx: commands.Context):
+		"""Displays Steam API cache statistics."""
+		lines = []
+		for name, cache in self.bot.steam.caches.items():
+			stats = cache.stats
+			lines.append(
+				f"{name:20.20} size={len(cache):<5} hits={stats.hits:<6} misses={stats.misses:<6} "
+				f"coalesced={stats.coalesced:<5} hit rate={stats.hitRate:.0%} avg latency={stats.averageLoadTime * 1000:.0f}ms"
+			)
+		lines.append(f"GetPlayerSummaries batched requests={self.bot.steam._summaryBatcher.requests}")
+		lines.append(f"Circuit breaker: {self.bot.steam.breaker.state.value} ({self.bot.steam.breaker.failures} failures)")
+		statsText = "\n".join(lines)
+		await ctx.send(f"```{statsText}```")
+
+	@commands.command()
+	@commands.is_owner()
+	async def configstats(self, ctx: commands.Context):
+		"""Displays server config cache statistics."""
+		serverConfig = self.bot.serverConfig
+		await ctx.send(
+			f"```Cached servers={len(serverConfig.snapshots)} DB reads={serverConfig.dbReads} "
+			f"DB reads avoided for unset options={serverConfig.dbReadsAvoided}```"
+		)
+
+	@commands.command()
+	@commands.is_owner()
+	async def uploadstats(self, ctx: commands.Context):
+		"""Displays mission upload queue statistics."""
+		missions = self.bot.get_cog("Missions")
+		if missions is None:
+			await ctx.send("The missions extension is not loaded.")
+			return
+		queue = missions.uploadQueue  # type: ignore
+		jobs = list(missions.recentUploads)  # type: ignore
+		lines = [f"Active uploads={queue.active} queued={queue.queued}/{queue.maxQueued}"]
+		if len(jobs) > 0:
+			for phase in ("queued", "download", "validate", "upload"):
+				durations = [job.timings[phase] for job in jobs if phase in job.timings]
+				if len(durations) > 0:
+					lines.append(
+						f"{phase:10} jobs={len(durations):<4} avg={sum(durations) / len(durations):.2f}s max={max(durations):.2f}s"
+					)
+			lines.append(f"{'total':10} jobs={len(jobs):<4} avg={sum(job.totalTime for job in jobs) / len(jobs):.2f}s")
+		statsText = "\n".join(lines)
+		await ctx.send(f"```{statsText}```")
+
+	@commands.command()
+	@commands.is_owner()
+	async def looplag(self, ctx: commands.Context):
+		"""Displays event loop lag percentiles, and the last time the event loop was blocked."""
+		monitor = self.bot.loopMonitor
+		p50, p90, p99, p100 = monitor.percentiles(50, 90, 99, 100)
+		message = (
+			f"```Samples={len(monitor.samples)} p50={p50 * 1000:.1f}ms p90={p90 * 1000:.1f}ms "
+			f"p99={p99 * 1000:.1f}ms max={p100 * 1000:.1f}ms slow events={monitor.slowEvents}```"
+		)
+		if monitor.lastBlocked is not None:
+			# Keep the message within the discord message length limit
+			message += f"```{monitor.lastBlocked[-1500:]}```"
+		await ctx.send(message)
+
+	@commands.command()
+	@commands.is_owner()
+	async def memstats(self, ctx: commands.Context):
+		"""Displays resident memory and the size of the member and message caches."""
+		await ctx.send(f"```{self.bot.memory_report()}```")
+
+	@app_commands.command(name="botstats")
+	@app_commands.default_permissions(administrator=True)
+	@blueonblue.checks.is_owner()
+	async def botstats(self, interaction: discord.Interaction, limit: app_commands.Range[int, 1, 25] = 10):
+		"""Displays the slowest commands, and where their time is spent.
+
+		Parameters
+		----------
+		interaction : discord.Interaction
+			The discord interaction
+		limit : app_commands.Range[int, 1, 25], optional
+			Number of commands to display, by default 10
+		"""
+		slowest = self.bot.instrumentation.slowest(limit)
+		if len(slowest) == 0:
+			await interaction.response.send_message("No commands have been timed yet.", ephemeral=True)
+			return
+		lines = [
+			f"{'command':20} {'runs':>5} {'fail':>4} {'p50':>7} {'p95':>7} {'resp95':>7} {'db':>6} {'http':>6} {'discord':>7} {'other':>6}"
+		]
+		for name, stats in slowest:
+			p50, p95 = stats.total_percentile(50), stats.total_percentile(95)
+			phases = [stats.phase_average(phase) * 1000 for phase in ("db", "http", "discord", "other")]
+			lines.append(
+				f"{name:20.20} {stats.count:>5} {stats.failures:>4} {p50 * 1000:>5.0f}ms {p95 * 1000:>5.0f}ms "
+				f"{stats.response_percentile(95) * 1000:>5.0f}ms {phases[0]:>4.0f}ms {phases[1]:>4.0f}ms "
+				f"{phases[2]:>5.0f}ms {phases[3]:>4.0f}ms"
+			)
+		lines.append(f"Percentiles and phase averages over the last {self.bot.instrumentation.history} runs of each command.")
+		statsText = "\n".join(lines)
+		await interaction.response.send_message(f"```{statsText}```", ephemeral=True)
+
 	@commands.command()
 	@commands.is_owner()
 	async def gitpull(self, ctx: commands.Context):
@@ -19,6 +19,42 @@ import logging
 
 _log = logging.getLogger(__name__)
 
+# Maximum number of concurrent role removals per guild when processing expired gold
+GOLD_EXPIRY_CONCURRENCY = 5
+# Discord message length limit
+MESSAGE_MAX_LENGTH = 2000
+
+
+def _chunk_lines(lines: list[str], limit: int = MESSAGE_MAX_LENGTH) -> list[str]:
+	"""Joins lines of text into as few messages as possible without exceeding the length limit.
+
+	Parameters
+	----------
+	lines : list[str]
+		Lines of text to join
+	limit : int, optional
+		Maximum length of a single message, by default MESSAGE_MAX_LENGTH
+
+	Returns
+	-------
+	list[str]
+		Messages to send
+	"""
+	messages: list[str] = []
+	current = ""
+	for line in lines:
+		line = line[:limit]
+		if current == "":
+			current = line
+		elif len(current) + len(line) + 1 <= limit:
+			current += "\n" + line
+		else:
+			messages.append(current)
+			current = line
+	if current != "":
+		messages.append(current)
+	return messages
+
 
 # All timer-related code in this module is heavily inspired by the reminder system in RoboDanny
 # https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/reminder.py
@@ -100,18 +136,30 @@ class Gold(commands.GroupCog, group_name="gold"):
 
 		return Timer(data) if data is not None else None
 
-	async def call_timer(self, timer: Timer) -> None:
-		# Delete the record from the database
-		_log.info(f"Calling gold timer: {timer}")
+	async def call_timers(self) -> list[Timer]:
+		"""Claims all expired gold timers from the database and fires a single event for them.
+
+		Every timer that has expired is removed in one statement, so a backlog of
+		expiries built up during downtime is processed in a single pass.
+
+		Returns
+		-------
+		list[Timer]
+			Timers that were claimed from the database
+		"""
 		async with self.bot.pool.acquire() as conn:
-			await conn.execute(
-				"DELETE FROM gold WHERE server_id = :server_id AND user_id = :user_id",
-				{"server_id": timer.guildID, "user_id": timer.userID},
+			data = await conn.fetchall(
+				"DELETE FROM gold WHERE expiry_time <= :now RETURNING server_id, user_id, expiry_time",
+				{"now": round(datetime.now(UTC).timestamp())},
 			)
 			await conn.commit()
 
-		# Fire the timer event
-		self.bot.dispatch("gold_timer_complete", timer)
+		timers = [Timer(row) for row in data]
+		if len(timers) > 0:
+			_log.info(f"Calling {len(timers)} gold timer(s)")
+			# Fire the timer event
+			self.bot.dispatch("gold_timers_complete", timers)
+		return timers
 
 	async def dispatch_timers(self) -> None:
 		log = logging.getLogger(__name__ + ".dispatch")
@@ -133,9 +181,9 @@ class Gold(commands.GroupCog, group_name="gold"):
 					log.debug(f"Sleeping dispatch task for {to_sleep} seconds")
 					await asyncio.sleep(to_sleep)
 				else:
-					log.debug("Firing timer")
-					# Fire the timer
-					await self.call_timer(self._current_timer)
+					log.debug("Firing timers")
+					# Fire all timers that have expired
+					await self.call_timers()
 					# Grab the next timer
 					self._current_timer = await self.get_active_timer()
 					# If we don't have a new timer, exit the loop
@@ -154,52 +202,97 @@ class Gold(commands.GroupCog, group_name="gold"):
 			self._task.cancel()
 			await self.refresh_timer()
 
-	@commands.Cog.listener()
-	async def on_gold_timer_complete(self, timer: Timer):
-		# Try to get the guild and member objects
-		try:
-			guild = self.bot.get_guild(timer.guildID) or (await self.bot.fetch_guild(timer.guildID))
-		except discord.HTTPException:
-			# Unable to get the guild or the member.
-			_log.debug(f"Gold timer unable to fetch guild [{timer.guildID}]")
-			return
+	async def _remove_expired_gold(
+		self,
+		guild: discord.Guild,
+		timer: Timer,
+		goldRole: discord.Role,
+		semaphore: asyncio.Semaphore,
+	) -> str | None:
+		"""|coro|
+
+		Removes the gold role from a single member whose gold has expired.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Guild that the timer belongs to
+		timer : Timer
+			Expired gold timer
+		goldRole : discord.Role
+			Gold role for the guild
+		semaphore : asyncio.Semaphore
+			Semaphore used to limit the number of concurrent role removals
+
+		Returns
+		-------
+		str | None
+			Line to include in the mod channel summary, if any
+		"""
+		async with semaphore:
+			try:
+				member = await self.bot.get_or_fetch_member(guild, timer.userID)
+			except discord.HTTPException:
+				member = None
+			if member is None:
+				# Unable to get the member.
+				_log.debug(f"Gold timer unable to fetch member [{timer.userID}] from guild [{guild.id}]")
+				return None
+
+			_log.info(f"Removing TMTM gold for user [{member.name}|{member.id}] in guild [{guild.name}|{guild.id}]")
+			try:
+				await member.remove_roles(goldRole, reason="TMTM gold expired")
+				return f"TMTM Gold has expired for user {member.mention}."
+			except discord.Forbidden:
+				return f"Unable to remove expired TMTM gold from user {member.mention}. Insufficient permissions."
+			except discord.HTTPException:
+				_log.warning(
+					f"Unknown error encountered removing expired TMTM gold from user [{member.name}|{member.id}] in guild [{guild.name}|{guild.id}].",
+				)
+				return f"Unknown error encountered removing expired TMTM gold from user {member.mention}."
+
+	async def _expire_guild_gold(self, guildID: int, timers: list[Timer]) -> None:
+		"""|coro|
+
+		Processes all expired gold timers for a single guild.
+		Role removals are run concurrently, and a single summary is sent to the mod channel.
+
+		Parameters
+		----------
+		guildID : int
+			Discord guild ID
+		timers : list[Timer]
+			Expired gold timers for the guild
+		"""
 		try:
-			member = guild.get_member(timer.userID) or (await guild.fetch_member(timer.userID))
+			guild = self.bot.get_guild(guildID) or (await self.bot.fetch_guild(guildID))
 		except discord.HTTPException:
-			# Unable to get the guild or the member.
-			_log.debug(f"Gold timer unable to fetch member [{timer.userID}] from guild [{timer.guildID}]")
+			# Unable to get the guild.
+			_log.debug(f"Gold timer unable to fetch guild [{guildID}]")
 			return
 
-		_log.info(f"Removing TMTM gold for user [{member.name}|{member.id}] in guild [{guild.name}|{guild.id}]")
 		# Get the mod channel and gold role
 		modChannel = await self.bot.serverConfig.channel_mod_activity.get(guild)
 		goldRole = await self.bot.serverConfig.role_gold.get(guild)
+		if goldRole is None:
+			return
 
-		if goldRole is not None:
-			try:
-				await member.remove_roles(goldRole, reason="TMTM gold expired")
-				if modChannel is not None:
-					await modChannel.send(
-						f"TMTM Gold has expired for user {member.mention}.",
-						allowed_mentions=discord.AllowedMentions.none(),
-					)
+		semaphore = asyncio.Semaphore(GOLD_EXPIRY_CONCURRENCY)
+		results = await asyncio.gather(*(self._remove_expired_gold(guild, t, goldRole, semaphore) for t in timers))
+		lines = [r for r in results if r is not None]
 
-			except discord.Forbidden:
-				if modChannel is not None:
-					await modChannel.send(
-						f"Unable to remove expired TMTM gold from user {member.mention}. Insufficient permissions.",
-						allowed_mentions=discord.AllowedMentions.none(),
-					)
+		if modChannel is not None:
+			for message in _chunk_lines(lines):
+				await modChannel.send(message, allowed_mentions=discord.AllowedMentions.none())
 
-			except discord.HTTPException:
-				if modChannel is not None:
-					await modChannel.send(
-						f"Unknown error encountered removing expired TMTM gold from user {member.mention}.",
-						allowed_mentions=discord.AllowedMentions.none(),
-					)
-					_log.warning(
-						f"Unknown error encountered removing expired TMTM gold from user [{member.name}|{member.id}] in guild [{guild.name}|{guild.id}].",
-					)
+	@commands.Cog.listener()
+	async def on_gold_timers_complete(self, timers: list[Timer]):
+		# Group our timers by guild
+		guildTimers: dict[int, list[Timer]] = {}
+		for timer in timers:
+			guildTimers.setdefault(timer.guildID, []).append(timer)
+
+		await asyncio.gather(*(self._expire_guild_gold(g, t) for g, t in guildTimers.items()))
 
 	@app_commands.command(name="add")
 	@app_commands.describe(user="User to be given TMTM gold.", value="Amount donated by user.")
@@ -1,6 +1,8 @@
+import asyncio
 import logging
-from datetime import timedelta
-from typing import Literal
+import math
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Literal
 
 import blueonblue
 import discord
@@ -12,9 +14,29 @@ from blueonblue.defines import (
 from discord import app_commands
 from discord.ext import commands, tasks
 
+if TYPE_CHECKING:
+	import sqlite3
+
 _log = logging.getLogger(__name__)
 
 
+class JailTimer:
+	def __init__(self, record: "sqlite3.Row"):
+		self.guildID: int = record["server_id"]
+		self.userID: int = record["user_id"]
+		self.expiry = datetime.fromtimestamp(record["release_time"], tz=UTC)
+
+	def __eq__(self, other: object) -> bool:
+		try:
+			assert isinstance(other, JailTimer)
+			return (self.guildID == other.guildID) and (self.userID == other.userID) and (self.expiry == other.expiry)
+		except (AttributeError, AssertionError):
+			return False
+
+	def __str__(self) -> str:
+		return f"Jail Timer: Guild={self.guildID} User={self.userID} Expiry={self.expiry}"
+
+
 @app_commands.guild_only()
 @app_commands.default_permissions(manage_messages=True)
 class Jail(commands.Cog, name="Jail"):
@@ -23,13 +45,169 @@ class Jail(commands.Cog, name="Jail"):
 	def __init__(self, bot, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.bot: blueonblue.BlueOnBlueBot = bot
+		self._current_timer: JailTimer | None = None
+		self._task = self.bot.loop.create_task(self.dispatch_timers(), name="Jail Timer")
 
 	async def cog_load(self):
 		self.timeout_role_loop.start()
 
 	async def cog_unload(self):
+		self._task.cancel()
 		self.timeout_role_loop.stop()
 
+	async def get_active_timer(self) -> JailTimer | None:
+		# Retrieve the next release timer from the database
+		async with self.bot.pool.acquire() as conn:
+			data = await conn.fetchone("SELECT * FROM jail_timers ORDER BY release_time ASC LIMIT 1")
+
+		return JailTimer(data) if data is not None else None
+
+	async def schedule_release(self, guildID: int, userID: int, releaseTime: datetime) -> None:
+		"""|coro|
+
+		Stores a release timer for a jailed user, replacing any existing timer for that user.
+		Restarts the dispatch task if the new timer expires before the current one.
+
+		Parameters
+		----------
+		guildID : int
+			Discord guild ID
+		userID : int
+			Discord user ID
+		releaseTime : datetime
+			Time at which the timeout role should be removed
+		"""
+		# Rounded up, so that the timer never fires before Discord's timeout has expired
+		releaseTimeStamp = math.ceil(releaseTime.timestamp())
+		async with self.bot.pool.acquire() as conn:
+			await conn.execute(
+				"INSERT OR REPLACE INTO jail_timers (server_id, user_id, release_time) VALUES \
+				(:server_id, :user_id, :release_time)",
+				{"server_id": guildID, "user_id": userID, "release_time": releaseTimeStamp},
+			)
+			await conn.commit()
+
+		_log.debug(f"Scheduled jail release for user [{userID}] in guild [{guildID}] at {releaseTime}")
+		if self._task.done() or self._current_timer is None or releaseTime < self._current_timer.expiry:
+			# New timer expires first, restart the dispatch task to pick it up
+			self._task.cancel()
+			self._task = self.bot.loop.create_task(self.dispatch_timers(), name="Jail Timer")
+
+	async def call_timers(self) -> list[JailTimer]:
+		"""Claims all expired jail timers from the database and releases the associated users.
+
+		Returns
+		-------
+		list[JailTimer]
+			Timers that were claimed from the database
+		"""
+		async with self.bot.pool.acquire() as conn:
+			data = await conn.fetchall(
+				"DELETE FROM jail_timers WHERE release_time <= :now RETURNING server_id, user_id, release_time",
+				{"now": math.floor(datetime.now(UTC).timestamp())},
+			)
+			await conn.commit()
+
+		timers = [JailTimer(row) for row in data]
+		for timer in timers:
+			_log.info(f"Calling jail timer: {timer}")
+			await self.release_member(timer)
+		return timers
+
+	async def dispatch_timers(self) -> None:
+		log = logging.getLogger(__name__ + ".dispatch")
+		try:
+			# Wait until the bot is ready
+			await self.bot.wait_until_ready()
+			while not self.bot.is_closed():
+				self._current_timer = await self.get_active_timer()
+				if self._current_timer is None:
+					# No timers remaining. New timers will restart the task.
+					log.debug("No active jail timers. Exiting loop.")
+					return
+				now = datetime.now(UTC)
+				if self._current_timer.expiry > now:
+					# Asyncio sleep supposedly has issues when called with very long delays.
+					to_sleep = min((self._current_timer.expiry - now).total_seconds(), 86400)
+					log.debug(f"Sleeping dispatch task for {to_sleep} seconds")
+					await asyncio.sleep(to_sleep)
+				else:
+					await self.call_timers()
+
+		except asyncio.CancelledError:
+			# Raise the error on task cancel per asyncio documentation
+			raise
+
+		except (OSError, discord.ConnectionClosed) as e:
+			# On other handled errors, restart the task
+			log.warning(f"Restarting jail timer due to exception [{e}]")
+			self._current_timer = None
+			self._task = self.bot.loop.create_task(self.dispatch_timers(), name="Jail Timer")
+
+	async def release_member(self, timer: JailTimer) -> None:
+		"""|coro|
+
+		Removes the timeout role from a user whose jail timer has expired.
+		If the user's timeout has been extended, the timer is rescheduled instead.
+
+		Parameters
+		----------
+		timer : JailTimer
+			Expired jail timer
+		"""
+		guild = self.bot.get_guild(timer.guildID)
+		if guild is None:
+			_log.debug(f"Jail timer unable to find guild [{timer.guildID}]")
+			return
+		timeoutRole = await self.bot.serverConfig.role_timeout.get(guild)
+		if timeoutRole is None:
+			return
+		try:
+			member = await self.bot.get_or_fetch_member(guild, timer.userID)
+		except discord.HTTPException:
+			member = None
+		if member is None:
+			_log.debug(f"Jail timer unable to fetch member [{timer.userID}] from guild [{timer.guildID}]")
+			return
+
+		if timeoutRole not in member.roles:
+			# Role was already removed
+			return
+
+		if member.is_timed_out() and member.timed_out_until is not None:
+			# Timeout was extended. Reschedule the release.
+			await self.schedule_release(guild.id, member.id, member.timed_out_until)
+			return
+
+		await self._remove_timeout_role(member, timeoutRole)
+
+	async def _remove_timeout_role(self, member: discord.Member, timeoutRole: discord.Role) -> None:
+		"""|coro|
+
+		Removes the timeout role from a member, and notifies the mod channel.
+
+		Parameters
+		----------
+		member : discord.Member
+			Member to release
+		timeoutRole : discord.Role
+			Timeout role for the guild
+		"""
+		modChannel = await self.bot.serverConfig.channel_mod_activity.get(member.guild)
+		try:
+			await member.remove_roles(timeoutRole, reason="Timeout expired")
+			if modChannel is not None:
+				await modChannel.send(
+					f"Timeout expired for user {member.mention}.",
+					allowed_mentions=discord.AllowedMentions.none(),
+				)
+		except discord.Forbidden:
+			if modChannel is not None:
+				await modChannel.send(
+					f"Error removing role {timeoutRole.mention} from user {member.mention} on timeout expiry.",
+					allowed_mentions=discord.AllowedMentions.none(),
+				)
+
 	@app_commands.command(name="jail")
 	@app_commands.describe(
 		user="User to be jailed",
@@ -49,11 +227,6 @@ class Jail(commands.Cog, name="Jail"):
 
 		modChannel = await self.bot.serverConfig.channel_mod_activity.get(interaction.guild)
 		assert modChannel is not None
-		# Timeout role doesn't do anything until I can figure out a good way to remove the
-		# role on timeout expiry
-		# timeoutRole = await self.bot.serverConfig.role_timeout.get(interaction.guild)
-		# assert timeoutRole is not None
-
 		# Get our timedelta
 		if time_unit == "minutes":
 			timeDelta = timedelta(minutes=time)
@@ -71,7 +244,7 @@ class Jail(commands.Cog, name="Jail"):
 			return
 
 		# Now that we have our timedelta, find the release time
-		releaseTimeStamp = round((discord.utils.utcnow() + timeDelta).timestamp())
+		releaseTimeStamp = math.ceil((discord.utils.utcnow() + timeDelta).timestamp())
 
 		# Create a "time text"
 		timeText = int(time) if time == int(time) else time
@@ -101,6 +274,7 @@ class Jail(commands.Cog, name="Jail"):
 				timeoutRole = await self.bot.serverConfig.role_timeout.get(interaction.guild)
 				if timeoutRole is not None:
 					await user.add_roles(timeoutRole, reason=f"User timed out by {interaction.user.display_name}")
+					await self.schedule_release(interaction.guild.id, user.id, discord.utils.utcnow() + timeDelta)
 				await modChannel.send(
 					f"User {user.mention} has been jailed by {interaction.user.mention} for {timeText} {time_unit}.",
 					allowed_mentions=discord.AllowedMentions.none(),
@@ -114,31 +288,40 @@ class Jail(commands.Cog, name="Jail"):
 			# Notify the user that the action timed out
 			await interaction.followup.send("Pending jail action has timed out", ephemeral=True)
 
-	@tasks.loop(minutes=1)
+	@commands.Cog.listener()
+	async def on_member_update(self, before: discord.Member, after: discord.Member):
+		# Only react to changes in the member's timeout
+		if before.timed_out_until == after.timed_out_until:
+			return
+		timeoutRole = await self.bot.serverConfig.role_timeout.get(after.guild)
+		if timeoutRole is None or timeoutRole not in after.roles:
+			return
+		# Schedule the release at the new timeout expiry. A removed timeout releases immediately.
+		releaseTime = after.timed_out_until if after.timed_out_until is not None else discord.utils.utcnow()
+		await self.schedule_release(after.guild.id, after.id, releaseTime)
+
+	@tasks.loop(hours=1)
 	async def timeout_role_loop(self):
-		"""Loop to periodically clear the timeout role from users who are no longer timed out."""
+		"""Reconciliation loop to clear the timeout role from users who were missed by the release timers."""
 		# Iterate through all guilds
 		for guild in self.bot.guilds:
 			timeoutRole = await self.bot.serverConfig.role_timeout.get(guild)
 			# If the timeout role is defined. Check for all members with the role.
 			if timeoutRole is not None:
-				modChannel = await self.bot.serverConfig.channel_mod_activity.get(guild)
+				# Role members are read from the member cache
+				try:
+					await self.bot.ensure_chunked(guild)
+				except asyncio.TimeoutError:
+					# Try this guild again on the next run
+					continue
 				for member in timeoutRole.members:
 					# If the member is not timed out. Remove the role from them.
 					if not member.is_timed_out():
-						try:
-							await member.remove_roles(timeoutRole, reason="Timeout expired")
-							if modChannel is not None:
-								await modChannel.send(
-									f"Timeout expired for user {member.mention}.",
-									allowed_mentions=discord.AllowedMentions.none(),
-								)
-						except discord.Forbidden:
-							if modChannel is not None:
-								await modChannel.send(
-									f"Error removing role {timeoutRole.mention} from user {member.mention} on timeout expiry.",
-									allowed_mentions=discord.AllowedMentions.none(),
-								)
+						await self._remove_timeout_role(member, timeoutRole)
+
+	@timeout_role_loop.before_loop
+	async def before_timeout_role_loop(self):
+		await self.bot.wait_until_ready()  # Wait until the bot is ready
 
 
 async def setup(bot: blueonblue.BlueOnBlueBot):
@@ -1,15 +1,28 @@
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import io
 import logging
+import mmap
+import os
 import re
-from datetime import datetime, time, timedelta
+import struct
+import tempfile
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+from datetime import UTC, datetime, time, timedelta
 from importlib.resources import files
-from typing import TypedDict
+from time import perf_counter
+from typing import IO, AsyncIterator, Callable, Iterable, Iterator, TypedDict
 from zoneinfo import ZoneInfo
 
 import aiohttp
 import discord
-import pbokit
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 import blueonblue
 from blueonblue.defines import (
@@ -27,6 +40,45 @@ ISO_8601_FORMAT = "%Y-%m-%d"
 
 VALID_GAMETYPES = ["coop", "tvt", "cotvt", "rptvt", "zeus", "zgm", "rpg"]
 
+# Chunk size used when streaming mission files
+MISSION_CHUNK_SIZE = 1024 * 1024
+# Mission files larger than this are written to disk instead of kept in memory
+MISSION_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Interval in seconds between event loop lag samples during mission validation
+LOOP_LAG_SAMPLE_INTERVAL = 0.01
+# Maximum number of validation results kept in the mission validation cache
+MISSION_VALIDATION_CACHE_SIZE = 500
+# Maximum number of missions processed at once, across all guilds and per guild
+MISSION_UPLOAD_CONCURRENCY = 2
+MISSION_UPLOAD_GUILD_CONCURRENCY = 1
+# Maximum number of missions waiting for an upload slot before new uploads are rejected
+MISSION_UPLOAD_MAX_QUEUED = 10
+# Interval in seconds between upload progress message updates
+MISSION_PROGRESS_INTERVAL = 2.0
+# Number of completed upload jobs kept for timing statistics
+MISSION_UPLOAD_HISTORY = 50
+# Interval in minutes between refreshes of the remote mission catalogs
+MISSION_CATALOG_REFRESH_MINUTES = 30
+
+DAV_NAMESPACE = "{DAV:}"
+PROPFIND_BODY = (
+	'<?xml version="1.0" encoding="utf-8"?>'
+	'<propfind xmlns="DAV:"><prop><resourcetype/></prop></propfind>'
+)
+
+MISSION_VERSION_PATTERN = re.compile(r"^(?P<base>.+)_v(?P<version>\d+(?:_\d+)*)\.(?P<map>[^.]+)\.pbo$", re.IGNORECASE)
+
+# PBO file format
+# https://community.bistudio.com/wiki/PBO_File_Format
+PBO_HEADER_FORMAT = "<4s4L"
+PBO_HEADER_SIZE = struct.calcsize(PBO_HEADER_FORMAT)
+# The SHA-1 checksum occupies the last 20 bytes of the file, with a single byte separator
+PBO_CHECKSUM_SIZE = 21
+
+BRIEFING_NAME_GUIDELINES = (
+	"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`."
+)
+
 
 class MissionFileNameInfo(TypedDict):
 	gameType: str
@@ -34,6 +86,36 @@ class MissionFileNameInfo(TypedDict):
 	playerCount: int
 
 
+class MissionBriefingInfo(TypedDict):
+	briefingName: str
+	gameType: str
+	playerCount: int
+	name: str
+	version: str
+
+
+class MissionValidationReport(TypedDict):
+	fileName: str
+	fileNameInfo: MissionFileNameInfo | None
+	briefing: MissionBriefingInfo | None
+	# Stage that failed validation, either "filename" or "contents"
+	errorStage: str | None
+	error: str | None
+	ephemeral: bool
+	validationTime: float
+	# Contents validation was loaded from the validation cache
+	cached: bool
+
+
+class MissionValidationError(Exception):
+	"""Exception raised when a mission file fails validation. Contains the message to be sent to the user."""
+
+	def __init__(self, message: str, *, ephemeral: bool = False):
+		super().__init__(message)
+		self.message = message
+		self.ephemeral = ephemeral
+
+
 def _decode_file_name(filename: str) -> MissionFileNameInfo:
 	"""Decodes the file name for a mission to collect information about it.
 	Returns a dict of parameters if successful, otherwise raises an error."""
@@ -82,12 +164,604 @@ def _decode_file_name(filename: str) -> MissionFileNameInfo:
 	return missionInfo
 
 
+class UploadJob:
+	"""Mission upload waiting in, or being processed by, the upload queue.
+	Records the time spent in each phase of the upload."""
+
+	__slots__ = ("interaction", "attachment", "phase", "timings", "bytesSent", "_phaseStart")
+
+	def __init__(self, interaction: discord.Interaction, attachment: discord.Attachment):
+		self.interaction = interaction
+		self.attachment = attachment
+		self.phase = "queued"
+		self.timings: dict[str, float] = {}
+		self.bytesSent = 0
+		self._phaseStart = perf_counter()
+
+	@property
+	def fileName(self) -> str:
+		return self.attachment.filename
+
+	@property
+	def totalTime(self) -> float:
+		"""Total time in seconds spent in completed phases"""
+		return sum(self.timings.values())
+
+	def start_phase(self, phase: str) -> None:
+		"""Ends the current phase and starts a new one"""
+		now = perf_counter()
+		self.timings[self.phase] = self.timings.get(self.phase, 0.0) + now - self._phaseStart
+		self.phase = phase
+		self._phaseStart = now
+
+	def add_sent(self, size: int) -> None:
+		"""Records bytes sent to the mission server"""
+		self.bytesSent += size
+
+	def describe(self) -> str:
+		"""Describes the progress of the job for the progress message"""
+		if self.phase == "queued":
+			return f"Mission `{self.fileName}` is queued for upload."
+		elif self.phase == "download":
+			return f"Downloading mission `{self.fileName}`."
+		elif self.phase == "validate":
+			return f"Validating mission `{self.fileName}`."
+		elif self.phase == "upload":
+			progress = self.bytesSent / self.attachment.size if self.attachment.size > 0 else 1.0
+			return f"Uploading mission `{self.fileName}` ({progress:.0%})."
+		elif self.phase == "failed":
+			return f"Mission `{self.fileName}` was not uploaded. Stopped after {self.totalTime:.1f} seconds."
+		else:
+			return f"Finished uploading mission `{self.fileName}` in {self.totalTime:.1f} seconds."
+
+
+class UploadQueue:
+	"""Limits the number of mission uploads processed at once, both globally and per guild.
+	Uploads waiting for a slot do not hold any mission data.
+
+	An upload reserves its place in the queue with reserve, then waits for a slot with slot."""
+
+	def __init__(self, concurrency: int, guildConcurrency: int, maxQueued: int):
+		self.guildConcurrency = guildConcurrency
+		self.maxQueued = maxQueued
+		self.queued = 0
+		self.active = 0
+		self._semaphore = asyncio.Semaphore(concurrency)
+		self._guildSemaphores: dict[int, asyncio.Semaphore] = {}
+
+	def full(self) -> bool:
+		"""If the queue cannot accept any more waiting uploads"""
+		return self.queued >= self.maxQueued
+
+	def reserve(self) -> bool:
+		"""Reserves a place in the queue for an upload, if the queue is not full.
+		The reservation must be used with slot, or given back with release."""
+		if self.full():
+			return False
+		self.queued += 1
+		return True
+
+	def release(self) -> None:
+		"""Gives back an unused reservation"""
+		self.queued -= 1
+
+	@contextlib.asynccontextmanager
+	async def slot(self, guildID: int) -> AsyncIterator[None]:
+		"""Waits for an upload slot for a guild using a reservation, and holds it until the context exits"""
+		guildSemaphore = self._guildSemaphores.setdefault(guildID, asyncio.Semaphore(self.guildConcurrency))
+		try:
+			# Wait on the guild's slot first, so that a busy guild does not hold up the global slots
+			await guildSemaphore.acquire()
+			try:
+				await self._semaphore.acquire()
+			except BaseException:
+				guildSemaphore.release()
+				raise
+		finally:
+			self.release()
+
+		self.active += 1
+		try:
+			yield
+		finally:
+			self.active -= 1
+			self._semaphore.release()
+			guildSemaphore.release()
+
+
+def _parse_propfind(body: str | bytes) -> list[str]:
+	"""Parses a WebDAV PROPFIND multistatus response into a list of mission file names.
+	Collections and files other than PBOs are ignored."""
+	fileNames: list[str] = []
+	root = ElementTree.fromstring(body)
+	for response in root.iter(f"{DAV_NAMESPACE}response"):
+		href = response.findtext(f"{DAV_NAMESPACE}href")
+		if href is None or response.find(f".//{DAV_NAMESPACE}collection") is not None:
+			continue
+		fileName = urllib.parse.unquote(urllib.parse.urlsplit(href).path.rstrip("/").rsplit("/", 1)[-1])
+		if fileName.casefold().endswith(".pbo"):
+			fileNames.append(fileName)
+	return fileNames
+
+
+def _mission_version(fileName: str) -> tuple[str, str, tuple[int, ...]] | None:
+	"""Splits a mission file name into its base name, map, and version.
+	Returns None if the file name does not contain a version."""
+	match = MISSION_VERSION_PATTERN.fullmatch(fileName)
+	if match is None:
+		return None
+	return match.group("base"), match.group("map"), tuple(int(v) for v in match.group("version").split("_"))
+
+
+class MissionCatalog:
+	"""Index of the mission files present on a guild's mission server"""
+
+	def __init__(self, fileNames: Iterable[str] = ()):
+		self.refreshed = discord.utils.utcnow()
+		# Casefolded file names, mapped to the file name on the server
+		self.files: dict[str, str] = {}
+		# Sorted casefolded file names, used for prefix searches
+		self._sorted: list[str] = []
+		# Versions present on the server, indexed by casefolded base name and map
+		self.versions: dict[tuple[str, str], list[tuple[int, ...]]] = {}
+		for fileName in fileNames:
+			self.add(fileName)
+
+	def __len__(self) -> int:
+		return len(self.files)
+
+	def __contains__(self, fileName: str) -> bool:
+		return fileName.casefold() in self.files
+
+	def add(self, fileName: str) -> None:
+		"""Adds a mission file to the catalog"""
+		key = fileName.casefold()
+		if key in self.files:
+			return
+		self.files[key] = fileName
+		bisect.insort(self._sorted, key)
+		version = _mission_version(key)
+		if version is not None:
+			bisect.insort(self.versions.setdefault((version[0], version[1]), []), version[2])
+
+	def search(self, current: str, limit: int = 25) -> list[str]:
+		"""Searches the catalog for mission files. Prefix matches are listed before other matches.
+
+		Parameters
+		----------
+		current : str
+			Search text
+		limit : int, optional
+			Maximum number of results, by default 25
+
+		Returns
+		-------
+		list[str]
+			Matching file names
+		"""
+		current = current.casefold()
+		results: list[str] = []
+		start = bisect.bisect_left(self._sorted, current)
+		for key in self._sorted[start:]:
+			if len(results) >= limit or not key.startswith(current):
+				break
+			results.append(key)
+		if len(results) < limit:
+			for key in self._sorted:
+				if current in key and not key.startswith(current):
+					results.append(key)
+					if len(results) >= limit:
+						break
+		return [self.files[key] for key in results]
+
+	def suggest_version(self, fileName: str) -> str | None:
+		"""Suggests a file name for the next version of a mission, based on the latest version on the server
+
+		Parameters
+		----------
+		fileName : str
+			Mission file name
+
+		Returns
+		-------
+		str | None
+			File name for the next version, or None if no versions of the mission are on the server
+		"""
+		version = _mission_version(fileName)
+		if version is None:
+			return None
+		base, mapName, _ = version
+		versions = self.versions.get((base.casefold(), mapName.casefold()))
+		if not versions:
+			return None
+		latest = versions[-1]
+		nextVersion = latest[:-1] + (latest[-1] + 1,)
+		return f"{base}_v{'_'.join(str(v) for v in nextVersion)}.{mapName}.pbo"
+
+
+def _read_asciiz(data: bytes | mmap.mmap, pos: int) -> tuple[bytes, int]:
+	"""Reads a null-terminated string from a buffer
+
+	Returns the string, and the position immediately after the terminator."""
+	end = data.find(b"\x00", pos)
+	if end < 0:
+		raise ValueError("Unterminated string in PBO header")
+	return data[pos:end], end + 1
+
+
+def _read_pbo_file(data: bytes | mmap.mmap, fileName: str) -> bytes | None:
+	"""Reads a single packed file from a PBO, and validates the PBO checksum.
+
+	Only the PBO header and the requested file are copied out of the buffer,
+	so the buffer can be a memory-mapped file of any size.
+	Returns None if the file is not present in the PBO. Raises an error if the PBO is invalid,
+	or if it contains compressed entries."""
+	pos = 0
+	entries: list[tuple[str, int]] = []
+	while True:
+		name, pos = _read_asciiz(data, pos)
+		mimeType, originalSize, _, _, dataSize = struct.unpack_from(PBO_HEADER_FORMAT, data, pos)
+		pos += PBO_HEADER_SIZE
+		if mimeType[::-1] == b"Vers":
+			# Header extension block, skip over the key/value pairs
+			key, pos = _read_asciiz(data, pos)
+			while key != b"":
+				value, pos = _read_asciiz(data, pos)
+				if value == b"":
+					raise ValueError("PBO header extension has no value")
+				key, pos = _read_asciiz(data, pos)
+		elif name == b"":
+			# Last header entry, file contents follow
+			break
+		elif mimeType[::-1] == b"Cprs" or originalSize not in (0, dataSize):
+			# Missions exported from the editor are never compressed
+			raise ValueError("Compressed PBO entries are not supported")
+		else:
+			entries.append((name.decode().casefold().replace("\\", "/"), dataSize))
+
+	# Validate the checksum in chunks to avoid copying the whole file
+	contentEnd = len(data) - PBO_CHECKSUM_SIZE
+	if contentEnd < pos + sum(e[1] for e in entries):
+		raise ValueError("PBO file is truncated")
+	fileHash = hashlib.sha1()
+	for i in range(0, contentEnd, MISSION_CHUNK_SIZE):
+		fileHash.update(data[i : min(i + MISSION_CHUNK_SIZE, contentEnd)])
+	if fileHash.digest() != data[-20:]:
+		raise ValueError("Invalid PBO checksum")
+
+	for name, dataSize in entries:
+		if name == fileName.casefold():
+			return data[pos : pos + dataSize]
+		pos += dataSize
+	return None
+
+
+def _validate_mission(data: bytes | mmap.mmap) -> MissionBriefingInfo:
+	"""Validates the contents of a mission file, and the briefingName in its description.ext.
+	Returns the information from the briefingName if successful, otherwise raises a MissionValidationError."""
+	try:
+		descriptionBytes = _read_pbo_file(data, "description.ext")
+	except Exception:
+		raise MissionValidationError(
+			"I encountered an error verifying the validity of your mission file."
+			"\nPlease ensure that you are submitting a mission in PBO format, exported from the Arma 3 editor."
+		)
+
+	# PBO file is good, scan the description.ext
+	try:
+		if descriptionBytes is None:
+			raise Exception
+		descriptionFile = descriptionBytes.decode()
+	except Exception:
+		raise MissionValidationError(
+			"I encountered an issue reading your mission's `description.ext` file."
+			"\nPlease ensure that your mission contains a description.ext file, with a filename in all-lowercase."
+		)
+
+	# Use a regex search to find the briefingName in the description.ext file
+	briefingMatch = re.search(r"(?<=^briefingName\s=\s[\"\'])[^\"\']*", descriptionFile, re.I | re.M)
+
+	if briefingMatch is None:
+		raise MissionValidationError(
+			"I could not determine the `briefingName` of your mission from its `description.ext` file."
+			"\nPlease ensure that your mission has a `briefingName` defined."
+		)
+
+	briefingName = briefingMatch.group()
+
+	# Now that we have the briefingName, we need to validate it.
+	# Correct naming structure: COOP 52+2 - Daybreak v1.8
+	# Start by setting up a regex match for the briefing name
+	briefingRe = re.compile(
+		r"^(?:test )?(?:(?P<gametype>[a-zA-Z]+) )?"
+		r"(?P<playercount>\d+)?(?:\+(?P<extracount>\d*))? ?(?:\- *)?(?P<name>.*?)"
+		r"(?: v?(?P<version>\d+(?:\.\d+)*?))?$",
+		re.MULTILINE + re.IGNORECASE,
+	)
+
+	# Scan the briefing name to extract information
+	briefingNameMatch = briefingRe.fullmatch(briefingName)
+
+	# If the briefingName did not follow the format specified by the regex
+	if briefingNameMatch is None:
+		raise MissionValidationError(
+			"The `briefingName` entry in your `description.ext` file does not appear to follow the mission naming guidelines."
+			+ BRIEFING_NAME_GUIDELINES,
+			ephemeral=True,
+		)
+
+	bGametype = briefingNameMatch.group("gametype")
+	bPlayerCount = briefingNameMatch.group("playercount")
+	bName = briefingNameMatch.group("name")
+	bVersion = briefingNameMatch.group("version")
+
+	# briefingName exists, check to make sure that we have detected a gametype, playercont, name, and version
+	for value, description in (
+		(bGametype, "gametype"),
+		(bPlayerCount, "player count"),
+		(bName, "name"),
+		(bVersion, "version"),
+	):
+		if value is None:
+			raise MissionValidationError(
+				f"Could not determine your mission's {description} from the `briefingName` entry in your `description.ext` file."
+				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`" + BRIEFING_NAME_GUIDELINES,
+				ephemeral=True,
+			)
+
+	if bGametype.casefold() not in VALID_GAMETYPES:
+		raise MissionValidationError(
+			f"The gametype `{bGametype}` found in the `briefingName` entry in your `description.ext` file is not a valid gametype."
+			f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`" + BRIEFING_NAME_GUIDELINES,
+			ephemeral=True,
+		)
+
+	return {
+		"briefingName": briefingName,
+		"gameType": bGametype.casefold(),
+		"playerCount": int(bPlayerCount),
+		"name": bName,
+		"version": bVersion,
+	}
+
+
+@contextlib.contextmanager
+def _map_file(file: IO[bytes]) -> Iterator[bytes | mmap.mmap]:
+	"""Provides read access to the contents of a file.
+	Files on disk are memory-mapped instead of read into memory."""
+	file.seek(0)
+	try:
+		fileno = file.fileno()
+	except io.UnsupportedOperation:
+		# File is held in memory
+		yield file.read()
+		return
+	if os.fstat(fileno).st_size == 0:
+		# Empty files cannot be memory-mapped
+		yield b""
+		return
+	with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+		yield mapped
+
+
+def _validate_file_name(fileName: str) -> MissionValidationReport:
+	"""Creates a validation report for a mission file, and validates the file name"""
+	report: MissionValidationReport = {
+		"fileName": fileName,
+		"fileNameInfo": None,
+		"briefing": None,
+		"errorStage": None,
+		"error": None,
+		"ephemeral": False,
+		"validationTime": 0.0,
+		"cached": False,
+	}
+	try:
+		report["fileNameInfo"] = _decode_file_name(fileName)
+	except Exception as exception:
+		report["errorStage"] = "filename"
+		report["error"] = str(exception.args[0])
+	return report
+
+
+def _validate_mission_file(fileName: str, source: bytes | str) -> MissionValidationReport:
+	"""Validates the file name and contents of a mission file.
+
+	Runs in a worker process. The contents are passed either as bytes, or as the
+	path to a file on disk so that large missions are not copied between processes."""
+	start = perf_counter()
+	report = _validate_file_name(fileName)
+	if report["errorStage"] is None:
+		try:
+			if isinstance(source, str):
+				with open(source, "rb") as file, _map_file(file) as buffer:
+					report["briefing"] = _validate_mission(buffer)
+			else:
+				report["briefing"] = _validate_mission(source)
+		except MissionValidationError as error:
+			report["errorStage"] = "contents"
+			report["error"] = error.message
+			report["ephemeral"] = error.ephemeral
+	report["validationTime"] = perf_counter() - start
+	return report
+
+
+class _LoopLagProbe:
+	"""Async context manager that samples event loop lag while active"""
+
+	def __init__(self, interval: float = LOOP_LAG_SAMPLE_INTERVAL):
+		self.interval = interval
+		self.maximum = 0.0
+		self.samples = 0
+		self._task: asyncio.Task | None = None
+
+	async def __aenter__(self):
+		self._task = asyncio.create_task(self._sample())
+		return self
+
+	async def __aexit__(self, *args):
+		assert self._task is not None
+		self._task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await self._task
+
+	async def _sample(self):
+		while True:
+			start = perf_counter()
+			await asyncio.sleep(self.interval)
+			lag = perf_counter() - start - self.interval
+			self.maximum = max(self.maximum, lag)
+			self.samples += 1
+
+
+async def _iter_file(file: IO[bytes], onChunk: Callable[[int], None] | None = None) -> AsyncIterator[bytes]:
+	"""Yields the contents of a file in chunks for a streaming upload.
+	Calls onChunk with the size of each chunk, if provided."""
+	while chunk := file.read(MISSION_CHUNK_SIZE):
+		if onChunk is not None:
+			onChunk(len(chunk))
+		yield chunk
+
+
 class Missions(commands.Cog, name="Missions"):
 	"""Commands and functions used to view and schedule missions"""
 
 	def __init__(self, bot, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.bot: blueonblue.BlueOnBlueBot = bot
+		# Created on first use. Importing the process pool machinery is slow, and most restarts never see an upload.
+		self.validationPool: concurrent.futures.ProcessPoolExecutor | None = None
+		self.catalogs: dict[int, MissionCatalog] = {}
+		self._catalogLocks: dict[int, asyncio.Lock] = {}
+		self.uploadQueue = UploadQueue(MISSION_UPLOAD_CONCURRENCY, MISSION_UPLOAD_GUILD_CONCURRENCY, MISSION_UPLOAD_MAX_QUEUED)
+		self.recentUploads: collections.deque[UploadJob] = collections.deque(maxlen=MISSION_UPLOAD_HISTORY)
+
+	async def cog_load(self):
+		self.catalog_refresh_loop.start()
+
+	async def cog_unload(self):
+		self.catalog_refresh_loop.cancel()
+		if self.validationPool is not None:
+			self.validationPool.shutdown(wait=False, cancel_futures=True)
+
+	async def _upload_target(self, guild: discord.Guild) -> tuple[str, aiohttp.BasicAuth] | None:
+		"""|coro|
+
+		Retrieves the mission upload URL and credentials for a guild
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+
+		Returns
+		-------
+		tuple[str, aiohttp.BasicAuth] | None
+			Upload URL ending in a slash, and authentication object. None if the guild has not configured mission uploads.
+		"""
+		uploadURL = await self.bot.serverConfig.mission_upload_url.get(guild)
+		uploadUsername = await self.bot.serverConfig.mission_upload_username.get(guild)
+		uploadPassword = await self.bot.serverConfig.mission_upload_password.get(guild)
+		if uploadURL is None or uploadUsername is None or uploadPassword is None:
+			return None
+
+		# Append a slash to the end of the upload URL if needed
+		if uploadURL[-1] != "/":
+			uploadURL += "/"
+
+		return uploadURL, aiohttp.BasicAuth(login=uploadUsername, password=uploadPassword)
+
+	async def refresh_catalog(self, guild: discord.Guild) -> MissionCatalog | None:
+		"""|coro|
+
+		Fetches the list of missions on a guild's mission server with a single WebDAV PROPFIND request.
+		Concurrent refreshes for the same guild share a single request.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+
+		Returns
+		-------
+		MissionCatalog | None
+			Refreshed catalog, or None if the catalog could not be retrieved
+		"""
+		lock = self._catalogLocks.setdefault(guild.id, asyncio.Lock())
+		if lock.locked():
+			# Another refresh is in progress, wait for its result
+			async with lock:
+				return self.catalogs.get(guild.id)
+
+		async with lock:
+			target = await self._upload_target(guild)
+			if target is None:
+				self.catalogs.pop(guild.id, None)
+				return None
+			uploadURL, authObj = target
+			try:
+				async with self.bot.httpSession.request(
+					"PROPFIND",
+					uploadURL,
+					auth=authObj,
+					data=PROPFIND_BODY,
+					headers={"Depth": "1", "Content-Type": "application/xml"},
+				) as response:
+					body = await response.read()
+				catalog = MissionCatalog(_parse_propfind(body))
+			except (aiohttp.ClientError, ElementTree.ParseError):
+				_log.warning(f"Unable to retrieve mission catalog for guild [{guild.name}|{guild.id}]", exc_info=True)
+				return None
+			self.catalogs[guild.id] = catalog
+			_log.debug(f"Loaded {len(catalog)} missions into the catalog for guild [{guild.name}|{guild.id}]")
+			return catalog
+
+	async def get_catalog(self, guild: discord.Guild) -> MissionCatalog | None:
+		"""|coro|
+
+		Retrieves the mission catalog for a guild, refreshing it if it is missing or out of date
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+
+		Returns
+		-------
+		MissionCatalog | None
+			Mission catalog, or None if the catalog could not be retrieved
+		"""
+		catalog = self.catalogs.get(guild.id)
+		if catalog is None or discord.utils.utcnow() - catalog.refreshed > timedelta(minutes=MISSION_CATALOG_REFRESH_MINUTES):
+			catalog = await self.refresh_catalog(guild)
+		return catalog
+
+	@tasks.loop(minutes=MISSION_CATALOG_REFRESH_MINUTES)
+	async def catalog_refresh_loop(self):
+		_log.debug("Refreshing mission catalogs")
+		for guild in self.bot.guilds:
+			if await self.bot.serverConfig.mission_upload_url.exists(guild.id):
+				await self.refresh_catalog(guild)
+
+	@catalog_refresh_loop.before_loop
+	async def before_catalog_refresh_loop(self):
+		await self.bot.wait_until_ready()
+
+	@commands.Cog.listener()
+	async def on_config_change(self, change: blueonblue.config.ServerConfigChange):
+		if change.setting in (SCONF_MISSION_UPLOAD_URL, SCONF_MISSION_UPLOAD_USERNAME, SCONF_MISSION_UPLOAD_PASSWORD):
+			# The catalog may belong to a different server now
+			self.catalogs.pop(change.guildID, None)
+
+	async def mission_autocomplete(self, interaction: discord.Interaction, current: str):
+		"""Autocomplete function that returns missions from the guild's mission catalog"""
+		if interaction.guild is None:
+			return []
+		# Autocomplete must respond quickly, only use the catalog that has already been loaded
+		catalog = self.catalogs.get(interaction.guild.id)
+		if catalog is None:
+			return []
+		return [app_commands.Choice(name=fileName, value=fileName) for fileName in catalog.search(current)]
 
 	@app_commands.command(name="upload_mission")
 	@app_commands.describe(missionfile="Mission file to upload")
@@ -105,7 +779,7 @@ class Missions(commands.Cog, name="Missions"):
 		# Immediately defer the response
 		await interaction.response.defer()
 
-		# Validate the mission name
+		# Validate the mission name before spending a queue slot and bandwidth on the mission
 		try:
 			_decode_file_name(missionfile.filename)
 		except Exception as exception:
@@ -117,152 +791,395 @@ class Missions(commands.Cog, name="Missions"):
 			)
 			return
 
-			# Start doing some validation on the contents of the mission file
-		try:
-			missionFileBytes = await missionfile.read()
-			# missionPBO = pboutil.PBOFile.from_bytes(missionFileBytes)
-			missionPBO = pbokit.PBO.from_bytes(missionFileBytes)
-		except Exception:
+		# Reserve a place in the queue right away, so that concurrent uploads cannot exceed the limit
+		if not self.uploadQueue.reserve():
 			await interaction.followup.send(
-				"I encountered an error verifying the validity of your mission file."
-				"\nPlease ensure that you are submitting a mission in PBO format, exported from the Arma 3 editor."
+				f"Too many missions are waiting to be uploaded. Please try uploading `{missionfile.filename}` again later."
 			)
 			return
 
-		# PBO file is good, scan the description.ext
+		job = UploadJob(interaction, missionfile)
 		try:
-			if missionPBO.has_file("description.ext"):
-				descriptionFile = missionPBO["description.ext"].as_str()
-			else:
-				raise Exception
-		except Exception:
-			await interaction.followup.send(
-				"I encountered an issue reading your mission's `description.ext` file."
-				"\nPlease ensure that your mission contains a description.ext file, with a filename in all-lowercase."
-			)
-			return
+			# Replace the deferred response with the progress message before anything else can respond
+			await interaction.edit_original_response(content=job.describe())
+		except BaseException:
+			self.uploadQueue.release()
+			raise
+		progressTask = asyncio.create_task(self._report_progress(job))
+		uploaded = False
+		try:
+			async with self.uploadQueue.slot(interaction.guild.id):
+				uploaded = await self._process_upload(job)
+		finally:
+			job.start_phase("done" if uploaded else "failed")
+			progressTask.cancel()
+			self.recentUploads.append(job)
+			timings = ", ".join(f"{phase}={duration:.2f}s" for phase, duration in job.timings.items())
+			_log.info(f"Processed mission upload [{job.fileName}] for guild [{interaction.guild.id}]: {timings}")
+			with contextlib.suppress(discord.HTTPException):
+				await interaction.edit_original_response(content=job.describe())
 
-		# Use a regex search to find the briefingName in the description.ext file
-		briefingMatch = re.search(r"(?<=^briefingName\s=\s[\"\'])[^\"\']*", descriptionFile, re.I | re.M)
+	async def _report_progress(self, job: UploadJob):
+		"""|coro|
 
-		if briefingMatch is None:
-			await interaction.followup.send(
-				"I could not determine the `briefingName` of your mission from its `description.ext` file."
-				"\nPlease ensure that your mission has a `briefingName` defined."
-			)
-			return
+		Periodically updates the progress message for an upload job until cancelled
 
-		briefingName = briefingMatch.group()
+		Parameters
+		----------
+		job : UploadJob
+			Upload job
+		"""
+		lastMessage = job.describe()
+		while True:
+			await asyncio.sleep(MISSION_PROGRESS_INTERVAL)
+			message = job.describe()
+			if message != lastMessage:
+				lastMessage = message
+				try:
+					await job.interaction.edit_original_response(content=message)
+				except discord.HTTPException:
+					_log.debug(f"Unable to update upload progress for mission [{job.fileName}]", exc_info=True)
 
-		# Now that we have the briefingName, we need to validate it.
-		# Correct naming structure: COOP 52+2 - Daybreak v1.8
-		# Start by setting up a regex match for the briefing name
-		briefingRe = re.compile(
-			r"^(?:test )?(?:(?P<gametype>[a-zA-Z]+) )?"
-			r"(?P<playercount>\d+)?(?:\+(?P<extracount>\d*))? ?(?:\- *)?(?P<name>.*?)"
-			r"(?: v?(?P<version>\d+(?:\.\d+)*?))?$",
-			re.MULTILINE + re.IGNORECASE,
-		)
+	async def _process_upload(self, job: UploadJob) -> bool:
+		"""|coro|
 
-		# Scan the briefing name to extract information
-		briefingNameMatch = briefingRe.fullmatch(briefingName)
+		Downloads, validates, and uploads a mission file.
+		Runs while the job holds an upload queue slot.
 
-		# If the briefingName did not follow the format specified by the regex
-		if briefingNameMatch is None:
-			await interaction.followup.send(
-				"The `briefingName` entry in your `description.ext` file does not appear to follow the mission naming guidelines."
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
-			)
-			return
+		Parameters
+		----------
+		job : UploadJob
+			Upload job
 
-		bGametype = briefingNameMatch.group("gametype")
-		bPlayerCount = briefingNameMatch.group("playercount")
-		bName = briefingNameMatch.group("name")
-		bVersion = briefingNameMatch.group("version")
+		Returns
+		-------
+		bool
+			If the mission was uploaded
+		"""
+		interaction = job.interaction
+		missionfile = job.attachment
 
-		# briefingName exists, check to make sure that we have detected a gametype, playercont, name, and version
-		if bGametype is None:
-			await interaction.followup.send(
-				"Could not determine your mission's gametype from the `briefingName` entry in your `description.ext` file."
-				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`"
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
-			)
-			return
+		# Small missions are kept in memory. Larger missions are written to disk so that
+		# the validation worker can map them without copying them between processes.
+		if missionfile.size > MISSION_SPOOL_MAX_SIZE:
+			missionData: IO[bytes] = tempfile.NamedTemporaryFile(suffix=".pbo", delete_on_close=False)
+		else:
+			missionData = io.BytesIO()
 
-		if bPlayerCount is None:
-			await interaction.followup.send(
-				"Could not determine your mission's player count from the `briefingName` entry in your `description.ext` file."
-				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`"
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
-			)
-			return
+		with missionData:
+			job.start_phase("download")
+			try:
+				contentHash = await self._download_attachment(missionfile, missionData)
+			except aiohttp.ClientError:
+				_log.warning(f"Unable to download mission file [{missionfile.filename}]", exc_info=True)
+				await interaction.followup.send(f"I was unable to download your mission file `{missionfile.filename}`.")
+				return False
 
-		if bName is None:
-			await interaction.followup.send(
-				"Could not determine your mission's name from the `briefingName` entry in your `description.ext` file."
-				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`"
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
+			job.start_phase("validate")
+			source = missionData.getvalue() if isinstance(missionData, io.BytesIO) else missionData.name
+			try:
+				report = await self._validate(missionfile.filename, source, contentHash)
+			except concurrent.futures.BrokenExecutor:
+				_log.exception(f"Mission validation worker failed for mission [{missionfile.filename}]")
+				await interaction.followup.send(
+					f"I encountered an unexpected error validating your mission file `{missionfile.filename}`."
+				)
+				return False
+
+			if report["error"] is not None:
+				await interaction.followup.send(report["error"], ephemeral=report["ephemeral"])
+				return False
+
+			job.start_phase("upload")
+			return await self._upload_mission(job, missionData, contentHash)
+
+	async def _validate(self, fileName: str, source: bytes | str, contentHash: str) -> MissionValidationReport:
+		"""|coro|
+
+		Validates a mission file, using the validation cache if the same content has been validated before.
+		Uncached files are validated in the validation process pool, and the event loop lag observed
+		while waiting is logged. Replaces the process pool if a worker has died.
+
+		Parameters
+		----------
+		fileName : str
+			File name of the mission
+		source : bytes | str
+			Mission file contents, or the path to the mission file on disk
+		contentHash : str
+			SHA-256 hash of the mission file contents
+
+		Returns
+		-------
+		MissionValidationReport
+			Validation report
+		"""
+		report = await self._get_cached_validation(fileName, contentHash)
+		if report is not None:
+			_log.debug(f"Using cached validation for mission [{fileName}|{contentHash}]")
+			return report
+
+		if self.validationPool is None:
+			import multiprocessing
+
+			# Forking a process that is running the database and logging threads can deadlock the worker.
+			# Start workers from a clean server process instead, or spawn them where that is not available.
+			startMethod = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+			self.validationPool = concurrent.futures.ProcessPoolExecutor(
+				max_workers=self.bot.config.mission_validation_workers,
+				mp_context=multiprocessing.get_context(startMethod),
 			)
-			return
+		loop = asyncio.get_running_loop()
+		try:
+			async with _LoopLagProbe() as probe:
+				report = await loop.run_in_executor(self.validationPool, _validate_mission_file, fileName, source)
+		except concurrent.futures.BrokenExecutor:
+			# Replace the pool on the next upload
+			self.validationPool = None
+			raise
+		_log.info(
+			f"Validated mission [{fileName}] in {report['validationTime'] * 1000:.1f} ms. "
+			f"Maximum event loop lag: {probe.maximum * 1000:.1f} ms over {probe.samples} samples"
+		)
+		if report["errorStage"] != "filename":
+			# The contents were validated, store the result for identical files
+			await self._store_validation(contentHash, report)
+		return report
 
-		if bVersion is None:
-			await interaction.followup.send(
-				"Could not determine your mission's version from the `briefingName` entry in your `description.ext` file."
-				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`"
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
+	async def _get_cached_validation(self, fileName: str, contentHash: str) -> MissionValidationReport | None:
+		"""|coro|
+
+		Builds a validation report from the validation cache, if the mission contents have been validated before.
+		The file name is always validated, since the same contents can be uploaded under a different name.
+
+		Parameters
+		----------
+		fileName : str
+			File name of the mission
+		contentHash : str
+			SHA-256 hash of the mission file contents
+
+		Returns
+		-------
+		MissionValidationReport | None
+			Validation report if the contents were found in the cache
+		"""
+		async with self.bot.pool.acquire() as conn:
+			row = await conn.fetchone(
+				"UPDATE mission_validation_cache SET last_used = :now WHERE sha256 = :sha256 RETURNING *",
+				{"now": round(datetime.now(UTC).timestamp()), "sha256": contentHash},
 			)
-			return
+			await conn.commit()
+		if row is None:
+			return None
 
-		if bGametype.casefold() not in VALID_GAMETYPES:
-			await interaction.followup.send(
-				f"The gametype `{bGametype}` found in the `briefingName` entry in your `description.ext` file is not a valid gametype."
-				f"\nDetected `briefingName` was: `{briefingNameMatch.group()}`"
-				"\nPlease ensure that your mission is named according to the mission naming guidelines. Example: `COOP 52+1 - Daybreak v1.8`.",
-				ephemeral=True,
+		report = _validate_file_name(fileName)
+		report["cached"] = True
+		if report["errorStage"] is None:
+			if row["error"] is not None:
+				report["errorStage"] = "contents"
+				report["error"] = row["error"]
+				report["ephemeral"] = bool(row["ephemeral"])
+			else:
+				report["briefing"] = {
+					"briefingName": row["briefing_name"],
+					"gameType": row["game_type"],
+					"playerCount": row["player_count"],
+					"name": row["name"],
+					"version": row["version"],
+				}
+		return report
+
+	async def _store_validation(self, contentHash: str, report: MissionValidationReport) -> None:
+		"""|coro|
+
+		Stores the contents validation result from a report in the validation cache,
+		evicting the least recently used entries if the cache is full.
+
+		Parameters
+		----------
+		contentHash : str
+			SHA-256 hash of the mission file contents
+		report : MissionValidationReport
+			Validation report
+		"""
+		briefing = report["briefing"]
+		async with self.bot.pool.acquire() as conn:
+			await conn.execute(
+				"INSERT OR REPLACE INTO mission_validation_cache \
+				(sha256, briefing_name, game_type, player_count, name, version, error, ephemeral, last_used) VALUES \
+				(:sha256, :briefing_name, :game_type, :player_count, :name, :version, :error, :ephemeral, :now)",
+				{
+					"sha256": contentHash,
+					"briefing_name": briefing["briefingName"] if briefing is not None else None,
+					"game_type": briefing["gameType"] if briefing is not None else None,
+					"player_count": briefing["playerCount"] if briefing is not None else None,
+					"name": briefing["name"] if briefing is not None else None,
+					"version": briefing["version"] if briefing is not None else None,
+					"error": report["error"],
+					"ephemeral": report["ephemeral"],
+					"now": round(datetime.now(UTC).timestamp()),
+				},
 			)
-			return
+			await conn.execute(
+				"DELETE FROM mission_validation_cache WHERE sha256 IN \
+				(SELECT sha256 FROM mission_validation_cache ORDER BY last_used DESC LIMIT -1 OFFSET :size)",
+				{"size": MISSION_VALIDATION_CACHE_SIZE},
+			)
+			await conn.commit()
 
-		# Mission is ready to upload
-		uploadURL = await self.bot.serverConfig.mission_upload_url.get(interaction.guild)
-		uploadUsername = await self.bot.serverConfig.mission_upload_username.get(interaction.guild)
-		uploadPassword = await self.bot.serverConfig.mission_upload_password.get(interaction.guild)
+	async def _download_attachment(self, attachment: discord.Attachment, file: IO[bytes]) -> str:
+		"""|coro|
 
-		assert uploadURL is not None
-		assert uploadUsername is not None
-		assert uploadPassword is not None
+		Streams a discord attachment into a file without holding the whole attachment in memory,
+		hashing the contents as they are received.
 
-		# Append a slash to the end of the upload URL if needed
-		if uploadURL[-1] != "/":
-			uploadURL += "/"
+		Parameters
+		----------
+		attachment : discord.Attachment
+			Attachment to download
+		file : IO[bytes]
+			File to write the attachment to
 
-		# Create basic authentication object
-		authObj = aiohttp.BasicAuth(login=uploadUsername, password=uploadPassword)
+		Returns
+		-------
+		str
+			SHA-256 hash of the attachment, as a hex string
+		"""
+		fileHash = hashlib.sha256()
+		async with self.bot.httpSession.get(attachment.url) as response:
+			async for chunk in response.content.iter_chunked(MISSION_CHUNK_SIZE):
+				fileHash.update(chunk)
+				file.write(chunk)
+		file.flush()
+		file.seek(0)
+		return fileHash.hexdigest()
 
-		async with self.bot.httpSession.head(
-			url=f"{uploadURL}{missionfile.filename}", auth=authObj, raise_for_status=False
-		) as response:
-			if response.status != 404:
-				await interaction.followup.send(
-					f"Unable to upload mission `{missionfile.filename}`. File already exists on server."
-				)
-				return
+	async def _upload_mission(self, job: UploadJob, missionData: IO[bytes], contentHash: str) -> bool:
+		"""|coro|
+
+		Uploads a validated mission file to the guild's mission upload server.
+		Rejects the upload if a mission with identical contents is already on the server.
+
+		Parameters
+		----------
+		job : UploadJob
+			Upload job for the mission
+		missionData : IO[bytes]
+			Mission file contents
+		contentHash : str
+			SHA-256 hash of the mission file contents
+
+		Returns
+		-------
+		bool
+			If the mission was uploaded
+		"""
+		interaction = job.interaction
+		fileName = job.fileName
+		assert interaction.guild is not None
+
+		# Mission is ready to upload
+		target = await self._upload_target(interaction.guild)
+		assert target is not None
+		uploadURL, authObj = target
+
+		catalog = await self.get_catalog(interaction.guild)
+		if await self._remote_file_exists(catalog, uploadURL, authObj, fileName):
+			message = f"Unable to upload mission `{fileName}`. File already exists on server."
+			suggestion = catalog.suggest_version(fileName) if catalog is not None else None
+			if suggestion is not None:
+				message += f"\nIf this is a new version of the mission, consider naming it `{suggestion}`."
+			await interaction.followup.send(message)
+			return False
+
+		# Check if the same contents have already been uploaded under a different name
+		async with self.bot.pool.acquire() as conn:
+			existing = await conn.fetchone(
+				"SELECT file_name FROM mission_uploads WHERE server_id = :server_id AND sha256 = :sha256",
+				{"server_id": interaction.guild.id, "sha256": contentHash},
+			)
+		if existing is not None and await self._remote_file_exists(catalog, uploadURL, authObj, existing["file_name"]):
+			await interaction.followup.send(
+				f"Unable to upload mission `{fileName}`. "
+				f"Its contents are identical to `{existing['file_name']}`, which is already on the server."
+			)
+			return False
 
+		# Stream the upload from the local copy
+		missionData.seek(0, os.SEEK_END)
+		fileSize = missionData.tell()
+		missionData.seek(0)
 		async with self.bot.httpSession.put(
-			url=f"{uploadURL}{missionfile.filename}", auth=authObj, raise_for_status=False, data=missionFileBytes
+			url=f"{uploadURL}{fileName}",
+			auth=authObj,
+			raise_for_status=False,
+			data=_iter_file(missionData, job.add_sent),
+			# Never overwrite a mission that was added since the catalog was refreshed
+			headers={"Content-Length": str(fileSize), "If-None-Match": "*"},
 		) as response:
-			if response.status == 201:
-				await interaction.followup.send(
-					f"Mission `{missionfile.filename}` uploaded successfully.", files=[await missionfile.to_file()]
-				)
-				return
+			if response.status == 412:
+				self.catalogs.pop(interaction.guild.id, None)
+				await interaction.followup.send(f"Unable to upload mission `{fileName}`. File already exists on server.")
+				return False
+			elif response.status == 201:
+				if catalog is not None:
+					catalog.add(fileName)
+				async with self.bot.pool.acquire() as conn:
+					await conn.execute(
+						"INSERT OR REPLACE INTO mission_uploads (server_id, sha256, file_name, upload_time) VALUES \
+						(:server_id, :sha256, :file_name, :now)",
+						{
+							"server_id": interaction.guild.id,
+							"sha256": contentHash,
+							"file_name": fileName,
+							"now": round(datetime.now(UTC).timestamp()),
+						},
+					)
+					await conn.commit()
+				# Reuse the local copy for the confirmation message.
+				# discord.File only accepts in-memory buffers, so temporary files are sent by path.
+				missionData.seek(0)
+				if isinstance(missionData, io.BytesIO):
+					attachment = discord.File(missionData, filename=fileName)
+				else:
+					attachment = discord.File(missionData.name, filename=fileName)
+				await interaction.followup.send(f"Mission `{fileName}` uploaded successfully.", files=[attachment])
+				return True
 			else:
-				await interaction.followup.send(f"Error `{response.status}` uploading mission `{missionfile.filename}`.")
-				return
+				await interaction.followup.send(f"Error `{response.status}` uploading mission `{fileName}`.")
+				return False
+
+	async def _remote_file_exists(
+		self, catalog: MissionCatalog | None, uploadURL: str, authObj: aiohttp.BasicAuth, fileName: str
+	) -> bool:
+		"""|coro|
+
+		Checks if a file exists on the mission server.
+		Uses the mission catalog if available, otherwise checks the server directly.
+
+		Parameters
+		----------
+		catalog : MissionCatalog | None
+			Mission catalog for the guild
+		uploadURL : str
+			Mission upload URL
+		authObj : aiohttp.BasicAuth
+			Authentication for the mission server
+		fileName : str
+			File name to check
+
+		Returns
+		-------
+		bool
+			If the file exists on the server
+		"""
+		if catalog is not None:
+			return fileName in catalog
+		async with self.bot.httpSession.head(
+			url=f"{uploadURL}{fileName}", auth=authObj, raise_for_status=False
+		) as response:
+			return response.status != 404
 
 	@app_commands.command(name="schedule")
 	@app_commands.describe(
@@ -271,6 +1188,7 @@ class Missions(commands.Cog, name="Missions"):
 		notes="Optional notes to display on the schedule",
 	)
 	@app_commands.guild_only()
+	@app_commands.autocomplete(missionname=mission_autocomplete)
 	@blueonblue.checks.has_configs(
 		SCONF_MISSION_DURATION,
 		SCONF_MISSION_TIME,
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import timedelta
 from typing import Literal
@@ -65,6 +66,30 @@ class Pings(commands.Cog, name="ping"):
 		"""Updates the bot's ping cache for a specific guild"""
 		self.pingCache[guildID] = await db.pings.server_pings(guildID)
 
+	async def _load_members(self, interaction: discord.Interaction) -> bool:
+		"""Loads the members of the interaction's guild, so that users who have left can be told apart.
+		Defers the interaction if the members have to be requested from Discord.
+		Returns False if the members could not be loaded, after informing the user."""
+		assert interaction.guild is not None
+		if interaction.guild.chunked:
+			return True
+		await interaction.response.defer()
+		try:
+			await self.bot.ensure_chunked(interaction.guild)
+		except asyncio.TimeoutError:
+			await interaction.followup.send(
+				"I was unable to load the members of this server. Please try again in a few minutes."
+			)
+			return False
+		return True
+
+	async def _respond(self, interaction: discord.Interaction, *args, **kwargs):
+		"""Sends a response to an interaction, or a followup if the interaction has been deferred"""
+		if interaction.response.is_done():
+			await interaction.followup.send(*args, **kwargs)
+		else:
+			await interaction.response.send_message(*args, **kwargs)
+
 	async def ping_autocomplete(self, interaction: discord.Interaction, current: str):
 		"""Function to handle autocompletion of pings present in a guild"""
 		if (interaction.guild is None) or (interaction.guild.id not in self.pingCache):
@@ -106,11 +131,8 @@ class Pings(commands.Cog, name="ping"):
 		"""
 		# Get the name for the ping
 		pingName = await db.pings.get_name(pingID)
-		pingUserNames = []
-		for user in await db.pings.get_user_ids_by_ping_id(pingID):
-			member = guild.get_member(user)
-			if member is not None:
-				pingUserNames.append(member.display_name)
+		pingUserIDs = await db.pings.get_user_ids_by_ping_id(pingID)
+		pingUserNames = [member.display_name for member in await self.bot.get_members(guild, pingUserIDs)]
 
 		# Get aliases for the ping
 		pingAliases = await db.pings.get_alias_names(pingID)
@@ -163,6 +185,10 @@ class Pings(commands.Cog, name="ping"):
 			return
 		tag = tag.casefold()  # String searching is case-sensitive
 
+		# Users who have left the guild are told apart using the member cache
+		if not await self._load_members(interaction):
+			return
+
 		# Begin our DB section
 		async with self.bot.db.connect() as db:
 			response = None
@@ -175,13 +201,8 @@ class Pings(commands.Cog, name="ping"):
 			else:
 				# Ping exists
 				pingUserIDs = await db.pings.get_user_ids_by_ping_id(ping_id)
-				pingMentions: list[str] = []
-				for userID in pingUserIDs:
-					# Try to get the member object from the user ID
-					member = interaction.guild.get_member(userID)
-					if member is not None:
-						# Member is present in the guild
-						pingMentions.append(member.mention)
+				# Users who have left the guild are skipped
+				pingMentions = [member.mention for member in await self.bot.get_members(interaction.guild, pingUserIDs)]
 
 				# Check to see if we have any valid members
 				if len(pingMentions) > 0:
@@ -200,7 +221,7 @@ class Pings(commands.Cog, name="ping"):
 			await db.commit()  # Write data to the database
 
 			# Send a response to the user.
-			await interaction.response.send_message(response)
+			await self._respond(interaction, response)
 
 	@pingGroup.command(name="me")
 	@app_commands.describe(tag="Name of ping")
@@ -375,6 +396,10 @@ class Pings(commands.Cog, name="ping"):
 
 		tag = tag.casefold()  # String searching is case-sensitive
 
+		# Users who have left the guild are told apart using the member cache
+		if not await self._load_members(interaction):
+			return
+
 		# Begin our DB section
 		async with self.bot.db.connect() as db:
 			response = None
@@ -394,11 +419,9 @@ class Pings(commands.Cog, name="ping"):
 					pingID = pingInfo.id
 				# Retrieve a list of users subscribed to the referenced ping
 				pingUserData = await db.pings.get_user_ids_by_ping_id(pingID)
-				pingUserNames = []
-				for p in pingUserData:
-					member = interaction.guild.get_member(p)
-					if member is not None:  # If we could find the user
-						pingUserNames.append(member.display_name)
+				pingUserNames = [
+					member.display_name for member in await self.bot.get_members(interaction.guild, pingUserData)
+				]
 
 				# Check if we have any aliases
 				pingAliasNames = await db.pings.get_alias_names(pingID)
@@ -440,9 +463,9 @@ class Pings(commands.Cog, name="ping"):
 
 			# Send our response
 			if pingEmbed is not None:
-				await interaction.response.send_message(response, embed=pingEmbed)
+				await self._respond(interaction, response, embed=pingEmbed)
 			else:
-				await interaction.response.send_message(response)
+				await self._respond(interaction, response)
 
 	@pingAdmin.command(name="alias")
 	@app_commands.describe(
@@ -547,6 +570,10 @@ class Pings(commands.Cog, name="ping"):
 		"""Merges two pings"""
 		assert interaction.guild is not None
 
+		# Users who have left the guild are told apart using the member cache
+		if not await self._load_members(interaction):
+			return
+
 		# Begin our DB section
 		async with self.bot.db.connect() as db:
 			# Get the names of the pings for our two pings
@@ -565,14 +592,16 @@ class Pings(commands.Cog, name="ping"):
 			# Make sure these pings exist
 			if fromName is None or fromID is None:
 				# "From" ping not found
-				await interaction.response.send_message(
+				await self._respond(
+					interaction,
 					f"The ping `{merge_from}` does not exist. Please specify a valid ping to be merged.",
 					ephemeral=True,
 				)
 				return
 			if toName is None or toID is None:
 				# "To" ping not found
-				await interaction.response.send_message(
+				await self._respond(
+					interaction,
 					f"The ping `{merge_to}` does not exist. Please specify a valid ping to merge to.",
 					ephemeral=True,
 				)
@@ -589,7 +618,8 @@ class Pings(commands.Cog, name="ping"):
 					db, toID, interaction.guild, title_prefix="Merge to"
 				),
 			]
-			await interaction.response.send_message(
+			await self._respond(
+				interaction,
 				messageText, view=view, embeds=pingEmbeds
 			)
 			view.message = await interaction.original_response()
@@ -650,6 +680,10 @@ class Pings(commands.Cog, name="ping"):
 		"""Forcibly deletes a ping"""
 		assert interaction.guild is not None
 
+		# Users who have left the guild are told apart using the member cache
+		if not await self._load_members(interaction):
+			return
+
 		# We need to search for the ping
 		# Begin our DB section
 		async with self.bot.db.connect() as db:
@@ -657,14 +691,16 @@ class Pings(commands.Cog, name="ping"):
 			pingID = await db.pings.get_id(tag, interaction.guild.id)
 			# Make sure we actually have a ping
 			if pingID is None:
-				await interaction.response.send_message(
+				await self._respond(
+					interaction,
 					f"I could not find a ping for the tag: `{tag}`", ephemeral=True
 				)
 				return
 			# Get the name of our main ping (in case our given tag was an alias)
 			pingName = await db.pings.get_name(pingID)
 			if pingName is None:
-				await interaction.response.send_message(
+				await self._respond(
+					interaction,
 					f"I could not find a ping for the tag: `{tag}`", ephemeral=True
 				)
 				return
@@ -676,7 +712,7 @@ class Pings(commands.Cog, name="ping"):
 			view = blueonblue.views.ConfirmViewDanger(
 				interaction.user, confirm="Delete"
 			)
-			await interaction.response.send_message(msg, embed=pingEmbed, view=view)
+			await self._respond(interaction, msg, embed=pingEmbed, view=view)
 			view.message = await interaction.original_response()
 			await view.wait()
 
@@ -714,6 +750,10 @@ class Pings(commands.Cog, name="ping"):
 		"""Purges pings that are inactive, and below a specified user count."""
 		assert interaction.guild is not None
 
+		# Users who have left the guild are told apart using the member cache
+		if not await self._load_members(interaction):
+			return
+
 		# Start our DB block
 		async with self.bot.db.connect() as db:
 			# Start getting a list of all pings that are old enough to be up for deletion
@@ -744,7 +784,7 @@ class Pings(commands.Cog, name="ping"):
 				view = blueonblue.views.ConfirmViewDanger(
 					interaction.user, confirm="Purge"
 				)
-				await interaction.response.send_message(msg, embed=pingEmbed, view=view)
+				await self._respond(interaction, msg, embed=pingEmbed, view=view)
 				view.message = await interaction.original_response()
 				await view.wait()
 
@@ -770,7 +810,8 @@ class Pings(commands.Cog, name="ping"):
 
 			else:
 				# Did not find any pings matching search criteria
-				await interaction.response.send_message(
+				await self._respond(
+					interaction,
 					f"{interaction.user.mention}, there were no pings found with fewer than `{user_threshold}` users that were last used more than `{days_since_last_use}` days ago."
 				)
 
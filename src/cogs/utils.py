@@ -3,7 +3,6 @@ from datetime import datetime, timedelta, timezone
 
 import blueonblue
 import discord
-import parsedatetime
 from discord import app_commands
 from discord.ext import commands
 
@@ -36,6 +35,9 @@ class Utils(commands.GroupCog, group_name="utils"):
 		"""
 
 		# Set up parsedatetime
+		# Imported on first use, since it is slow to import and only needed by this command
+		import parsedatetime
+
 		cal = parsedatetime.Calendar()
 		parsedDate = cal.parse(time)[0]
 
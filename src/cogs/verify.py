@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import xml.etree.ElementTree as ElementTree
 
 import aiohttp
 import blueonblue
@@ -6,10 +8,15 @@ import discord
 from blueonblue.defines import VERIFY_EMBED_COLOUR
 from blueonblue.lib import steam
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 _log = logging.getLogger(__name__)
 
+# Maximum number of member mentions included in a sweep report
+SWEEP_REPORT_MAX_MEMBERS = 50
+
+STEAM_UNAVAILABLE_TEXT = "Steam appears to be having some issues at the moment. Please try again in a few minutes."
+
 
 # Discord views
 class VerifySteamView(blueonblue.views.AuthorResponseViewBase):
@@ -71,6 +78,9 @@ class VerifyButton(discord.ui.Button):
 		# Check the steam profile to see if it has the token set
 		try:
 			verified = await steam.check_guild_token(self.view.bot, self.view.steamID, str(interaction.user.id))
+		except steam.SteamUnavailable:
+			await interaction.followup.send(STEAM_UNAVAILABLE_TEXT)
+			return
 		except aiohttp.ClientResponseError as error:
 			_log.warning(f"Received response code [{error.status}] from the Steam API when checking steam URL")
 			await interaction.followup.send(steam_return_error_text(error.status))
@@ -122,6 +132,9 @@ class VerifyButton(discord.ui.Button):
 						msg += f" You're free to apply at {applyUrl}."
 					await interaction.followup.send(msg, ephemeral=True)
 					return
+			except steam.SteamUnavailable:
+				await interaction.followup.send(STEAM_UNAVAILABLE_TEXT)
+				return
 			except aiohttp.ClientResponseError as error:
 				_log.warning(f"Received response code [{error.status}] from the Steam API when checking steam URL")
 				await interaction.followup.send(steam_return_error_text(error.status))
@@ -194,6 +207,9 @@ class CheckInButton(discord.ui.Button):
 					msg += f" You're free to apply at {applyUrl}."
 				await interaction.followup.send(msg, ephemeral=True)
 				return
+		except steam.SteamUnavailable:
+			await interaction.followup.send(STEAM_UNAVAILABLE_TEXT)
+			return
 		except aiohttp.ClientResponseError as error:
 			_log.warning(f"Received response code [{error.status}] from the Steam API when checking steam URL")
 			await interaction.followup.send(steam_return_error_text(error.status))
@@ -323,6 +339,176 @@ class Verify(commands.GroupCog, group_name="verify"):
 		super().__init__(*args, **kwargs)
 		self.bot: blueonblue.BlueOnBlueBot = bot
 
+	async def cog_load(self):
+		self.group_sweep_loop.start()
+
+	async def cog_unload(self):
+		self.group_sweep_loop.cancel()
+
+	async def _collect_group_members(self, guild: discord.Guild, groupID: int) -> set[int]:
+		"""|coro|
+
+		Collects the full member list of a guild's Steam group.
+
+		Progress is checkpointed in the database after every page, so an interrupted
+		collection resumes from the last completed page.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+		groupID : int
+			Short Steam group ID for the guild
+
+		Returns
+		-------
+		set[int]
+			Steam64IDs of all group members
+
+		Raises
+		------
+		xml.etree.ElementTree.ParseError
+			Raised if Steam did not return the member list of the group
+		"""
+		async with self.bot.pool.acquire() as conn:
+			checkpoint = await conn.fetchone(
+				"SELECT group_id, next_page, total_pages FROM verify_sweeps WHERE server_id = :server_id",
+				{"server_id": guild.id},
+			)
+			if checkpoint is None or checkpoint["group_id"] != groupID:
+				# No sweep in progress for this group, start a new one
+				await conn.execute("DELETE FROM verify_sweep_members WHERE server_id = :server_id", {"server_id": guild.id})
+				await conn.execute(
+					"INSERT OR REPLACE INTO verify_sweeps (server_id, group_id, next_page, total_pages) VALUES \
+					(:server_id, :group_id, 1, NULL)",
+					{"server_id": guild.id, "group_id": groupID},
+				)
+				await conn.commit()
+				page, totalPages = 1, None
+			else:
+				page, totalPages = checkpoint["next_page"], checkpoint["total_pages"]
+				_log.info(f"Resuming Steam group sweep for guild [{guild.name}|{guild.id}] at page {page}")
+
+		memberCount: int | None = None
+		while totalPages is None or page <= totalPages:
+			result = await self.bot.steam.get_group_members_page(groupID, page)
+			totalPages = result.totalPages
+			memberCount = result.memberCount
+			page += 1
+			async with self.bot.pool.acquire() as conn:
+				await conn.executemany(
+					"INSERT OR IGNORE INTO verify_sweep_members (server_id, steam64_id) VALUES (:server_id, :steam_id)",
+					[{"server_id": guild.id, "steam_id": m} for m in result.members],
+				)
+				await conn.execute(
+					"UPDATE verify_sweeps SET next_page = :next_page, total_pages = :total_pages WHERE server_id = :server_id",
+					{"server_id": guild.id, "next_page": page, "total_pages": totalPages},
+				)
+				await conn.commit()
+
+		async with self.bot.pool.acquire() as conn:
+			rows = await conn.fetchall(
+				"SELECT steam64_id FROM verify_sweep_members WHERE server_id = :server_id", {"server_id": guild.id}
+			)
+			if len(rows) == 0 and memberCount != 0:
+				# Steam reported members, but none were listed. Start over on the next sweep
+				# instead of reporting every verified member as having left the group.
+				await conn.execute("DELETE FROM verify_sweeps WHERE server_id = :server_id", {"server_id": guild.id})
+				await conn.commit()
+				raise ElementTree.ParseError(f"No members were listed for Steam group {groupID}")
+		return {r["steam64_id"] for r in rows}
+
+	async def sweep_guild(self, guild: discord.Guild) -> None:
+		"""|coro|
+
+		Compares members holding the verified role against the guild's Steam group,
+		and reports members who have left the group or have no linked Steam account.
+
+		Parameters
+		----------
+		guild : discord.Guild
+			Discord guild
+		"""
+		groupID = await self.bot.serverConfig.steam_group_id.get(guild)
+		memberRole = await self.bot.serverConfig.role_verify.get(guild)
+		modChannel = await self.bot.serverConfig.channel_mod_activity.get(guild)
+		if groupID is None or memberRole is None or modChannel is None:
+			return
+
+		_log.info(f"Starting Steam group sweep for guild: [{guild.name}|{guild.id}]")
+		groupMembers = await self._collect_group_members(guild, groupID)
+		# Role members are read from the member cache.
+		# This must succeed before the checkpoint is cleared.
+		await self.bot.ensure_chunked(guild)
+
+		async with self.bot.pool.acquire() as conn:
+			rows = await conn.fetchall("SELECT discord_id, steam64_id FROM verify WHERE steam64_id NOT NULL")
+			# Sweep is complete, clear the checkpoint
+			await conn.execute("DELETE FROM verify_sweep_members WHERE server_id = :server_id", {"server_id": guild.id})
+			await conn.execute("DELETE FROM verify_sweeps WHERE server_id = :server_id", {"server_id": guild.id})
+			await conn.commit()
+		linked: dict[int, int] = {r["discord_id"]: r["steam64_id"] for r in rows}
+
+		notInGroup: list[discord.Member] = []
+		notLinked: list[discord.Member] = []
+		for member in memberRole.members:
+			if member.bot:
+				continue
+			if member.id not in linked:
+				notLinked.append(member)
+			elif linked[member.id] not in groupMembers:
+				notInGroup.append(member)
+
+		_log.info(
+			f"Finished Steam group sweep for guild [{guild.name}|{guild.id}]. "
+			f"{len(notInGroup)} not in group, {len(notLinked)} not linked."
+		)
+		if len(notInGroup) == 0 and len(notLinked) == 0:
+			return
+
+		# Include the Steam names of members who left the group, so that they can be found in the group's history.
+		# The names are looked up in a single batched request.
+		steamNames: dict[str, str] = {}
+		try:
+			summaries = await self.bot.steam.get_player_summaries(
+				[str(linked[m.id]) for m in notInGroup[:SWEEP_REPORT_MAX_MEMBERS]]
+			)
+			steamNames = {steamID: summary["personaname"] for steamID, summary in summaries.items()}
+		except (steam.SteamUnavailable, aiohttp.ClientError, asyncio.TimeoutError):
+			_log.warning(f"Unable to retrieve Steam names for sweep report in guild [{guild.name}|{guild.id}]", exc_info=True)
+
+		def describe(member: discord.Member) -> str:
+			steamName = steamNames.get(str(linked.get(member.id)))
+			return f"{member.mention} ({discord.utils.escape_markdown(steamName)})" if steamName else member.mention
+
+		for title, members in (
+			("are no longer in the Steam group", notInGroup),
+			("do not have a linked Steam account", notLinked),
+		):
+			if len(members) == 0:
+				continue
+			mentions = ", ".join(describe(m) for m in members[:SWEEP_REPORT_MAX_MEMBERS])
+			if len(members) > SWEEP_REPORT_MAX_MEMBERS:
+				mentions += f" and {len(members) - SWEEP_REPORT_MAX_MEMBERS} more"
+			await modChannel.send(
+				f"The following {len(members)} members with the {memberRole.mention} role {title}: {mentions}",
+				allowed_mentions=discord.AllowedMentions.none(),
+			)
+
+	@tasks.loop(hours=24)
+	async def group_sweep_loop(self):
+		"""Loop to periodically check that verified members are still part of their guild's Steam group."""
+		for guild in self.bot.guilds:
+			try:
+				await self.sweep_guild(guild)
+			except (steam.SteamUnavailable, aiohttp.ClientError, ElementTree.ParseError, asyncio.TimeoutError):
+				# Leave the checkpoint in place so that the next sweep resumes where this one stopped
+				_log.warning(f"Unable to complete Steam group sweep for guild [{guild.name}|{guild.id}]", exc_info=True)
+
+	@group_sweep_loop.before_loop
+	async def before_group_sweep_loop(self):
+		await self.bot.wait_until_ready()  # Wait until the bot is ready
+
 	@app_commands.command(name="steam")
 	async def verify_steam(self, interaction: discord.Interaction, steam_url: str):
 		"""Establishes a link between a Discord account and a Steam account
@@ -340,6 +526,9 @@ class Verify(commands.GroupCog, group_name="verify"):
 		# Get the user's SteamID64
 		try:
 			steamID = await steam.getID64(self.bot, steam_url)
+		except steam.SteamUnavailable:
+			await interaction.followup.send(STEAM_UNAVAILABLE_TEXT)
+			return
 		except aiohttp.ClientResponseError as error:
 			if error.status not in [400, 403]:
 				_log.warning(f"Received response code [{error.status}] from the Steam API when checking steam URL")
@@ -367,6 +556,9 @@ class Verify(commands.GroupCog, group_name="verify"):
 						msg += f" You're free to apply at {applyUrl}."
 					await interaction.followup.send(msg)
 					return
+			except steam.SteamUnavailable:
+				await interaction.followup.send(STEAM_UNAVAILABLE_TEXT)
+				return
 			except aiohttp.ClientResponseError as error:
 				_log.warning(f"Received response code [{error.status}] from the Steam API when checking steam URL")
 				await interaction.followup.send(steam_return_error_text(error.status))
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+import blueonblue.cache
+
+
+def test_cache_lru_eviction():
+	cache = blueonblue.cache.TTLCache(2, 60)
+	cache.set("a", 1)
+	cache.set("b", 2)
+	cache.get("a")
+	cache.set("c", 3)
+	assert cache.get("a") == 1
+	assert cache.get("b") is None
+	assert cache.get("c") == 3
+
+
+def test_cache_expiry():
+	cache = blueonblue.cache.TTLCache(2, -1)
+	cache.set("a", 1)
+	assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_coalesce():
+	cache = blueonblue.cache.TTLCache(10, 60)
+	calls = 0
+
+	async def loader():
+		nonlocal calls
+		calls += 1
+		await asyncio.sleep(0.01)
+		return "value"
+
+	results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+	assert results == ["value"] * 5
+	assert calls == 1
+	assert cache.stats.misses == 1
+	assert cache.stats.coalesced == 4
+	assert (await cache.get_or_load("key", loader)) == "value"
+	assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_owner_cancelled():
+	cache = blueonblue.cache.TTLCache(10, 60)
+	started = asyncio.Event()
+
+	async def loader():
+		started.set()
+		await asyncio.sleep(0.01)
+		return "value"
+
+	owner = asyncio.create_task(cache.get_or_load("key", loader))
+	await started.wait()
+	waiter = asyncio.create_task(cache.get_or_load("key", loader))
+	await asyncio.sleep(0)
+	owner.cancel()
+	# Cancelling the caller that started the load does not cancel it for the other callers
+	assert await waiter == "value"
+	assert owner.cancelled()
+	assert cache.get("key") == "value"
+	assert "key" not in cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_cache_loader_error():
+	cache = blueonblue.cache.TTLCache(10, 60)
+
+	async def loader():
+		await asyncio.sleep(0.01)
+		raise ValueError("broken")
+
+	results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(2)), return_exceptions=True)
+	assert all(isinstance(r, ValueError) for r in results)
+	assert "key" not in cache._inflight
+	assert cache.get("key") is None
@@ -0,0 +1,89 @@
+import types
+
+import pytest
+
+import blueonblue.config
+
+
+@pytest.fixture
+def serverConfig() -> blueonblue.config.ServerConfig:
+	return blueonblue.config.ServerConfig(types.SimpleNamespace())  # type: ignore
+
+
+def test_snapshot_fields(serverConfig: blueonblue.config.ServerConfig):
+	# Every option must have a matching snapshot field
+	for option in serverConfig.options.values():
+		assert option.name in blueonblue.config.ServerConfigSnapshot.FIELDS
+
+
+def test_load_rows(serverConfig: blueonblue.config.ServerConfig):
+	rows = [
+		{"server_id": 1, "setting": "role_gold", "value": "1234"},
+		{"server_id": 1, "setting": "raffle_weight_max", "value": "5.5"},
+		{"server_id": 1, "setting": "mission_duration", "value": "abc"},
+		{"server_id": 2, "setting": "unknown_setting", "value": "value"},
+	]
+	snapshots = serverConfig._loadRows(rows)
+	assert snapshots[1].role_gold == 1234
+	assert snapshots[1].raffle_weight_max == 5.5
+	assert snapshots[1].mission_duration is None
+	assert snapshots[1].arma_stats_url is None
+	assert 2 in snapshots
+
+
+@pytest.mark.asyncio
+async def test_known_absent(serverConfig: blueonblue.config.ServerConfig):
+	serverConfig._tableLoaded = True
+	guild = types.SimpleNamespace(id=5)
+	serverConfig.bot.get_guild = lambda id: guild  # type: ignore
+	serverConfig.bot.serverConfig = serverConfig  # type: ignore
+	# Unconfigured guilds are served without any database reads
+	assert (await serverConfig.arma_stats_url._getCached(5)) is None
+	assert (await serverConfig.raffleweight_max._getCached(5)) == 3.0
+	assert serverConfig.dbReads == 0
+	assert serverConfig.dbReadsAvoided == 2
+
+
+@pytest.mark.asyncio
+async def test_change_event(serverConfig: blueonblue.config.ServerConfig):
+	events = []
+	serverConfig._tableLoaded = True
+	serverConfig.bot.serverConfig = serverConfig  # type: ignore
+	serverConfig.bot.dispatch = lambda name, event: events.append((name, event))  # type: ignore
+	snapshot = await serverConfig.snapshot(5)
+	serverConfig.arma_stats_min_players._publish(5, snapshot, 12)
+	serverConfig.arma_stats_min_players._publish(5, snapshot, None)
+	assert events[0] == ("config_change", blueonblue.config.ServerConfigChange(5, "arma_stats_min_players", 12, 1))
+	assert events[1][1].version == 2
+	assert serverConfig.version(5) == 2
+
+
+@pytest.mark.asyncio
+async def test_readiness(serverConfig: blueonblue.config.ServerConfig):
+	serverConfig._tableLoaded = True
+	guild = types.SimpleNamespace(id=5, get_role=lambda id: None, get_channel=lambda id: None)
+	serverConfig.bot.get_guild = lambda id: guild  # type: ignore
+	serverConfig.bot.serverConfig = serverConfig  # type: ignore
+	serverConfig.bot.dispatch = lambda name, event: None  # type: ignore
+	mask = blueonblue.config.config_mask("mission_time", "mission_duration")
+	assert (await serverConfig.readiness(guild)) & mask == 0  # type: ignore
+	snapshot = await serverConfig.snapshot(5)
+	snapshot.mission_time = "19:00"
+	serverConfig.mission_time._publish(5, snapshot, "19:00")
+	snapshot.mission_duration = 3
+	serverConfig.mission_duration._publish(5, snapshot, 3)
+	assert (await serverConfig.readiness(guild)) & mask == mask  # type: ignore
+	serverConfig.mission_time._publish(5, snapshot, None)
+	assert (await serverConfig.readiness(guild)) & mask != mask  # type: ignore
+
+
+def test_memory_profile(monkeypatch: pytest.MonkeyPatch):
+	monkeypatch.setenv("MEMORY_PROFILE", "Minimal")
+	profile = blueonblue.config.BotConfig().memory_profile
+	assert profile.name == "minimal"
+	assert profile.maxMessages is None
+	assert not profile.chunkAtStartup
+	assert not profile.member_cache_flags().voice
+	monkeypatch.setenv("MEMORY_PROFILE", "huge")
+	with pytest.raises(ValueError):
+		blueonblue.config.BotConfig()
@@ -0,0 +1,14 @@
+import cogs.gold
+
+
+def test_chunk_single():
+	assert cogs.gold._chunk_lines(["Line 1", "Line 2"]) == ["Line 1\nLine 2"]
+
+
+def test_chunk_empty():
+	assert cogs.gold._chunk_lines([]) == []
+
+
+def test_chunk_split():
+	lines = ["a" * 10, "b" * 10, "c" * 10]
+	assert cogs.gold._chunk_lines(lines, limit=21) == ["a" * 10 + "\n" + "b" * 10, "c" * 10]
@@ -0,0 +1,33 @@
+import pytest
+
+import blueonblue.harness
+
+
+@pytest.mark.asyncio
+async def test_ping_scenario():
+	results, report = await blueonblue.harness.run_scenario("ping", members=20, pings=5, rate=0)
+	assert len(results) == 1
+	assert results[0].timeouts == 0
+	assert len(results[0].latencies) == 5
+	assert results[0].routes == {"POST /interactions/{id}/{token}/callback": 5}
+	assert "/ping: runs=5 failures=0" in report
+
+
+@pytest.mark.asyncio
+async def test_recorded_response():
+	async with blueonblue.harness.Harness(extensions=("pings",), members=3) as harness:
+		async with harness.bot.db.connect() as db:
+			await db.pings.create("test", blueonblue.harness.GUILD_ID)
+			for i in range(3):
+				await db.pings.add_user("test", blueonblue.harness.GUILD_ID, blueonblue.harness.MEMBER_ID_BASE + i)
+			await db.commit()
+			await harness.bot.get_cog("ping")._update_ping_cache(db, blueonblue.harness.GUILD_ID)  # type: ignore
+		payload = harness.command_payload("ping", {"tag": "test"}, member=1)
+		response = await harness.dispatch(payload)
+		content = response["data"]["content"]
+		assert content.startswith(f"<@{blueonblue.harness.MEMBER_ID_BASE + 1}> has pinged `test`")
+		assert content.count("<@") == 4
+		assert harness.original_message(payload)["content"] == content
+
+		autocomplete = await harness.dispatch(harness.command_payload("ping", {"tag": "te"}, focused="tag"))
+		assert autocomplete == {"type": 8, "data": {"choices": [{"name": "test", "value": "test"}]}}
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+# Modules that should only be imported when the command that needs them first runs
+DEFERRED_MODULES = ["parsedatetime", "concurrent.futures.process", "multiprocessing", "aiohttp.web"]
+
+
+def test_deferred_imports():
+	code = (
+		"import sys, blueonblue.bot, cogs.missions, cogs.utils, blueonblue.lib.steam; "
+		f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+	)
+	# Run in a fresh interpreter with the same import path as the test session
+	env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+	result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+	assert result.stdout.strip() == "[]"
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+import blueonblue.instrumentation
+import blueonblue.metrics
+from blueonblue.instrumentation import CommandInstrumentation, mark_response, record_phase
+
+
+@pytest.mark.asyncio
+async def test_phases_are_isolated_per_task():
+	instrumentation = CommandInstrumentation()
+
+	async def command(name: str, dbTime: float):
+		timing = instrumentation.begin(name, "app")
+		await asyncio.sleep(0)
+		record_phase("db", dbTime)
+		mark_response()
+		record_phase("discord", 0.5)
+		instrumentation.finish(timing)
+		return timing
+
+	first, second = await asyncio.gather(command("first", 1.0), command("second", 2.0))
+	assert first.phases == {"db": 1.0, "http": 0.0, "discord": 0.5}
+	assert second.phases == {"db": 2.0, "http": 0.0, "discord": 0.5}
+	assert first.firstResponse is not None and first.total is not None
+	assert first.firstResponse <= first.total
+
+
+def test_record_phase_outside_command():
+	# Nothing is being timed in this context, so this must not fail
+	record_phase("db", 1.0)
+	mark_response()
+
+
+def test_finish_is_idempotent():
+	finished = []
+	instrumentation = CommandInstrumentation(onFinish=lambda timing, status: finished.append(status))
+	timing = instrumentation.begin("ping", "app")
+	instrumentation.finish(timing, "error")
+	instrumentation.finish(timing, "ok")
+	record_phase("db", 1.0)
+	assert finished == ["error"]
+	assert instrumentation.commands["ping"].count == 1
+	assert instrumentation.commands["ping"].failures == 1
+	assert timing.phases["db"] == 0.0
+
+
+def test_slowest():
+	instrumentation = CommandInstrumentation(history=3)
+	for name, total in (("fast", 0.1), ("slow", 2.0), ("medium", 0.5), ("fast", 0.2)):
+		timing = instrumentation.begin(name, "app")
+		instrumentation.finish(timing)
+		timing.total = total
+	assert [name for name, _ in instrumentation.slowest()] == ["slow", "medium", "fast"]
+	assert [name for name, _ in instrumentation.slowest(1)] == ["slow"]
+	assert instrumentation.commands["fast"].total_percentile(100) == 0.2
+
+
+def test_is_response():
+	assert blueonblue.metrics._is_response("POST", "/api/v10/interactions/1/token/callback")
+	assert blueonblue.metrics._is_response("POST", "/api/v10/channels/1/messages")
+	assert not blueonblue.metrics._is_response("GET", "/api/v10/channels/1/messages")
+	assert not blueonblue.metrics._is_response("POST", "/api/v10/channels/1/messages/2/reactions")
+	assert not blueonblue.metrics._is_response("POST", "/api/v10/guilds/1/members")
@@ -0,0 +1,121 @@
+import asyncio
+import math
+import types
+from datetime import UTC, datetime, timedelta
+
+import asqlite
+import pytest
+import pytest_asyncio
+
+import cogs.jail
+from blueonblue.__main__ import migrate_db
+
+GUILD_ID = 1
+ROLE = "timeout"
+
+
+class FakeBot:
+	def __init__(self, pool: asqlite.Pool):
+		self.pool = pool
+		self.loop = asyncio.get_running_loop()
+		self.guild = types.SimpleNamespace(id=GUILD_ID, name="guild")
+		self.members: dict[int, types.SimpleNamespace] = {}
+		self.removed: list[int] = []
+		self.serverConfig = types.SimpleNamespace(
+			role_timeout=types.SimpleNamespace(get=self._get_role),
+			channel_mod_activity=types.SimpleNamespace(get=self._get_channel),
+		)
+
+	async def _get_role(self, guild):
+		return ROLE
+
+	async def _get_channel(self, guild):
+		return None
+
+	async def wait_until_ready(self):
+		# The dispatch task is not under test
+		await asyncio.Event().wait()
+
+	def get_guild(self, guildID: int):
+		return self.guild if guildID == GUILD_ID else None
+
+	async def get_or_fetch_member(self, guild, userID: int):
+		return self.members.get(userID)
+
+	def add_member(self, userID: int, timedOutUntil: datetime | None) -> None:
+		async def remove_roles(role, *, reason):
+			self.removed.append(userID)
+
+		self.members[userID] = types.SimpleNamespace(
+			id=userID,
+			guild=self.guild,
+			roles=[ROLE],
+			timed_out_until=timedOutUntil,
+			is_timed_out=lambda: timedOutUntil is not None and timedOutUntil > datetime.now(UTC),
+			remove_roles=remove_roles,
+		)
+
+
+@pytest_asyncio.fixture
+async def jail(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / "data").mkdir()
+	migrate_db()
+	async with asqlite.create_pool("data/blueonblue.sqlite3") as pool:
+		cog = cogs.jail.Jail(FakeBot(pool))
+		yield cog
+		cog._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_schedule_release_rounds_up(jail: cogs.jail.Jail):
+	await jail.schedule_release(GUILD_ID, 10, datetime.fromtimestamp(1000.2, tz=UTC))
+	timer = await jail.get_active_timer()
+	assert timer is not None
+	assert timer.expiry == datetime.fromtimestamp(1001, tz=UTC)
+
+	# Rescheduling replaces the existing timer
+	await jail.schedule_release(GUILD_ID, 10, datetime.fromtimestamp(2000, tz=UTC))
+	timer = await jail.get_active_timer()
+	assert timer is not None
+	assert timer.expiry == datetime.fromtimestamp(2000, tz=UTC)
+
+
+@pytest.mark.asyncio
+async def test_call_timers_releases_expired(jail: cogs.jail.Jail):
+	bot: FakeBot = jail.bot  # type: ignore
+	now = datetime.now(UTC)
+	bot.add_member(10, None)
+	bot.add_member(11, None)
+	await jail.schedule_release(GUILD_ID, 10, now - timedelta(minutes=1))
+	await jail.schedule_release(GUILD_ID, 11, now + timedelta(hours=1))
+
+	timers = await jail.call_timers()
+	assert [t.userID for t in timers] == [10]
+	assert bot.removed == [10]
+	# The timer that has not expired is left in place
+	timer = await jail.get_active_timer()
+	assert timer is not None and timer.userID == 11
+
+
+@pytest.mark.asyncio
+async def test_release_member_reschedules_extended_timeout(jail: cogs.jail.Jail):
+	bot: FakeBot = jail.bot  # type: ignore
+	# Discord timeouts are not whole seconds
+	timedOutUntil = datetime.now(UTC) + timedelta(hours=1, microseconds=400000)
+	bot.add_member(10, timedOutUntil)
+	await jail.release_member(
+		cogs.jail.JailTimer({"server_id": GUILD_ID, "user_id": 10, "release_time": 0})  # type: ignore
+	)
+	assert bot.removed == []
+	timer = await jail.get_active_timer()
+	assert timer is not None
+	assert timer.expiry == datetime.fromtimestamp(math.ceil(timedOutUntil.timestamp()), tz=UTC)
+	assert timer.expiry >= timedOutUntil
+
+
+@pytest.mark.asyncio
+async def test_timer_not_claimed_before_timeout(jail: cogs.jail.Jail):
+	# A timer that expires within the current second must not be claimed early
+	await jail.schedule_release(GUILD_ID, 10, datetime.now(UTC) + timedelta(milliseconds=400))
+	assert await jail.call_timers() == []
@@ -0,0 +1,59 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+
+import blueonblue.log
+
+
+def make_record(msg: str, *args, exc_info=None, **extra) -> logging.LogRecord:
+	record = logging.LogRecord("blueonblue.test", logging.WARNING, __file__, 10, msg, args, exc_info)
+	for key, value in extra.items():
+		setattr(record, key, value)
+	return record
+
+
+def test_json_formatter():
+	try:
+		raise ValueError("broken")
+	except ValueError as e:
+		record = make_record("Value %s", 5, exc_info=(type(e), e, e.__traceback__), guild=1234)
+	entry = json.loads(blueonblue.log._JSONFormatter().format(record))
+	assert entry["message"] == "Value 5"
+	assert entry["level"] == "WARNING"
+	assert entry["logger"] == "blueonblue.test"
+	assert entry["guild"] == 1234
+	assert "ValueError: broken" in entry["exception"]
+	assert "\n" not in blueonblue.log._JSONFormatter().format(record)
+
+
+def test_queue_handler_keeps_exception():
+	logQueue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+	handler = blueonblue.log._QueueHandler(logQueue)
+	values = [1]
+	try:
+		raise ValueError("broken")
+	except ValueError as e:
+		handler.handle(make_record("Values %s", values, exc_info=(type(e), e, e.__traceback__)))
+	# Modifying the arguments after logging must not change the message
+	values.append(2)
+	record = logQueue.get_nowait()
+	assert record.msg == "Values [1]"
+	assert record.args is None
+	assert record.exc_info is not None
+
+
+def test_rotator_compresses(tmp_path):
+	source = tmp_path / "blueonblue.log"
+	source.write_text("line\n" * 100)
+	dest = blueonblue.log._log_namer(str(tmp_path / "blueonblue.log.2026-10-18"))
+	blueonblue.log._log_rotator(str(source), dest)
+	for thread in threading.enumerate():
+		if thread.name == "Log Compression":
+			thread.join()
+	assert not source.exists()
+	assert os.listdir(tmp_path) == ["blueonblue.log.2026-10-18.gz"]
+	with gzip.open(dest, "rt") as file:
+		assert file.read() == "line\n" * 100
@@ -0,0 +1,19 @@
+import asyncio
+
+import pytest
+
+import blueonblue.__main__
+
+
+def test_event_loop_factory():
+	assert blueonblue.__main__.event_loop_factory("asyncio") is None
+	with pytest.raises(ValueError):
+		blueonblue.__main__.event_loop_factory("trio")
+	# Falls back to the default event loop if uvloop is not installed
+	factory = blueonblue.__main__.event_loop_factory("uvloop")
+	if factory is not None:
+		loop = factory()
+		try:
+			assert isinstance(loop, asyncio.AbstractEventLoop)
+		finally:
+			loop.close()
@@ -0,0 +1,88 @@
+import aiohttp
+import asqlite
+import pytest
+
+import blueonblue.db
+import blueonblue.metrics
+
+
+def test_render_counter():
+	registry = blueonblue.metrics.MetricsRegistry()
+	counter = registry.register(blueonblue.metrics.Counter("test_total", "Test counter", ("command",)))
+	counter.inc("ping")
+	counter.inc("ping")
+	counter.inc('say "hi"')
+	text = registry.render()
+	assert "# TYPE test_total counter" in text
+	assert 'test_total{command="ping"} 2.0' in text
+	assert 'test_total{command="say \\"hi\\""} 1.0' in text
+
+
+def test_render_histogram():
+	registry = blueonblue.metrics.MetricsRegistry()
+	histogram = registry.register(blueonblue.metrics.Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0)))
+	histogram.observe(0.05)
+	histogram.observe(0.5)
+	histogram.observe(5.0)
+	lines = registry.render().splitlines()
+	assert 'test_seconds_bucket{le="0.1"} 1.0' in lines
+	assert 'test_seconds_bucket{le="1.0"} 2.0' in lines
+	assert 'test_seconds_bucket{le="+Inf"} 3.0' in lines
+	assert "test_seconds_sum 5.55" in lines
+	assert "test_seconds_count 3.0" in lines
+
+
+def test_render_callback():
+	registry = blueonblue.metrics.MetricsRegistry()
+	registry.register(blueonblue.metrics.CallbackMetric("test_latency", "Test gauge", lambda: [((), 0.25)]))
+	assert "test_latency 0.25" in registry.render().splitlines()
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool(tmp_path):
+	metrics = blueonblue.metrics.BotMetrics()
+	pool = blueonblue.metrics.InstrumentedPool(await asqlite.create_pool(str(tmp_path / "test.sqlite3")), metrics)
+	try:
+		async with pool.acquire() as conn:
+			await conn.execute("CREATE TABLE test (value INTEGER)")
+			await conn.fetchone("SELECT * FROM test")
+	finally:
+		await pool.close()
+	assert metrics.dbPoolWait.count() == 1
+	assert metrics.dbQueryLatency.count("execute") == 1
+	assert metrics.dbQueryLatency.count("fetchone") == 1
+
+
+@pytest.mark.asyncio
+async def test_instrumented_db_connection(tmp_path):
+	metrics = blueonblue.metrics.BotMetrics()
+	database = blueonblue.db.DB(str(tmp_path / "test.sqlite3"), metrics=metrics)
+	async with database.connect() as db:
+		async with db.connection.cursor() as cursor:
+			await cursor.execute("CREATE TABLE test (value INTEGER)")
+			await cursor.execute("INSERT INTO test VALUES (1)")
+			rows = await (await cursor.execute("SELECT * FROM test")).fetchall()
+		await db.commit()
+	assert [row["value"] for row in rows] == [1]
+	assert metrics.dbQueryLatency.count("connect") == 1
+	assert metrics.dbQueryLatency.count("execute") == 3
+	assert metrics.dbQueryLatency.count("fetchall") == 1
+	assert metrics.dbQueryLatency.count("commit") == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_server():
+	metrics = blueonblue.metrics.BotMetrics()
+	metrics.commands.inc("ping", "app", "ok")
+	server = blueonblue.metrics.MetricsServer(metrics, "127.0.0.1", 0)
+	await server.start()
+	try:
+		async with aiohttp.ClientSession(trace_configs=[blueonblue.metrics.http_trace_config(metrics)]) as session:
+			async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+				assert response.status == 200
+				assert response.headers["Content-Type"].startswith("text/plain")
+				text = await response.text()
+	finally:
+		await server.stop()
+	assert 'blueonblue_commands_total{command="ping",kind="app",status="ok"} 1.0' in text
+	assert metrics.httpLatency.count("127.0.0.1") == 1
@@ -1,4 +1,18 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import struct
+import tempfile
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+
+import asqlite
 import cogs.missions
+import discord
+import pbokit
+import pytest
+from blueonblue.__main__ import migrate_db
 
 
 def test_decode_Success():
@@ -42,3 +56,223 @@ def test_decode_errorBadGameType():
 		cogs.missions._decode_file_name("oop_53_daybreak_v1_3.Altis.pbo")
 	except Exception as e:
 		assert isinstance(e,Exception)
+
+
+def _build_pbo(files: dict[str, bytes], *, compressed: tuple[str, ...] = ()) -> bytes:
+	header = b"\x00" + struct.pack("<4s4L", b"sreV", 0, 0, 0, 0) + b"prefix\x00mission\x00\x00"
+	for name, data in files.items():
+		# Compressed entries store their uncompressed size separately
+		mimeType, originalSize = (b"srpC", len(data) * 2) if name in compressed else (b"\x00" * 4, len(data))
+		header += name.encode() + b"\x00" + struct.pack("<4s4L", mimeType, originalSize, 0, 0, len(data))
+	header += b"\x00" + struct.pack("<4s4L", b"\x00" * 4, 0, 0, 0, 0)
+	content = header + b"".join(files.values())
+	return content + b"\x00" + hashlib.sha1(content).digest()
+
+
+DESCRIPTION = b'briefingName = "COOP 52+1 - Daybreak v1.8";\n'
+
+
+def test_read_pbo_file():
+	pbo = _build_pbo({"mission.sqm": b"version=54;", "description.ext": DESCRIPTION})
+	assert cogs.missions._read_pbo_file(pbo, "description.ext") == DESCRIPTION
+	assert cogs.missions._read_pbo_file(pbo, "init.sqf") is None
+	# Cross-check against the full PBO reader
+	assert pbokit.PBO.from_bytes(pbo)["description.ext"].as_str() == DESCRIPTION.decode()
+
+
+def test_read_pbo_file_badChecksum():
+	pbo = bytearray(_build_pbo({"description.ext": DESCRIPTION}))
+	pbo[-1] ^= 0xFF
+	with pytest.raises(ValueError):
+		cogs.missions._read_pbo_file(bytes(pbo), "description.ext")
+
+
+def test_read_pbo_file_compressed():
+	pbo = _build_pbo({"mission.sqm": b"version=54;", "description.ext": DESCRIPTION}, compressed=("mission.sqm",))
+	with pytest.raises(ValueError, match="Compressed"):
+		cogs.missions._read_pbo_file(pbo, "description.ext")
+	with pytest.raises(cogs.missions.MissionValidationError):
+		cogs.missions._validate_mission(pbo)
+
+
+def test_validate_mission():
+	result = cogs.missions._validate_mission(_build_pbo({"description.ext": DESCRIPTION}))
+	assert result["gameType"] == "coop"
+	assert result["playerCount"] == 52
+	assert result["name"] == "Daybreak"
+	assert result["version"] == "1.8"
+
+
+def test_validate_mission_noDescription():
+	with pytest.raises(cogs.missions.MissionValidationError):
+		cogs.missions._validate_mission(_build_pbo({"mission.sqm": b"version=54;"}))
+
+
+def test_map_file():
+	pbo = _build_pbo({"description.ext": DESCRIPTION})
+	with tempfile.TemporaryFile() as diskFile:
+		diskFile.write(pbo)
+		for file in (io.BytesIO(pbo), diskFile):
+			with cogs.missions._map_file(file) as buffer:
+				assert cogs.missions._read_pbo_file(buffer, "description.ext") == DESCRIPTION
+
+
+def test_validate_mission_file(tmp_path):
+	path = tmp_path / "coop_52_daybreak_v1_8.Altis.pbo"
+	path.write_bytes(_build_pbo({"description.ext": DESCRIPTION}))
+	# Workers are started the same way as the cog's validation pool, so the worker function must be importable
+	with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("forkserver")) as pool:
+		report = pool.submit(cogs.missions._validate_mission_file, path.name, str(path)).result()
+	assert report["error"] is None
+	assert report["fileNameInfo"] is not None and report["fileNameInfo"]["map"] == "altis"
+	assert report["briefing"] is not None and report["briefing"]["version"] == "1.8"
+
+
+def test_validate_mission_file_badName():
+	report = cogs.missions._validate_mission_file("daybreak.Altis.pbo", _build_pbo({"description.ext": DESCRIPTION}))
+	assert report["errorStage"] == "filename"
+	assert report["briefing"] is None
+
+
+PROPFIND_RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<d:multistatus xmlns:d="DAV:">
+	<d:response><d:href>/missions/</d:href><d:propstat><d:prop><d:resourcetype><d:collection/></d:resourcetype></d:prop></d:propstat></d:response>
+	<d:response><d:href>/missions/coop_52_daybreak_v1_8.Altis.pbo</d:href><d:propstat><d:prop><d:resourcetype/></d:prop></d:propstat></d:response>
+	<d:response><d:href>/missions/tvt_20_dusk%20raid_v2.Tanoa.pbo</d:href><d:propstat><d:prop><d:resourcetype/></d:prop></d:propstat></d:response>
+	<d:response><d:href>/missions/readme.txt</d:href><d:propstat><d:prop><d:resourcetype/></d:prop></d:propstat></d:response>
+</d:multistatus>"""
+
+
+def test_parse_propfind():
+	assert cogs.missions._parse_propfind(PROPFIND_RESPONSE) == [
+		"coop_52_daybreak_v1_8.Altis.pbo",
+		"tvt_20_dusk raid_v2.Tanoa.pbo",
+	]
+
+
+def test_catalog_search():
+	catalog = cogs.missions.MissionCatalog(
+		["coop_52_daybreak_v1_8.Altis.pbo", "tvt_20_daybreak_v1.Tanoa.pbo", "coop_10_dawn_v1.Altis.pbo"]
+	)
+	assert "COOP_52_DAYBREAK_V1_8.altis.pbo" in catalog
+	assert catalog.search("coop") == ["coop_10_dawn_v1.Altis.pbo", "coop_52_daybreak_v1_8.Altis.pbo"]
+	assert catalog.search("daybreak") == ["coop_52_daybreak_v1_8.Altis.pbo", "tvt_20_daybreak_v1.Tanoa.pbo"]
+	assert len(catalog.search("", limit=2)) == 2
+
+
+def test_catalog_suggest_version():
+	catalog = cogs.missions.MissionCatalog(["coop_52_daybreak_v1_8.Altis.pbo", "coop_52_daybreak_v1_10.Altis.pbo"])
+	assert catalog.suggest_version("coop_52_daybreak_v1_8.Altis.pbo") == "coop_52_daybreak_v1_11.Altis.pbo"
+	assert catalog.suggest_version("coop_52_dawn_v1.Altis.pbo") is None
+
+
+@pytest.mark.asyncio
+async def test_upload_queue_limits():
+	queue = cogs.missions.UploadQueue(concurrency=2, guildConcurrency=1, maxQueued=2)
+	running: list[int] = []
+	peak = 0
+	guildPeak: dict[int, int] = {}
+	rejected: list[int] = []
+
+	async def job(guildID: int):
+		nonlocal peak
+		if not queue.reserve():
+			rejected.append(guildID)
+			return
+		async with queue.slot(guildID):
+			running.append(guildID)
+			peak = max(peak, len(running))
+			guildPeak[guildID] = max(guildPeak.get(guildID, 0), running.count(guildID))
+			await asyncio.sleep(0.01)
+			running.remove(guildID)
+
+	tasks = [asyncio.create_task(job(guildID)) for guildID in (1, 1, 2, 2, 3)]
+	await asyncio.sleep(0)
+	assert queue.active == 2
+	assert queue.full()
+	await asyncio.gather(*tasks)
+	# Two uploads were waiting for guild 1 and 2, so the last upload was rejected
+	assert rejected == [3]
+	assert peak == 2
+	assert all(p == 1 for p in guildPeak.values())
+	assert queue.active == 0 and queue.queued == 0
+
+
+def test_upload_job_describe():
+	attachment = SimpleNamespace(filename="coop_52_daybreak_v1_8.Altis.pbo", size=100)
+	job = cogs.missions.UploadJob(None, attachment)  # type: ignore
+	job.start_phase("failed")
+	assert job.describe().startswith("Mission `coop_52_daybreak_v1_8.Altis.pbo` was not uploaded.")
+	job.phase = "done"
+	assert job.describe().startswith("Finished uploading mission")
+
+
+@pytest.mark.asyncio
+async def test_upload_large_mission(tmp_path, monkeypatch):
+	# Missions over the spool size are written to a temporary file on disk
+	monkeypatch.setattr(cogs.missions, "MISSION_SPOOL_MAX_SIZE", 16)
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / "data").mkdir()
+	migrate_db()
+	fileName = "coop_52_daybreak_v1_8.Altis.pbo"
+	contents = _build_pbo({"description.ext": DESCRIPTION})
+	uploaded = bytearray()
+	sent: list[discord.File] = []
+
+	class Response:
+		status = 201
+
+		def __init__(self, data):
+			self.data = data
+
+		async def __aenter__(self):
+			async for chunk in self.data:
+				uploaded.extend(chunk)
+			return self
+
+		async def __aexit__(self, *exc):
+			pass
+
+	def put(*, url, auth, raise_for_status, data, headers):
+		return Response(data)
+
+	async def send(content, *, files=(), **kwargs):
+		for file in files:
+			sent.append(file)
+			# The confirmation message attaches the local copy of the mission
+			assert file.fp.read() == contents
+
+	async with asqlite.create_pool("data/blueonblue.sqlite3") as pool:
+		bot = SimpleNamespace(pool=pool, httpSession=SimpleNamespace(put=put))
+		cog = cogs.missions.Missions(bot)
+		attachment = SimpleNamespace(filename=fileName, size=len(contents))
+		interaction = SimpleNamespace(guild=SimpleNamespace(id=1), followup=SimpleNamespace(send=send))
+		job = cogs.missions.UploadJob(interaction, attachment)  # type: ignore
+
+		async def download(attachment, file):
+			file.write(contents)
+			return hashlib.sha256(contents).hexdigest()
+
+		async def validate(fileName, source, contentHash):
+			# Large missions are validated from disk
+			assert isinstance(source, str)
+			return {"error": None}
+
+		async def upload_target(guild):
+			return "https://missions.example/", None
+
+		async def get_catalog(guild):
+			return None
+
+		async def remote_file_exists(catalog, uploadURL, authObj, fileName):
+			return False
+
+		monkeypatch.setattr(cog, "_download_attachment", download)
+		monkeypatch.setattr(cog, "_validate", validate)
+		monkeypatch.setattr(cog, "_upload_target", upload_target)
+		monkeypatch.setattr(cog, "get_catalog", get_catalog)
+		monkeypatch.setattr(cog, "_remote_file_exists", remote_file_exists)
+		assert await cog._process_upload(job)
+
+	assert bytes(uploaded) == contents
+	assert len(sent) == 1 and sent[0].filename == fileName
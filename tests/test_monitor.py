@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+
+import blueonblue.monitor
+
+
+def test_percentile():
+	values = [float(v) for v in range(1, 101)]
+	assert blueonblue.monitor.percentile(values, 50) == 50.0
+	assert blueonblue.monitor.percentile(values, 99) == 99.0
+	assert blueonblue.monitor.percentile(values, 100) == 100.0
+	assert blueonblue.monitor.percentile([], 50) == 0.0
+
+
+def block_event_loop():
+	time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_monitor_captures_blocking_stack():
+	lags: list[float] = []
+	monitor = blueonblue.monitor.LoopMonitor(0.1, interval=0.02, onSample=lags.append)
+	monitor.start()
+	try:
+		await asyncio.sleep(0.05)
+		block_event_loop()
+		await asyncio.sleep(0.05)
+	finally:
+		monitor.stop()
+	assert monitor.slowEvents >= 1
+	assert max(lags) > 0.1
+	assert monitor.lastBlocked is not None
+	assert "block_event_loop" in monitor.lastBlocked
+
+
+def test_resident_memory():
+	rss = blueonblue.monitor.resident_memory()
+	assert rss is None or rss > 0
@@ -1,5 +1,10 @@
-# import pytest
 # import blueonblue.db
+import asyncio
+import types
+
+import pytest
+
+import blueonblue
 import cogs.pings
 
 
@@ -69,3 +74,76 @@ def test_sanitize_comma():
 
 # 	userCount = await db.pings.count_users(pingName, serverID)
 # 	assert userCount == 2
+
+
+def fake_guild(members: dict[int, str], chunk):
+	guild = types.SimpleNamespace(chunked=False, name="guild", id=1, get_member=members.get)
+
+	async def chunk_guild():
+		await chunk()
+		guild.chunked = True
+
+	guild.chunk = chunk_guild
+	return guild
+
+
+def fake_bot():
+	bot = types.SimpleNamespace()
+	bot.ensure_chunked = lambda guild: blueonblue.BlueOnBlueBot.ensure_chunked(bot, guild)  # type: ignore
+	bot.get_members = lambda guild, userIDs: blueonblue.BlueOnBlueBot.get_members(bot, guild, userIDs)  # type: ignore
+	return bot
+
+
+@pytest.mark.asyncio
+async def test_get_members_chunks_guild():
+	chunks = []
+
+	async def chunk():
+		chunks.append(1)
+
+	guild = fake_guild({1: "one", 2: "two"}, chunk)
+	bot = fake_bot()
+	assert await bot.get_members(guild, [1, 2, 3]) == ["one", "two"]
+	# Chunked guilds are served from the cache
+	assert await bot.get_members(guild, [2, 3]) == ["two"]
+	assert len(chunks) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_members_timeout(monkeypatch):
+	monkeypatch.setattr(blueonblue.bot, "MEMBER_CHUNK_TIMEOUT", 0.01)
+
+	async def chunk():
+		await asyncio.sleep(1)
+
+	guild = fake_guild({1: "one"}, chunk)
+	# A partial member list must never be returned
+	with pytest.raises(asyncio.TimeoutError):
+		await fake_bot().get_members(guild, [1, 2])
+
+
+@pytest.mark.asyncio
+async def test_ping_defers_and_reports_timeout(monkeypatch):
+	monkeypatch.setattr(blueonblue.bot, "MEMBER_CHUNK_TIMEOUT", 0.01)
+
+	async def chunk():
+		await asyncio.sleep(1)
+
+	sent: list[str] = []
+	deferred = []
+
+	async def defer():
+		deferred.append(1)
+
+	async def send(content):
+		sent.append(content)
+
+	interaction = types.SimpleNamespace(
+		guild=fake_guild({}, chunk),
+		response=types.SimpleNamespace(defer=defer),
+		followup=types.SimpleNamespace(send=send),
+	)
+	cog = cogs.pings.Pings(fake_bot())
+	assert not await cog._load_members(interaction)  # type: ignore
+	assert deferred == [1]
+	assert len(sent) == 1 and "unable to load the members" in sent[0]
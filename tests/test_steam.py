@@ -0,0 +1,188 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+import blueonblue.lib.steam
+
+
+class FakeSteamClient(blueonblue.lib.steam.SteamClient):
+	def __init__(self):
+		super().__init__(None, "")  # type: ignore
+		self.calls: list[dict[str, str]] = []
+
+	async def _get(self, endpoint, params):
+		self.calls.append(params)
+		return {"players": [{"steamid": s, "personaname": f"name{s}"} for s in params["steamids"].split(",") if s != "0"]}
+
+
+@pytest.mark.asyncio
+async def test_player_summary_batching():
+	client = FakeSteamClient()
+	steamIDs = [str(i) for i in range(1, 151)]
+	summaries = await client.get_player_summaries(steamIDs)
+	assert len(summaries) == 150
+	assert summaries["42"]["personaname"] == "name42"
+	assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_player_summary_not_found():
+	client = FakeSteamClient()
+	results = await asyncio.gather(
+		client.get_player_summary("0"), client.get_player_summary("1"), return_exceptions=True
+	)
+	assert isinstance(results[0], blueonblue.lib.steam.NoSteamUserFound)
+	assert not isinstance(results[1], BaseException)
+	assert results[1]["steamid"] == "1"
+	assert len(client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_in_guild_group_rechecks_missing_group():
+	groups = [(1,), (1, 2)]
+	calls = []
+
+	class GroupClient(blueonblue.lib.steam.SteamClient):
+		async def _get(self, endpoint, params):
+			calls.append(endpoint)
+			return {"groups": [{"gid": str(g)} for g in groups[len(calls) - 1]]}
+
+	async def steam_group_id(guildID):
+		return 2
+
+	client = GroupClient(None, "")  # type: ignore
+	bot = SimpleNamespace(steam=client, serverConfig=SimpleNamespace(steam_group_id=SimpleNamespace(get=steam_group_id)))
+	# The cached group list does not have the group, so it is requested again
+	assert await blueonblue.lib.steam.in_guild_group(bot, 1, "10")  # type: ignore
+	assert len(calls) == 2
+	# Positive results are served from the cache
+	assert await blueonblue.lib.steam.in_guild_group(bot, 1, "10")  # type: ignore
+	assert len(calls) == 2
+
+
+def test_circuit_breaker():
+	breaker = blueonblue.lib.steam.CircuitBreaker(threshold=2, resetTimeout=0)
+	breaker.record_failure()
+	breaker.check()
+	breaker.record_failure()
+	assert breaker.state == blueonblue.lib.steam.BreakerState.OPEN
+	# Reset timeout has passed, allow a single trial request
+	breaker.check()
+	assert breaker.state == blueonblue.lib.steam.BreakerState.HALF_OPEN
+	with pytest.raises(blueonblue.lib.steam.SteamUnavailable):
+		breaker.check()
+	breaker.record_success()
+	assert breaker.state == blueonblue.lib.steam.BreakerState.CLOSED
+
+
+def test_circuit_breaker_trial_timeout():
+	breaker = blueonblue.lib.steam.CircuitBreaker(threshold=1, resetTimeout=0, trialTimeout=0)
+	breaker.record_failure()
+	breaker.check()
+	assert breaker.state == blueonblue.lib.steam.BreakerState.HALF_OPEN
+	# The trial request never completed, so the breaker opens again
+	with pytest.raises(blueonblue.lib.steam.SteamUnavailable):
+		breaker.check()
+	assert breaker.state == blueonblue.lib.steam.BreakerState.OPEN
+
+
+def open_breaker_client() -> blueonblue.lib.steam.SteamClient:
+	client = blueonblue.lib.steam.SteamClient(None, "")  # type: ignore
+	client.breaker = blueonblue.lib.steam.CircuitBreaker(threshold=1, resetTimeout=0)
+	client.breaker.record_failure()
+	return client
+
+
+@pytest.mark.asyncio
+async def test_client_error_closes_breaker():
+	client = open_breaker_client()
+
+	async def forbidden():
+		raise aiohttp.ClientResponseError(None, (), status=403)  # type: ignore
+
+	# A private profile is not a sign that Steam is degraded
+	with pytest.raises(aiohttp.ClientResponseError):
+		await client._with_retries(forbidden)
+	assert client.breaker.state == blueonblue.lib.steam.BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_releases_breaker():
+	client = open_breaker_client()
+	started = asyncio.Event()
+
+	async def hang():
+		started.set()
+		await asyncio.Event().wait()
+
+	task = asyncio.create_task(client._with_retries(hang))
+	await started.wait()
+	assert client.breaker.state == blueonblue.lib.steam.BreakerState.HALF_OPEN
+	# Another trial request is not allowed while the first is in progress
+	with pytest.raises(blueonblue.lib.steam.SteamUnavailable):
+		client.breaker.check()
+	task.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await task
+	# Cancellation is not a failure, but it releases the trial request
+	assert client.breaker.state == blueonblue.lib.steam.BreakerState.HALF_OPEN
+	client.breaker.check()
+	with pytest.raises(blueonblue.lib.steam.SteamUnavailable):
+		client.breaker.check()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_do_not_open_breaker():
+	client = blueonblue.lib.steam.SteamClient(None, "")  # type: ignore
+	client.breaker = blueonblue.lib.steam.CircuitBreaker(threshold=2)
+
+	async def hang():
+		await asyncio.Event().wait()
+
+	for _ in range(3):
+		task = asyncio.create_task(client._with_retries(hang))
+		await asyncio.sleep(0)
+		task.cancel()
+		with pytest.raises(asyncio.CancelledError):
+			await task
+	assert client.breaker.state == blueonblue.lib.steam.BreakerState.CLOSED
+	assert client.breaker.failures == 0
+
+
+def test_retry_delay():
+	assert blueonblue.lib.steam._retry_delay(0, "5") == 5
+	for attempt in range(10):
+		assert 0 <= blueonblue.lib.steam._retry_delay(attempt) <= blueonblue.lib.steam.RETRY_MAX_DELAY
+
+
+def group_page(groupID64: int, members: tuple[int, ...], memberCount: int, totalPages: int = 1) -> str:
+	steamIDs = "".join(f"<steamID64>{m}</steamID64>" for m in members)
+	return (
+		f"<memberList><groupID64>{groupID64}</groupID64><memberCount>{memberCount}</memberCount>"
+		f"<totalPages>{totalPages}</totalPages><currentPage>1</currentPage><members>{steamIDs}</members></memberList>"
+	)
+
+
+def test_parse_group_page():
+	groupID64 = blueonblue.lib.steam.STEAM_GROUP_ID64_BASE + 5
+	page = blueonblue.lib.steam._parse_group_page(group_page(groupID64, (1, 2), 3, 2), 5)
+	assert page == blueonblue.lib.steam.GroupMembersPage((1, 2), 3, 2)
+
+
+@pytest.mark.parametrize(
+	"text",
+	[
+		# Error page
+		"<response><error><![CDATA[The specified group could not be found.]]></error></response>",
+		# Member list without a member count or pages, such as for a private group
+		f"<memberList><groupID64>{blueonblue.lib.steam.STEAM_GROUP_ID64_BASE + 5}</groupID64><members /></memberList>",
+		# Member list for a different group
+		group_page(blueonblue.lib.steam.STEAM_GROUP_ID64_BASE + 6, (1,), 1),
+		"<html><body>Service unavailable</body></html>",
+	],
+)
+def test_parse_group_page_rejects(text: str):
+	with pytest.raises(blueonblue.lib.steam.ElementTree.ParseError):
+		blueonblue.lib.steam._parse_group_page(text, 5)
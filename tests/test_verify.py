@@ -0,0 +1,30 @@
+import types
+import xml.etree.ElementTree as ElementTree
+
+import asqlite
+import pytest
+
+import blueonblue.lib.steam
+import cogs.verify
+from blueonblue.__main__ import migrate_db
+
+
+@pytest.mark.asyncio
+async def test_collect_empty_group_keeps_members(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / "data").mkdir()
+	migrate_db()
+
+	async def get_group_members_page(groupID: int, page: int):
+		# Steam reports members, but the page does not list any
+		return blueonblue.lib.steam.GroupMembersPage((), 10, 1)
+
+	guild = types.SimpleNamespace(id=1, name="guild")
+	async with asqlite.create_pool("data/blueonblue.sqlite3") as pool:
+		bot = types.SimpleNamespace(pool=pool, steam=types.SimpleNamespace(get_group_members_page=get_group_members_page))
+		cog = cogs.verify.Verify(bot)
+		with pytest.raises(ElementTree.ParseError):
+			await cog._collect_group_members(guild, 5)  # type: ignore
+		# The next sweep starts over
+		async with pool.acquire() as conn:
+			assert await conn.fetchone("SELECT * FROM verify_sweeps") is None